@@ -0,0 +1,906 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "markdown>=3.7",
+#   "PyYAML>=6.0",
+#   "jsonschema>=4.22",
+# ]
+# ///
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import gc
+import hashlib
+import http.client
+import importlib.util
+import json
+import os
+import pathlib
+import platform
+import re
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.parse
+import urllib.request
+from types import ModuleType
+from typing import Any, Callable
+
+DEFAULT_RENDERER = pathlib.Path(__file__).with_name("render_story.py")
+DEFAULT_VALIDATOR = pathlib.Path(__file__).with_name("validate_story.py")
+DEFAULT_CORPUS_GENERATOR = pathlib.Path(__file__).with_name("generate_corpus.py")
+DEFAULT_MEMORY_CORPUS = 200
+RELOAD_READY_TIMEOUT = 60.0
+RELOAD_STORY_SUFFIX = "-reloaded"
+DEFAULT_STORY_DIRS = ("stories", "examples")
+SYNTHETIC_STORY_SOURCE = (
+    pathlib.Path(__file__).resolve().parent.parent / "stories/prince-career/story.mdx"
+)
+SYNTHETIC_STORY_BYTES = 1 << 20
+SUITE_SYNTHETIC_BYTES = (256 << 10, 1 << 20)
+SUITE_RESULTS_VERSION = 1
+DEFAULT_SUITE_MIN_TIME = 0.1
+DEFAULT_SUITE_REPEAT = 5
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+DEFAULT_STARTUP_TARGET = 0.3
+STARTUP_TARGET_BENCHMARK = "startup[render-cached]"
+STARTUP_TOP_IMPORTS = 5
+IMPORT_TIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+SECTION_ID_RE = re.compile(r'(<Section\s+id=")([^"]+)(")')
+ROUTE_STORY_ID = "synthetic-000000"
+ROUTE_CASES = (
+    ("/", "index", False),
+    ("/index.html", "index", False),
+    ("/search", "search", False),
+    ("/metrics", "internal", False),
+    ("/healthz", "internal", False),
+    ("/readyz", "internal", False),
+    ("/debug/memory", "internal", False),
+    ("/stories/{id}", "story", True),
+    ("/assets/{id}/image-01.png", "asset", True),
+    ("/api/stories", "api", False),
+    ("/api/stories/changes", "api", False),
+    ("/api/stories/{id}.json", "api", True),
+    ("/api/stories/{id}/assets.json", "api", True),
+    ("/api/search", "api", False),
+    ("/api/media", "api", False),
+    ("/bundles/{id}.zip", "bundle", True),
+    ("/favicon.ico", "other", False),
+)
+ROUTE_VARIANT_RE = re.compile(r'"(/assets/[^"]+/_variants/[^"]+)"')
+
+
+def load_renderer(path: pathlib.Path, name: str = "render_story") -> ModuleType:
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load renderer from {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure_story_memory(
+    renderer: ModuleType, story_paths: list[pathlib.Path], copies: int
+) -> int:
+    renderer.build_story(story_paths[0])
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        cache = [
+            renderer.build_story(story_path)
+            for _ in range(copies)
+            for story_path in story_paths
+        ]
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) // max(len(cache), 1)
+
+
+def write_corpus(output: pathlib.Path, stories: int, assets: int = 0) -> pathlib.Path:
+    generator = load_renderer(DEFAULT_CORPUS_GENERATOR, "generate_corpus")
+    defaults = generator.parse_args([str(output)])
+    config = generator.CorpusConfig(
+        output=output,
+        seed=defaults.seed,
+        sections=defaults.sections,
+        media=defaults.media,
+        blocks_per_section=defaults.blocks_per_section,
+        block_mix=defaults.block_mix,
+        paragraphs=defaults.paragraphs,
+        paragraph_words=defaults.paragraph_words,
+        assets=assets,
+        artists=defaults.artists,
+        media_pool=defaults.media_pool,
+    )
+    generator.write_story_range(config, 0, stories)
+    return output
+
+
+def write_synthetic_story(
+    source: pathlib.Path, target_dir: pathlib.Path, size: int
+) -> pathlib.Path:
+    text = source.read_text(encoding="utf-8")
+    _, front_matter, body = text.split("---\n", 2)
+    parts = [body]
+    total = len(body)
+    copy = 0
+    while total < size:
+        copy += 1
+        chunk = SECTION_ID_RE.sub(rf"\g<1>\g<2>-{copy}\g<3>", body)
+        parts.append(chunk)
+        total += len(chunk)
+    story_dir = target_dir / "synthetic-story"
+    story_dir.mkdir(parents=True, exist_ok=True)
+    story_path = story_dir / "story.mdx"
+    story_path.write_text(
+        f"---\n{front_matter}---\n{''.join(parts)}", encoding="utf-8"
+    )
+    return story_path
+
+
+def time_story_load(
+    renderer: ModuleType,
+    story_path: pathlib.Path,
+    compiled_dir: pathlib.Path | None,
+    repeat: int,
+) -> float:
+    renderer.build_story(story_path, compiled_dir)
+    timings: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        renderer.build_story(story_path, compiled_dir)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def count_calls(
+    renderer: ModuleType, name: str, counts: dict[str, int], delay: float
+) -> None:
+    original = getattr(renderer, name)
+    lock = threading.Lock()
+
+    def counted(*args: Any, **kwargs: Any) -> Any:
+        with lock:
+            counts[name] += 1
+        time.sleep(delay)
+        return original(*args, **kwargs)
+
+    counts[name] = 0
+    setattr(renderer, name, counted)
+
+
+def fire_concurrent_requests(urls: list[str], requests: int) -> list[int]:
+    barrier = threading.Barrier(requests * len(urls))
+
+    def fetch(url: str) -> int:
+        barrier.wait()
+        with urllib.request.urlopen(url) as response:
+            response.read()
+            return response.status
+
+    with concurrent.futures.ThreadPoolExecutor(requests * len(urls)) as pool:
+        futures = [pool.submit(fetch, url) for url in urls for _ in range(requests)]
+        return [future.result() for future in futures]
+
+
+def time_benchmark(
+    fn: Callable[[], Any], min_time: float, repeat: int
+) -> dict[str, Any]:
+    fn()
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - started) / loops)
+    return {
+        "loops": loops,
+        "samples": samples,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def story_benchmarks(
+    renderer: ModuleType, story_path: pathlib.Path, label: str, servers: list[Any]
+) -> dict[str, Callable[[], Any]]:
+    meta, body = renderer.load_story_text(story_path)
+    section_meta = {
+        str(item.get("id")): item
+        for item in meta.get("sections", [])
+        if isinstance(item, dict) and item.get("id")
+    }
+    story = renderer.build_story(story_path, None)
+    library = renderer.StoryLibrary([story_path], 0)
+    story_id = next(iter(library.entries))
+    story_urls: list[str] = []
+    for memory_budget in (None, renderer.MemoryBudget(0)):
+        handler = renderer.make_story_handler(
+            library, "", memory_budget=memory_budget
+        )
+        server = renderer.make_story_server(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        story_urls.append(
+            f"http://127.0.0.1:{server.server_address[1]}/stories/{story_id}"
+        )
+
+    def render_bodies() -> None:
+        for section in story.sections:
+            renderer.render_section_body(
+                section.body, story.media, f"/assets/{story_id}", blocks=section.blocks
+            )
+
+    def serve_story(story_url: str) -> None:
+        with urllib.request.urlopen(story_url) as response:
+            response.read()
+
+    return {
+        f"load_story_text[{label}]": lambda: renderer.load_story_text(story_path),
+        f"validate_story[{label}]": lambda: renderer.validate_story_meta(meta),
+        f"parse_sections[{label}]": lambda: renderer.parse_sections(body, section_meta),
+        f"render_section_body[{label}]": render_bodies,
+        f"render_story_html[{label}]": lambda: renderer.render_story_html(story),
+        f"serve_story_cached[{label}]": lambda: serve_story(story_urls[0]),
+        f"serve_story_cold[{label}]": lambda: serve_story(story_urls[1]),
+    }
+
+
+def startup_commands(
+    story_path: pathlib.Path, temp_root: pathlib.Path
+) -> dict[str, list[str]]:
+    return {
+        "startup[python]": ["-c", "pass"],
+        "startup[help]": [str(DEFAULT_RENDERER), "--help"],
+        STARTUP_TARGET_BENCHMARK: [
+            str(DEFAULT_RENDERER),
+            "render",
+            str(story_path),
+            str(temp_root / "startup-render"),
+            "--cache-dir",
+            str(temp_root / "startup-cache"),
+        ],
+        "startup[validate]": [str(DEFAULT_VALIDATOR), str(story_path)],
+    }
+
+
+def run_python(argv: list[str], importtime: bool = False) -> str:
+    flags = ["-X", "importtime"] if importtime else []
+    result = subprocess.run(
+        [sys.executable, *flags, *argv],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} failed: {result.stderr.strip()}")
+    return result.stderr
+
+
+def parse_import_times(stderr: str) -> dict[str, int]:
+    cumulative: dict[str, int] = {}
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match is not None and not match.group(3):
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative
+
+
+def measure_imports(argv: list[str]) -> dict[str, Any]:
+    imports = parse_import_times(run_python(argv, importtime=True))
+    top = sorted(imports.items(), key=lambda item: -item[1])[:STARTUP_TOP_IMPORTS]
+    return {
+        "total_ms": sum(imports.values()) / 1000,
+        "modules": len(imports),
+        "top": [[name, microseconds / 1000] for name, microseconds in top],
+    }
+
+
+def benchmark_environment(renderer: ModuleType) -> dict[str, Any]:
+    renderer_path = pathlib.Path(renderer.__file__)
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "renderer_sha256": hashlib.sha256(renderer_path.read_bytes()).hexdigest(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def parse_suite_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Time parse, validate, render and serve hot paths."
+    )
+    parser.add_argument(
+        "stories",
+        nargs="*",
+        default=None,
+        help="Story directories or story.mdx paths",
+    )
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument(
+        "--synthetic-bytes",
+        type=int,
+        nargs="*",
+        default=list(SUITE_SYNTHETIC_BYTES),
+        help="Sizes of generated long-form stories to include",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=DEFAULT_SUITE_MIN_TIME,
+        help="Minimum seconds per sample; loops are doubled until reached",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_SUITE_REPEAT, help="Samples per benchmark"
+    )
+    parser.add_argument(
+        "--filter", help="Only run benchmarks whose name matches this regex"
+    )
+    parser.add_argument(
+        "--startup-target",
+        type=float,
+        default=DEFAULT_STARTUP_TARGET,
+        help=f"Seconds allowed for {STARTUP_TARGET_BENCHMARK}; slower runs fail",
+    )
+    return parser.parse_args(argv)
+
+
+def run_suite(args: argparse.Namespace) -> int:
+    renderer = load_renderer(DEFAULT_RENDERER)
+    story_paths = renderer.discover_story_paths(
+        args.stories or list(DEFAULT_STORY_DIRS)
+    )
+    pattern = re.compile(args.filter) if args.filter else None
+    results: dict[str, dict[str, Any]] = {}
+    servers: list[Any] = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        try:
+            temp_root = pathlib.Path(temp_dir)
+            inputs = [
+                (story_path.parent.name, story_path) for story_path in story_paths
+            ]
+            if SYNTHETIC_STORY_SOURCE.exists():
+                for size in args.synthetic_bytes:
+                    inputs.append(
+                        (
+                            f"synthetic-{size // 1024}k",
+                            write_synthetic_story(
+                                SYNTHETIC_STORY_SOURCE, temp_root / str(size), size
+                            ),
+                        )
+                    )
+            if not inputs:
+                print("No stories found to benchmark.")
+                return 1
+            benchmarks: dict[str, Callable[[], Any]] = {
+                "build_story_index[corpus]": lambda: renderer.build_story_index(
+                    story_paths
+                )
+            }
+            startup = startup_commands(inputs[0][1], temp_root)
+            for name, command in startup.items():
+                benchmarks[name] = lambda command=command: run_python(command)
+            for label, story_path in inputs:
+                benchmarks.update(
+                    story_benchmarks(renderer, story_path, label, servers)
+                )
+            print(f"{'benchmark':<56} {'median ms':>10} {'stdev':>8} {'loops':>7}")
+            for name, fn in benchmarks.items():
+                if pattern is not None and not pattern.search(name):
+                    continue
+                result = time_benchmark(fn, args.min_time, args.repeat)
+                if name in startup:
+                    result["imports"] = measure_imports(startup[name])
+                results[name] = result
+                print(
+                    f"{name:<56} {result['median'] * 1000:>10.3f} "
+                    f"{result['stdev'] * 1000:>8.3f} {result['loops']:>7}"
+                )
+                if name in startup:
+                    imports = result["imports"]
+                    heaviest = ", ".join(
+                        f"{module} {milliseconds:.1f}"
+                        for module, milliseconds in imports["top"]
+                    )
+                    print(f"  imports {imports['total_ms']:.1f} ms: {heaviest}")
+        finally:
+            for server in servers:
+                server.shutdown()
+                server.server_close()
+    if args.output:
+        output = pathlib.Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(
+            json.dumps(
+                {
+                    "version": SUITE_RESULTS_VERSION,
+                    "environment": benchmark_environment(renderer),
+                    "benchmarks": results,
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        print(f"Wrote {len(results)} results to {output}")
+    target = results.get(STARTUP_TARGET_BENCHMARK)
+    if target is not None and target["median"] > args.startup_target:
+        print(
+            f"{STARTUP_TARGET_BENCHMARK} took {target['median'] * 1000:.1f} ms, "
+            f"over the {args.startup_target * 1000:.0f} ms target"
+        )
+        return 1
+    return 0
+
+
+def load_suite_results(path: pathlib.Path) -> dict[str, dict[str, Any]]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if payload.get("version") != SUITE_RESULTS_VERSION:
+        raise ValueError(f"{path} is not a version {SUITE_RESULTS_VERSION} result file")
+    return payload["benchmarks"]
+
+
+def parse_compare_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare two suite result files and flag regressions."
+    )
+    parser.add_argument("baseline", help="Result JSON from the reference revision")
+    parser.add_argument("candidate", help="Result JSON from the revision under test")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help="Relative slowdown of the median that counts as a regression",
+    )
+    return parser.parse_args(argv)
+
+
+def run_compare(args: argparse.Namespace) -> int:
+    try:
+        baseline = load_suite_results(pathlib.Path(args.baseline))
+        candidate = load_suite_results(pathlib.Path(args.candidate))
+    except (OSError, ValueError, KeyError) as exc:
+        print(f"Error: {exc}")
+        return 1
+    regressions = 0
+    print(f"{'benchmark':<56} {'base ms':>10} {'new ms':>10} {'change':>8}")
+    for name in sorted(baseline.keys() & candidate.keys()):
+        before = baseline[name]["median"]
+        after = candidate[name]["median"]
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(
+            f"{name:<56} {before * 1000:>10.3f} {after * 1000:>10.3f} "
+            f"{change:>+8.1%}{flag}"
+        )
+    missing = len(baseline.keys() - candidate.keys())
+    if missing:
+        print(f"{missing} baseline benchmarks missing from {args.candidate}")
+    if regressions:
+        print(f"{regressions} regressions beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+def parse_coalesce_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Check that concurrent cold requests for a story share one render."
+    )
+    parser.add_argument(
+        "story",
+        nargs="?",
+        default="stories/prince-career",
+        help="Story directory or story.mdx path",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=50, help="Concurrent requests per endpoint"
+    )
+    parser.add_argument(
+        "--render-delay",
+        type=float,
+        default=0.05,
+        help="Seconds added to each render so requests overlap",
+    )
+    return parser.parse_args(argv)
+
+
+def run_coalesce(args: argparse.Namespace) -> int:
+    renderer = load_renderer(DEFAULT_RENDERER)
+    counts: dict[str, int] = {}
+    for name in ("render_story_html", "build_story_ast"):
+        count_calls(renderer, name, counts, args.render_delay)
+    library = renderer.StoryLibrary([args.story], 0)
+    if len(library.entries) != 1:
+        print(f"Error: expected one story at {args.story}")
+        return 1
+    story_id = next(iter(library.entries))
+    handler = renderer.make_story_handler(library, "")
+    server = renderer.make_story_server(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        statuses = fire_concurrent_requests(
+            [f"{base}/stories/{story_id}", f"{base}/api/stories/{story_id}.json"],
+            args.requests,
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(f"{len(statuses)} requests, statuses {sorted(set(statuses))}")
+    failed = False
+    for name, count in counts.items():
+        print(f"{name:<20} {count:>4} calls")
+        failed = failed or count != 1
+    if failed or set(statuses) != {200}:
+        print("Error: concurrent requests were not coalesced into one render each")
+        return 1
+    return 0
+
+
+def parse_routes_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Serve a generated story and check the status, route class and access "
+            "log story id of every route."
+        )
+    )
+    return parser.parse_args(argv)
+
+
+def run_routes(args: argparse.Namespace) -> int:
+    renderer = load_renderer(DEFAULT_RENDERER)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = pathlib.Path(temp_dir)
+        library = renderer.StoryLibrary([write_corpus(root / "stories", 1, 2)], 0)
+        pipeline = None
+        variants: dict[str, Any] = {}
+        try:
+            pipeline = renderer.load_image_pipeline(root / "images", 1)
+            variants = renderer.build_image_variant_map(
+                pipeline,
+                {
+                    story_id: (entry.path, renderer.build_story(entry.path))
+                    for story_id, entry in library.entries.items()
+                },
+            )
+        except renderer.ImagePipelineError as exc:
+            print(f"Skipping image variants: {exc}")
+        handler = renderer.make_story_handler(
+            library, "", pipeline, variants, bundle_dir=root / "bundles"
+        )
+        server = renderer.make_story_server(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+
+        def fetch(path: str) -> tuple[int, str, bytes]:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            return response.status, response.getheader("Location", ""), response.read()
+
+        try:
+            cases = [
+                (path.format(id=ROUTE_STORY_ID), route, has_story)
+                for path, route, has_story in ROUTE_CASES
+            ]
+            _, location, _ = fetch(f"/bundles/{ROUTE_STORY_ID}.zip")
+            cases.append((urllib.parse.urlsplit(location).path, "bundle", True))
+            _, _, body = fetch(f"/api/stories/{ROUTE_STORY_ID}.json")
+            match = ROUTE_VARIANT_RE.search(body.decode("utf-8"))
+            if match is not None:
+                cases.append((match.group(1), "asset", True))
+            _, _, body = fetch("/api/media")
+            media_id = json.loads(body)["media"][0]["apple_music_id"]
+            cases.append((f"/api/media/{media_id}", "api", False))
+            failed = False
+            for path, route, has_story in cases:
+                status = fetch(path)[0]
+                story_id = ROUTE_STORY_ID if has_story else None
+                actual = (
+                    renderer.route_class(path),
+                    renderer.access_log_story_id(path),
+                )
+                served = status == 404 if route == "other" else status < 400
+                ok = served and actual == (route, story_id)
+                failed = failed or not ok
+                print(
+                    f"{'ok' if ok else 'FAIL':<5} {status:<4} {path:<64} "
+                    f"{actual[0]:<9} {actual[1]}"
+                )
+        finally:
+            connection.close()
+            server.shutdown()
+            server.server_close()
+    if failed:
+        print("Error: route statuses, classes or story ids did not match")
+        return 1
+    return 0
+
+
+def parse_reload_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Check that a SIGHUP reload reaches a keep-alive client."
+    )
+    parser.add_argument(
+        "story",
+        nargs="?",
+        default=str(SYNTHETIC_STORY_SOURCE.parent),
+        help="Story directory to serve and then add a copy of",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=10.0,
+        help="Seconds to wait for the reload to reach the client",
+    )
+    return parser.parse_args(argv)
+
+
+def run_reload(args: argparse.Namespace) -> int:
+    renderer = load_renderer(DEFAULT_RENDERER)
+    source = pathlib.Path(args.story)
+    if source.is_file():
+        source = source.parent
+    if not (source / "story.mdx").is_file():
+        print(f"Error: no story.mdx in {source}")
+        return 1
+    story_id = renderer.load_story_text(source / "story.mdx")[0]["id"]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = pathlib.Path(temp_dir)
+        story_dir = root / "stories" / source.name
+        shutil.copytree(source, story_dir)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                str(DEFAULT_RENDERER),
+                "serve",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(port),
+                "--stories",
+                str(story_dir.parent),
+                "--rescan-interval",
+                "0",
+                "--search-index",
+                str(root / "search.jsonl"),
+                "--media-index",
+                str(root / "media.jsonl"),
+                "--library-state",
+                str(root / "library.json"),
+            ],
+            stdout=subprocess.DEVNULL,
+        )
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        added_id = f"{story_id}{RELOAD_STORY_SUFFIX}"
+
+        def fetch_status(fetched_id: str) -> tuple[int, bool]:
+            connection.request("GET", f"/api/stories/{fetched_id}.json")
+            response = connection.getresponse()
+            response.read()
+            closed = response.getheader("Connection", "").lower() == "close"
+            return response.status, closed
+
+        try:
+            deadline = time.monotonic() + RELOAD_READY_TIMEOUT
+            while True:
+                if process.poll() is not None:
+                    print(f"Error: serve exited with status {process.returncode}")
+                    return 1
+                try:
+                    fetch_status(story_id)
+                    break
+                except OSError:
+                    connection.close()
+                    if time.monotonic() > deadline:
+                        print("Error: serve did not become ready in time")
+                        return 1
+                    time.sleep(0.2)
+            added_dir = story_dir.with_name(added_id)
+            shutil.copytree(story_dir, added_dir)
+            added_path = added_dir / "story.mdx"
+            added_path.write_text(
+                re.sub(
+                    r"(?m)^id:.*$",
+                    f'id: "{added_id}"',
+                    added_path.read_text(encoding="utf-8"),
+                    count=1,
+                ),
+                encoding="utf-8",
+            )
+            before, _ = fetch_status(added_id)
+            os.kill(process.pid, signal.SIGHUP)
+            after, closed = before, False
+            deadline = time.monotonic() + args.timeout
+            while after != 200 and time.monotonic() < deadline:
+                time.sleep(0.1)
+                after, was_closed = fetch_status(added_id)
+                closed = closed or was_closed
+        finally:
+            connection.close()
+            process.terminate()
+            process.wait()
+    print(f"/api/stories/{added_id}.json")
+    print(f"before reload  {before}")
+    print(f"after reload   {after}")
+    print(f"reconnected    {'yes' if closed else 'no'}")
+    if after != 200 or not closed:
+        print("Error: the keep-alive client did not see the reload")
+        return 1
+    return 0
+
+
+def parse_load_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare story load time from source and from compiled artifacts."
+    )
+    parser.add_argument(
+        "stories",
+        nargs="*",
+        default=None,
+        help="Story directories or story.mdx paths",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=20, help="Timed loads per story"
+    )
+    parser.add_argument(
+        "--synthetic-bytes",
+        type=int,
+        default=SYNTHETIC_STORY_BYTES,
+        help="Size of the generated long-form story (0 skips it)",
+    )
+    return parser.parse_args(argv)
+
+
+def run_load(args: argparse.Namespace) -> int:
+    renderer = load_renderer(DEFAULT_RENDERER)
+    story_paths = renderer.discover_story_paths(
+        args.stories or list(DEFAULT_STORY_DIRS)
+    )
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_root = pathlib.Path(temp_dir)
+        if args.synthetic_bytes > 0 and SYNTHETIC_STORY_SOURCE.exists():
+            story_paths.append(
+                write_synthetic_story(
+                    SYNTHETIC_STORY_SOURCE, temp_root / "stories", args.synthetic_bytes
+                )
+            )
+        if not story_paths:
+            print("No stories found to load.")
+            return 1
+        compiled_dir = temp_root / "compiled"
+        print(f"{'story':<40} {'bytes':>10} {'source ms':>10} {'compiled ms':>12}")
+        for story_path in story_paths:
+            source_ms = time_story_load(renderer, story_path, None, args.repeat)
+            compiled_ms = time_story_load(
+                renderer, story_path, compiled_dir, args.repeat
+            )
+            print(
+                f"{story_path.parent.name:<40} {story_path.stat().st_size:>10,} "
+                f"{source_ms:>10.2f} {compiled_ms:>12.2f}"
+            )
+    return 0
+
+
+def parse_memory_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure traced bytes per cached parsed story."
+    )
+    parser.add_argument(
+        "stories",
+        nargs="*",
+        default=None,
+        help="Story directories or story.mdx paths",
+    )
+    parser.add_argument(
+        "--corpus",
+        type=int,
+        default=DEFAULT_MEMORY_CORPUS,
+        help="Distinct generated stories to add to the measurement (0 disables)",
+    )
+    parser.add_argument(
+        "--copies",
+        type=int,
+        default=1,
+        help="How many times each story is held in the simulated cache",
+    )
+    parser.add_argument(
+        "--baseline",
+        help="Another render_story.py to measure for comparison",
+    )
+    return parser.parse_args(argv)
+
+
+def run_memory(args: argparse.Namespace) -> int:
+    renderer = load_renderer(DEFAULT_RENDERER)
+    renderers = [("current", renderer)]
+    if args.baseline:
+        try:
+            baseline = load_renderer(pathlib.Path(args.baseline), "render_story_baseline")
+        except (ImportError, OSError) as exc:
+            print(f"Error: {exc}")
+            return 1
+        renderers.insert(0, ("baseline", baseline))
+    results: dict[str, int] = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sources = list(args.stories or DEFAULT_STORY_DIRS)
+        if args.corpus > 0:
+            sources.append(write_corpus(pathlib.Path(temp_dir), args.corpus))
+        story_paths = renderer.discover_story_paths(sources)
+        if not story_paths:
+            print("No stories found to measure.")
+            return 1
+        print(f"{len(story_paths)} distinct stories x {args.copies} copies")
+        for label, module in renderers:
+            results[label] = measure_story_memory(module, story_paths, args.copies)
+            print(f"{label:<10} {results[label]:>10,} bytes/story")
+    if "baseline" in results and results["baseline"]:
+        saved = 1 - results["current"] / results["baseline"]
+        print(f"{'saved':<10} {saved:>10.1%}")
+    return 0
+
+
+def main() -> int:
+    if len(sys.argv) > 1 and sys.argv[1] in {
+        "memory",
+        "load",
+        "coalesce",
+        "reload",
+        "routes",
+        "suite",
+        "compare",
+    }:
+        command = sys.argv[1]
+        argv = sys.argv[2:]
+    else:
+        command = "memory"
+        argv = sys.argv[1:]
+
+    if command == "load":
+        return run_load(parse_load_args(argv))
+    if command == "coalesce":
+        return run_coalesce(parse_coalesce_args(argv))
+    if command == "reload":
+        return run_reload(parse_reload_args(argv))
+    if command == "routes":
+        return run_routes(parse_routes_args(argv))
+    if command == "suite":
+        return run_suite(parse_suite_args(argv))
+    if command == "compare":
+        return run_compare(parse_compare_args(argv))
+    return run_memory(parse_memory_args(argv))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
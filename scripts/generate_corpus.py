@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.13"
+# ///
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import json
+import os
+import pathlib
+import random
+import struct
+import sys
+import time
+import zlib
+from dataclasses import dataclass
+
+DEFAULT_CORPUS_DIR = ".cache/corpus"
+DEFAULT_BLOCK_MIX = (
+    "media=6,timeline=1,gallery=1,factgrid=1,featurebox=1,"
+    "dropquote=1,sidenote=1,fullbleed=1"
+)
+BLOCK_KINDS = (
+    "media",
+    "timeline",
+    "gallery",
+    "factgrid",
+    "featurebox",
+    "dropquote",
+    "sidenote",
+    "fullbleed",
+)
+MEDIA_TYPES = (
+    ("album", "alb"),
+    ("track", "trk"),
+    ("playlist", "pl"),
+    ("music-video", "mv"),
+)
+ARTWORK_URL = "https://is1-ssl.mzstatic.com/image/thumb/Music/{id}/{size}bb.jpg"
+STORY_CHUNK_SIZE = 64
+WORDS = (
+    "album bass beat bridge chorus crowd drum echo encore falsetto feedback groove "
+    "guitar harmony hook horn label lyric melody mixtape neon organ pulse radio "
+    "record remix rhythm riff sample session single snare soul stage static studio "
+    "synth tape tempo tour verse vinyl vocal wave the a of and in with across under "
+    "through against before after every city night summer basement arena broadcast "
+    "decade era scene sound voice band producer engineer fans charts critics"
+).split()
+TAGS = (
+    "pop rock funk soul jazz hip-hop r&b electronic disco punk metal indie folk "
+    "country reggae latin k-pop house techno ambient gospel blues 70s 80s 90s 2000s "
+    "2010s live debut comeback biography scene label producer video"
+).split()
+SYLLABLES = "ka ri mo sa le na to vi ra de lu po fe zi ma no be ta si go".split()
+
+
+@dataclass(frozen=True)
+class CorpusConfig:
+    output: pathlib.Path
+    seed: int
+    sections: int
+    media: int
+    blocks_per_section: int
+    block_mix: tuple[tuple[str, int], ...]
+    paragraphs: int
+    paragraph_words: int
+    assets: int
+    artists: int
+    media_pool: int
+
+
+def parse_block_mix(value: str) -> tuple[tuple[str, int], ...]:
+    mix: list[tuple[str, int]] = []
+    for item in value.split(","):
+        kind, _, weight = item.strip().partition("=")
+        if kind not in BLOCK_KINDS:
+            expected = ", ".join(BLOCK_KINDS)
+            raise argparse.ArgumentTypeError(
+                f"Unknown block kind '{kind}' (expected one of {expected})"
+            )
+        try:
+            mix.append((kind, int(weight or 1)))
+        except ValueError as exc:
+            raise argparse.ArgumentTypeError(f"Invalid weight for '{kind}'") from exc
+    if not any(weight > 0 for _, weight in mix):
+        raise argparse.ArgumentTypeError("Block mix needs at least one positive weight")
+    return tuple(mix)
+
+
+def quote(value: str) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def attr(value: str) -> str:
+    return value.replace('"', "'")
+
+
+def make_name(rng: random.Random, parts: int) -> str:
+    return "".join(rng.choices(SYLLABLES, k=parts)).capitalize()
+
+
+def make_words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choices(WORDS, k=max(count, 1)))
+
+
+def make_sentence(rng: random.Random, words: int) -> str:
+    return make_words(rng, words).capitalize() + "."
+
+
+def make_paragraph(rng: random.Random, words: int) -> str:
+    sentences: list[str] = []
+    remaining = max(int(rng.gauss(words, words / 4)), 8)
+    while remaining > 0:
+        length = min(rng.randint(8, 20), remaining)
+        words_in_sentence = make_sentence(rng, length).split(" ")
+        if len(words_in_sentence) > 2 and rng.random() < 0.15:
+            position = rng.randrange(1, len(words_in_sentence) - 1)
+            words_in_sentence[position] = f"_{words_in_sentence[position]}_"
+        sentences.append(" ".join(words_in_sentence))
+        remaining -= length
+    return " ".join(sentences)
+
+
+def png_bytes(width: int, height: int, color: tuple[int, int, int]) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    row = b"\x00" + bytes(color) * width
+    return b"".join(
+        (
+            b"\x89PNG\r\n\x1a\n",
+            chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+            chunk(b"IDAT", zlib.compress(row * height, 9)),
+            chunk(b"IEND", b""),
+        )
+    )
+
+
+def artist_name(seed: int, index: int) -> str:
+    rng = random.Random(f"{seed}:artist:{index}")
+    return f"{make_name(rng, rng.randint(2, 3))} {make_name(rng, 2)}"
+
+
+def build_media(
+    rng: random.Random, config: CorpusConfig
+) -> list[dict[str, str | int]]:
+    media: list[dict[str, str | int]] = []
+    for index in range(max(config.media, 1)):
+        media_type, prefix = rng.choice(MEDIA_TYPES)
+        pool_id = rng.randrange(config.media_pool)
+        pool_rng = random.Random(f"{config.seed}:media:{pool_id}")
+        item: dict[str, str | int] = {
+            "key": f"{prefix}-{index + 1}",
+            "type": media_type,
+            "apple_music_id": str(1_000_000_000 + pool_id),
+            "title": make_words(pool_rng, pool_rng.randint(1, 4)).title(),
+            "artist": artist_name(config.seed, pool_rng.randrange(config.artists)),
+            "artwork_url": ARTWORK_URL.format(id=pool_id, size="100x100"),
+        }
+        if media_type == "track":
+            item["duration_ms"] = pool_rng.randint(90_000, 420_000)
+        media.append(item)
+    return media
+
+
+def image_src(rng: random.Random, assets: list[str], pool_id: int) -> str:
+    if assets and rng.random() < 0.7:
+        return rng.choice(assets)
+    return ARTWORK_URL.format(id=pool_id, size="1200x1200")
+
+
+def build_block(
+    rng: random.Random,
+    kind: str,
+    media: list[dict[str, str | int]],
+    assets: list[str],
+    words: int,
+) -> str:
+    if kind == "media":
+        return f'<MediaRef ref="{rng.choice(media)["key"]}" intent="full" />'
+    if kind == "timeline":
+        start = rng.randint(1950, 2010)
+        items = [
+            f'  <TimelineItem year="{start + offset * rng.randint(1, 4)}">'
+            f"{make_sentence(rng, rng.randint(6, 14))}</TimelineItem>"
+            for offset in range(rng.randint(3, 6))
+        ]
+        return "<Timeline>\n" + "\n".join(items) + "\n</Timeline>"
+    if kind == "gallery":
+        images = [
+            f'  <GalleryImage src="{image_src(rng, assets, rng.randrange(1 << 20))}" '
+            f'alt="{attr(make_words(rng, 4))}" '
+            f'caption="{attr(make_sentence(rng, rng.randint(5, 10)))}" />'
+            for _ in range(rng.randint(2, 5))
+        ]
+        return "<Gallery>\n" + "\n".join(images) + "\n</Gallery>"
+    if kind == "factgrid":
+        facts = [
+            f'  <Fact label="{attr(make_words(rng, rng.randint(1, 3)).title())}" '
+            f'value="{rng.randint(1, 2000)}" />'
+            for _ in range(rng.randint(3, 6))
+        ]
+        return "<FactGrid>\n" + "\n".join(facts) + "\n</FactGrid>"
+    if kind == "featurebox":
+        expandable = "true" if rng.random() < 0.5 else "false"
+        return (
+            f'<FeatureBox title="{attr(make_words(rng, 3).title())}" '
+            f'summary="{attr(make_words(rng, 4))}" expandable="{expandable}">\n'
+            f"{make_paragraph(rng, words // 2)}\n</FeatureBox>"
+        )
+    if kind == "dropquote":
+        return (
+            f'<DropQuote attribution="{attr(make_name(rng, 3))}">\n'
+            f"  {make_sentence(rng, rng.randint(8, 18))}\n</DropQuote>"
+        )
+    if kind == "sidenote":
+        return (
+            f'<SideNote label="{attr(make_words(rng, 2).title())}">\n'
+            f"  {make_paragraph(rng, words // 3)}\n</SideNote>"
+        )
+    return (
+        f'<FullBleed src="{image_src(rng, assets, rng.randrange(1 << 20))}" '
+        f'alt="{attr(make_words(rng, 4))}" '
+        f'caption="{attr(make_sentence(rng, rng.randint(5, 12)))}" />'
+    )
+
+
+def write_story(config: CorpusConfig, index: int) -> int:
+    rng = random.Random(f"{config.seed}:story:{index}")
+    story_id = f"synthetic-{index:06d}"
+    story_dir = config.output / story_id
+    story_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    assets: list[str] = []
+    if config.assets:
+        (story_dir / "assets").mkdir(exist_ok=True)
+    for asset_index in range(config.assets):
+        name = f"image-{asset_index + 1:02d}.png"
+        data = png_bytes(
+            rng.randint(32, 256),
+            rng.randint(32, 256),
+            (rng.randrange(256), rng.randrange(256), rng.randrange(256)),
+        )
+        (story_dir / "assets" / name).write_bytes(data)
+        written += len(data)
+        assets.append(f"assets/{name}")
+
+    media = build_media(rng, config)
+    kinds = [kind for kind, _ in config.block_mix]
+    weights = [weight for _, weight in config.block_mix]
+    section_ids = [f"part-{number + 1}" for number in range(max(config.sections, 1))]
+    published = time.gmtime(1_262_304_000 + rng.randrange(16 * 365) * 86_400)
+    lines = [
+        "---",
+        "schema_version: 0.1",
+        f"id: {quote(story_id)}",
+        f"title: {quote(make_words(rng, rng.randint(3, 7)).title())}",
+        f"subtitle: {quote(make_sentence(rng, rng.randint(6, 12)))}",
+        f"deck: {quote(make_paragraph(rng, 30))}",
+        f"authors: [{quote(make_name(rng, 2) + ' ' + make_name(rng, 3))}]",
+        f"publish_date: {quote(time.strftime('%Y-%m-%d', published))}",
+        f"tags: {json.dumps(rng.sample(TAGS, rng.randint(2, 6)))}",
+        'locale: "en-US"',
+        "hero_image:",
+        f"  src: {quote(image_src(rng, assets, rng.randrange(1 << 20)))}",
+        f"  alt: {quote(make_words(rng, 4))}",
+        "sections:",
+    ]
+    for number, section_id in enumerate(section_ids):
+        lines.append(f"  - id: {section_id}")
+        lines.append(f"    title: {quote(make_words(rng, rng.randint(2, 6)).title())}")
+        if number == 0:
+            lines.append('    layout: "lede"')
+            lines.append(f"    lead_media: {quote(str(media[0]['key']))}")
+    lines.append("media:")
+    for item in media:
+        first = True
+        for key, value in item.items():
+            prefix = "  - " if first else "    "
+            rendered = value if isinstance(value, int) else quote(value)
+            lines.append(f"{prefix}{key}: {rendered}")
+            first = False
+    lines.append("---")
+    lines.append("")
+
+    for number, section_id in enumerate(section_ids):
+        layout = "lede" if number == 0 else "body"
+        title = attr(make_words(rng, rng.randint(2, 6)).title())
+        lines.append(f'<Section id="{section_id}" title="{title}" layout="{layout}">')
+        parts = [
+            make_paragraph(rng, config.paragraph_words)
+            for _ in range(max(config.paragraphs, 1))
+        ]
+        for kind in rng.choices(kinds, weights, k=config.blocks_per_section):
+            block = build_block(rng, kind, media, assets, config.paragraph_words)
+            parts.insert(rng.randint(1, len(parts)), block)
+        lines.append("\n\n".join(parts))
+        lines.append("</Section>")
+        lines.append("")
+
+    data = "\n".join(lines).encode("utf-8")
+    (story_dir / "story.mdx").write_bytes(data)
+    return written + len(data)
+
+
+def write_story_range(config: CorpusConfig, start: int, stop: int) -> int:
+    return sum(write_story(config, index) for index in range(start, stop))
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate a deterministic corpus of schema-valid synthetic stories."
+    )
+    parser.add_argument(
+        "output",
+        nargs="?",
+        default=DEFAULT_CORPUS_DIR,
+        help="Directory that receives one <id>/story.mdx package per story",
+    )
+    parser.add_argument("--stories", type=int, default=1000, help="Stories to write")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--sections", type=int, default=6, help="Sections per story")
+    parser.add_argument("--media", type=int, default=12, help="Media items per story")
+    parser.add_argument(
+        "--blocks-per-section",
+        type=int,
+        default=3,
+        help="MDX blocks inserted between paragraphs of each section",
+    )
+    parser.add_argument(
+        "--block-mix",
+        type=parse_block_mix,
+        default=parse_block_mix(DEFAULT_BLOCK_MIX),
+        help=f"Relative weights of block kinds (default {DEFAULT_BLOCK_MIX})",
+    )
+    parser.add_argument(
+        "--paragraphs", type=int, default=4, help="Markdown paragraphs per section"
+    )
+    parser.add_argument(
+        "--paragraph-words", type=int, default=80, help="Mean words per paragraph"
+    )
+    parser.add_argument(
+        "--assets", type=int, default=2, help="PNG files written to each assets/ dir"
+    )
+    parser.add_argument(
+        "--artists",
+        type=int,
+        default=500,
+        help="Size of the shared artist pool, which controls cross-story overlap",
+    )
+    parser.add_argument(
+        "--media-pool",
+        type=int,
+        default=20_000,
+        help="Distinct Apple Music ids shared by all stories",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="Writer processes"
+    )
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    args = parse_args(sys.argv[1:])
+    config = CorpusConfig(
+        output=pathlib.Path(args.output),
+        seed=args.seed,
+        sections=args.sections,
+        media=args.media,
+        blocks_per_section=args.blocks_per_section,
+        block_mix=args.block_mix,
+        paragraphs=args.paragraphs,
+        paragraph_words=args.paragraph_words,
+        assets=args.assets,
+        artists=max(args.artists, 1),
+        media_pool=max(args.media_pool, 1),
+    )
+    started = time.perf_counter()
+    ranges = [
+        (start, min(start + STORY_CHUNK_SIZE, args.stories))
+        for start in range(0, args.stories, STORY_CHUNK_SIZE)
+    ]
+    try:
+        config.output.mkdir(parents=True, exist_ok=True)
+        if args.workers <= 1:
+            written = sum(write_story_range(config, *bounds) for bounds in ranges)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(args.workers) as pool:
+                written = sum(
+                    pool.map(
+                        write_story_range,
+                        [config] * len(ranges),
+                        *zip(*ranges),
+                    )
+                )
+    except OSError as exc:
+        print(f"Error: {exc}")
+        return 1
+    elapsed = time.perf_counter() - started
+    print(
+        f"Wrote {args.stories} stories ({written / (1 << 20):.1f} MB) "
+        f"to {config.output} in {elapsed:.2f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.13"
+# ///
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import os
+import pathlib
+import random
+import re
+import socket
+import ssl
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Any
+
+DEFAULT_RENDERER = pathlib.Path(__file__).with_name("render_story.py")
+DEFAULT_STORY_DIRS = tuple(
+    str(pathlib.Path(__file__).resolve().parent.parent / name)
+    for name in ("stories", "examples")
+)
+DEFAULT_BASE_URL = "http://127.0.0.1:8000"
+DEFAULT_DURATION = 30.0
+DEFAULT_WARMUP = 2.0
+DEFAULT_CONCURRENCY = 32
+DEFAULT_ZIPF_EXPONENT = 1.1
+DEFAULT_INDEX_RATIO = 0.1
+DEFAULT_ASSETS_PER_PAGE = 6
+SPAWN_READY_TIMEOUT = 120.0
+USAGE_SAMPLE_INTERVAL = 0.5
+CATALOG_PAGE_SIZE = 100
+ROUTE_CLASSES = ("index", "story", "asset")
+ASSET_URL_RE = re.compile(r'(?:src|href|srcset)="(/assets/[^"\s]+)')
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    failures: int = 0
+    errors: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class LoadStats:
+    routes: dict[str, RouteStats] = field(
+        default_factory=lambda: {route: RouteStats() for route in ROUTE_CLASSES}
+    )
+    statuses: dict[int, int] = field(default_factory=dict)
+    exceptions: dict[str, int] = field(default_factory=dict)
+    recording: bool = False
+
+
+@dataclass(frozen=True)
+class Target:
+    scheme: str
+    host: str
+    port: int
+    ssl_context: ssl.SSLContext | None
+
+
+class HttpConnection:
+    def __init__(self, target: Target, keep_alive: bool) -> None:
+        self.target = target
+        self.keep_alive = keep_alive
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def close(self) -> None:
+        writer, self.reader, self.writer = self.writer, None, None
+        if writer is None:
+            return
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            pass
+
+    async def get(self, path: str) -> tuple[int, bytes]:
+        if self.writer is None or self.reader is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.target.host,
+                self.target.port,
+                ssl=self.target.ssl_context,
+                server_hostname=self.target.host if self.target.ssl_context else None,
+            )
+        connection = "keep-alive" if self.keep_alive else "close"
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {self.target.host}:{self.target.port}\r\n"
+            "User-Agent: loadtest_story\r\n"
+            "Accept-Encoding: identity\r\n"
+            f"Connection: {connection}\r\n\r\n"
+        )
+        try:
+            self.writer.write(request.encode("latin-1"))
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+            if not status_line:
+                raise ConnectionError("Connection closed by server")
+            version, status, _ = f"{status_line.decode('latin-1').rstrip()} ".split(
+                " ", 2
+            )
+            headers: dict[str, str] = {}
+            while True:
+                line = await self.reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = headers.get("content-length")
+            if length is not None:
+                body = await self.reader.readexactly(int(length))
+            elif status in ("204", "304"):
+                body = b""
+            else:
+                body = await self.reader.read()
+        except BaseException:
+            await self.close()
+            raise
+        reusable = (
+            self.keep_alive
+            and length is not None
+            and headers.get("connection", "").lower() != "close"
+            and (version != "HTTP/1.0" or headers.get("connection") == "keep-alive")
+        )
+        if not reusable:
+            await self.close()
+        return int(status), body
+
+
+class TrafficPlan:
+    def __init__(
+        self,
+        story_ids: list[str],
+        zipf_exponent: float,
+        index_ratio: float,
+        assets_per_page: int,
+    ) -> None:
+        self.story_ids = story_ids
+        self.index_ratio = index_ratio
+        self.assets_per_page = assets_per_page
+        weights = [1 / rank**zipf_exponent for rank in range(1, len(story_ids) + 1)]
+        self.cumulative = list(itertools.accumulate(weights))
+        self.assets: dict[str, tuple[str, ...]] = {}
+
+    def next_page(self, rng: random.Random) -> tuple[str, str]:
+        if not self.story_ids or rng.random() < self.index_ratio:
+            return "/", "index"
+        position = bisect.bisect_left(
+            self.cumulative, rng.random() * self.cumulative[-1]
+        )
+        story_id = self.story_ids[min(position, len(self.story_ids) - 1)]
+        return f"/stories/{urllib.parse.quote(story_id)}", "story"
+
+    def page_assets(
+        self, path: str, body: bytes, rng: random.Random
+    ) -> tuple[str, ...]:
+        assets = self.assets.get(path)
+        if assets is None:
+            found = ASSET_URL_RE.findall(body.decode("utf-8", "replace"))
+            assets = self.assets[path] = tuple(dict.fromkeys(found))
+        if len(assets) <= self.assets_per_page:
+            return assets
+        return tuple(rng.sample(assets, self.assets_per_page))
+
+
+def build_target(base_url: str, insecure: bool) -> Target:
+    parsed = urllib.parse.urlsplit(base_url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError(f"Unsupported base URL: {base_url}")
+    context = None
+    if parsed.scheme == "https":
+        context = ssl.create_default_context()
+        if insecure:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    return Target(parsed.scheme, parsed.hostname, port, context)
+
+
+async def fetch_story_ids(target: Target) -> list[str]:
+    connection = HttpConnection(target, keep_alive=True)
+    story_ids: list[str] = []
+    page = 1
+    try:
+        while True:
+            status, body = await connection.get(
+                f"/api/stories?page={page}&per_page={CATALOG_PAGE_SIZE}"
+            )
+            if status != 200:
+                raise ValueError(f"/api/stories returned HTTP {status}")
+            payload = json.loads(body)
+            story_ids.extend(item["id"] for item in payload.get("stories", []))
+            if page >= payload.get("pages", 1):
+                return story_ids
+            page += 1
+    finally:
+        await connection.close()
+
+
+async def timed_get(
+    connection: HttpConnection, path: str, route: str, stats: LoadStats
+) -> bytes | None:
+    started = time.perf_counter()
+    try:
+        status, body = await connection.get(path)
+    except (OSError, ssl.SSLError, asyncio.IncompleteReadError, ValueError) as exc:
+        if stats.recording:
+            stats.routes[route].failures += 1
+            stats.routes[route].errors += 1
+            name = type(exc).__name__
+            stats.exceptions[name] = stats.exceptions.get(name, 0) + 1
+        return None
+    elapsed = time.perf_counter() - started
+    if stats.recording:
+        route_stats = stats.routes[route]
+        route_stats.latencies.append(elapsed)
+        route_stats.bytes += len(body)
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        if status >= 400:
+            route_stats.errors += 1
+    return body if status == 200 else None
+
+
+async def run_user(
+    target: Target,
+    plan: TrafficPlan,
+    stats: LoadStats,
+    rng: random.Random,
+    deadline: float,
+    keep_alive: bool,
+    think_time: float,
+) -> None:
+    connection = HttpConnection(target, keep_alive)
+    loop = asyncio.get_running_loop()
+    try:
+        while loop.time() < deadline:
+            path, route = plan.next_page(rng)
+            body = await timed_get(connection, path, route, stats)
+            if route == "story" and body is not None:
+                for asset in plan.page_assets(path, body, rng):
+                    await timed_get(connection, asset, "asset", stats)
+            if think_time > 0:
+                await asyncio.sleep(rng.expovariate(1 / think_time))
+    finally:
+        await connection.close()
+
+
+def read_process_usage(pid: int) -> tuple[float, int] | None:
+    try:
+        stat = pathlib.Path(f"/proc/{pid}/stat").read_text(encoding="ascii")
+    except OSError:
+        return None
+    fields = stat.rsplit(")", 1)[1].split()
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return cpu_seconds, int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+
+
+async def sample_process_usage(
+    pid: int, samples: list[tuple[float, float, int]], stop: asyncio.Event
+) -> None:
+    while not stop.is_set():
+        usage = read_process_usage(pid)
+        if usage is None:
+            return
+        samples.append((time.perf_counter(), *usage))
+        try:
+            await asyncio.wait_for(stop.wait(), USAGE_SAMPLE_INTERVAL)
+        except TimeoutError:
+            pass
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    index = min(int(fraction * len(values)), len(values) - 1)
+    return values[index]
+
+
+def summarize(
+    stats: LoadStats, elapsed: float, samples: list[tuple[float, float, int]]
+) -> dict[str, Any]:
+    routes: dict[str, Any] = {}
+    all_latencies: list[float] = []
+    total_errors = 0
+    total_bytes = 0
+    for route, route_stats in stats.routes.items():
+        latencies = sorted(route_stats.latencies)
+        all_latencies.extend(latencies)
+        requests = len(latencies) + route_stats.failures
+        total_errors += route_stats.errors
+        total_bytes += route_stats.bytes
+        routes[route] = {
+            "requests": requests,
+            "errors": route_stats.errors,
+            "rps": requests / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "bytes": route_stats.bytes,
+        }
+    all_latencies.sort()
+    total_requests = sum(route["requests"] for route in routes.values())
+    summary: dict[str, Any] = {
+        "seconds": elapsed,
+        "requests": total_requests,
+        "rps": total_requests / elapsed if elapsed else 0.0,
+        "errors": total_errors,
+        "error_rate": total_errors / total_requests if total_requests else 0.0,
+        "p50_ms": percentile(all_latencies, 0.50) * 1000,
+        "p95_ms": percentile(all_latencies, 0.95) * 1000,
+        "p99_ms": percentile(all_latencies, 0.99) * 1000,
+        "bytes": total_bytes,
+        "statuses": {
+            str(code): count for code, count in sorted(stats.statuses.items())
+        },
+        "exceptions": stats.exceptions,
+        "routes": routes,
+    }
+    if len(samples) >= 2:
+        (first_time, first_cpu, _), (last_time, last_cpu, _) = samples[0], samples[-1]
+        summary["server"] = {
+            "cpu_percent": 100 * (last_cpu - first_cpu) / (last_time - first_time),
+            "rss_peak_bytes": max(rss for _, _, rss in samples),
+            "rss_end_bytes": samples[-1][2],
+        }
+    return summary
+
+
+def print_summary(summary: dict[str, Any]) -> None:
+    print(
+        f"{'route':<8} {'requests':>9} {'rps':>9} {'errors':>7} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    rows = [*summary["routes"].items(), ("total", summary)]
+    for route, row in rows:
+        print(
+            f"{route:<8} {row['requests']:>9} {row['rps']:>9.1f} {row['errors']:>7} "
+            f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f}"
+        )
+    print(f"Error rate: {summary['error_rate']:.2%}  Statuses: {summary['statuses']}")
+    if summary["exceptions"]:
+        print(f"Exceptions: {summary['exceptions']}")
+    server = summary.get("server")
+    if server:
+        print(
+            f"Server CPU: {server['cpu_percent']:.0f}%  "
+            f"RSS peak: {server['rss_peak_bytes'] / (1 << 20):.1f} MB  "
+            f"end: {server['rss_end_bytes'] / (1 << 20):.1f} MB"
+        )
+
+
+async def run_load(args: argparse.Namespace, target: Target, pid: int | None) -> int:
+    try:
+        story_ids = await fetch_story_ids(target)
+    except (OSError, ssl.SSLError, ValueError, KeyError) as exc:
+        print(f"Error: could not list stories: {exc}")
+        return 1
+    if not story_ids:
+        print("Error: the server has no stories to request")
+        return 1
+    random.Random(args.seed).shuffle(story_ids)
+    plan = TrafficPlan(story_ids, args.zipf, args.index_ratio, args.assets_per_page)
+    stats = LoadStats()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + args.warmup + args.duration
+    users = [
+        asyncio.create_task(
+            run_user(
+                target,
+                plan,
+                stats,
+                random.Random(f"{args.seed}:{user}"),
+                deadline,
+                args.keep_alive,
+                args.think_time,
+            )
+        )
+        for user in range(args.concurrency)
+    ]
+    print(
+        f"{len(story_ids)} stories, {args.concurrency} users, "
+        f"{args.warmup:.0f}s warmup + {args.duration:.0f}s against "
+        f"{target.scheme}://{target.host}:{target.port}"
+    )
+    await asyncio.sleep(args.warmup)
+    stats.recording = True
+    started = time.perf_counter()
+    samples: list[tuple[float, float, int]] = []
+    stop = asyncio.Event()
+    sampler = (
+        asyncio.create_task(sample_process_usage(pid, samples, stop))
+        if pid is not None
+        else None
+    )
+    await asyncio.gather(*users)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    if sampler is not None:
+        await sampler
+    summary = summarize(stats, elapsed, samples)
+    print_summary(summary)
+    if args.json:
+        output = pathlib.Path(args.json)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(
+            json.dumps(
+                {"config": vars(args), "results": summary}, indent=2, default=str
+            ),
+            encoding="utf-8",
+        )
+        print(f"Wrote results to {output}")
+    return 1 if summary["error_rate"] > args.max_error_rate else 0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(serve_args: list[str]) -> tuple[subprocess.Popen[bytes], str]:
+    port = free_port()
+    if "--stories" not in serve_args:
+        serve_args = [*serve_args, "--stories", *DEFAULT_STORY_DIRS]
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            str(DEFAULT_RENDERER),
+            "serve",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            *serve_args,
+        ],
+        stdout=sys.stderr,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + SPAWN_READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"serve exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{base_url}/readyz", timeout=1):
+                return process, base_url
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("serve did not become ready in time")
+
+
+def parse_args(argv: list[str]) -> tuple[argparse.Namespace, list[str]]:
+    serve_args: list[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, serve_args = argv[:split], argv[split + 1 :]
+    parser = argparse.ArgumentParser(
+        description=(
+            "Replay index, Zipf-distributed story and asset traffic against "
+            "render_story.py serve. Arguments after -- are passed to a spawned server."
+        )
+    )
+    parser.add_argument(
+        "base_url", nargs="?", default=DEFAULT_BASE_URL, help="Server to load"
+    )
+    parser.add_argument(
+        "--spawn",
+        action="store_true",
+        help="Start render_story.py serve on a free local port for the run",
+    )
+    parser.add_argument(
+        "--pid", type=int, help="Server process to sample for CPU and RSS"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=DEFAULT_DURATION, help="Measured seconds"
+    )
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=DEFAULT_WARMUP,
+        help="Seconds of traffic before measuring",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Simulated readers issuing requests in parallel",
+    )
+    parser.add_argument(
+        "--zipf",
+        type=float,
+        default=DEFAULT_ZIPF_EXPONENT,
+        help="Exponent of the story popularity distribution",
+    )
+    parser.add_argument(
+        "--index-ratio",
+        type=float,
+        default=DEFAULT_INDEX_RATIO,
+        help="Share of page views that load the index instead of a story",
+    )
+    parser.add_argument(
+        "--assets-per-page",
+        type=int,
+        default=DEFAULT_ASSETS_PER_PAGE,
+        help="Local assets fetched after each story page",
+    )
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=0.0,
+        help="Mean seconds each reader pauses between page views",
+    )
+    parser.add_argument(
+        "--no-keep-alive",
+        dest="keep_alive",
+        action="store_false",
+        help="Open a new connection for every request",
+    )
+    parser.add_argument(
+        "--insecure",
+        action="store_true",
+        help="Skip TLS certificate verification (self-signed local certs)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument(
+        "--max-error-rate",
+        type=float,
+        default=0.0,
+        help="Exit non-zero when the error rate exceeds this fraction",
+    )
+    return parser.parse_args(argv), serve_args
+
+
+def main() -> int:
+    args, serve_args = parse_args(sys.argv[1:])
+    process = None
+    pid = args.pid
+    try:
+        if args.spawn:
+            process, args.base_url = spawn_server(serve_args)
+            pid = process.pid
+        target = build_target(args.base_url, args.insecure)
+        return asyncio.run(run_load(args, target, pid))
+    except (OSError, RuntimeError, ValueError) as exc:
+        print(f"Error: {exc}")
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -10,23 +10,40 @@
 from __future__ import annotations
 
 import argparse
+import array
+import base64
+import bisect
+import copy
+import functools
+import hashlib
+import heapq
 import html
-import http.server
 import importlib.util
+import io
+import itertools
 import json
-import mimetypes
+import marshal
+import math
 import os
 import pathlib
+import queue
+import random
 import re
 import shutil
-import ssl
+import signal
 import sys
+import tempfile
+import threading
+import time
 import urllib.parse
+import zipfile
 from dataclasses import dataclass
-from typing import Any, Iterable
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, TextIO
 
-import markdown
-import yaml
+if TYPE_CHECKING:
+    import concurrent.futures
+    import cProfile
+    import http.server
 
 FRONT_MATTER_DELIMITER = "---"
 SECTION_RE = re.compile(r"<Section\s+([^>]+)>(.*?)</Section>", re.DOTALL)
@@ -35,16 +52,142 @@ DROP_QUOTE_RE = re.compile(r"<DropQuote(?:\s+([^>]+))?>(.*?)</DropQuote>", re.DO
 SIDE_NOTE_RE = re.compile(r"<SideNote(?:\s+([^>]+))?>(.*?)</SideNote>", re.DOTALL)
 FEATURE_BOX_RE = re.compile(r"<FeatureBox(?:\s+([^>]+))?>(.*?)</FeatureBox>", re.DOTALL)
 FACT_GRID_RE = re.compile(r"<FactGrid(?:\s+[^>]*)?>(.*?)</FactGrid>", re.DOTALL)
-FACT_RE = re.compile(r"<Fact\s+([^/>]+?)\s*/>")
+FACT_RE = re.compile(r"<Fact\s+((?:\"[^\"]*\"|[^\"/>])+?)\s*/>")
 TIMELINE_RE = re.compile(r"<Timeline(?:\s+[^>]*)?>(.*?)</Timeline>", re.DOTALL)
 TIMELINE_ITEM_RE = re.compile(
     r"<TimelineItem\s+([^>]+)>(.*?)</TimelineItem>", re.DOTALL
 )
 GALLERY_RE = re.compile(r"<Gallery(?:\s+[^>]*)?>(.*?)</Gallery>", re.DOTALL)
-GALLERY_IMAGE_RE = re.compile(r"<GalleryImage\s+([^/>]+?)\s*/>")
-FULL_BLEED_RE = re.compile(r"<FullBleed\s+([^/>]+?)\s*/>", re.DOTALL)
+GALLERY_IMAGE_RE = re.compile(r"<GalleryImage\s+((?:\"[^\"]*\"|[^\"/>])+?)\s*/>")
+FULL_BLEED_RE = re.compile(
+    r"<FullBleed\s+((?:\"[^\"]*\"|[^\"/>])+?)\s*/>", re.DOTALL
+)
 ATTR_RE = re.compile(r"(\w+)=\"([^\"]*)\"")
 DEFAULT_STORY_DIRS = ("stories", "examples")
+DEFAULT_IMAGE_CACHE_DIR = ".cache/story-images"
+IMAGE_VARIANT_DIR = "_variants"
+IMAGE_VARIANT_WIDTHS = (480, 960, 1600)
+IMAGE_VARIANT_FORMATS = ("avif", "webp", "jpeg")
+IMAGE_VARIANT_MIME_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+}
+IMAGE_VARIANT_QUALITY = {"avif": 55, "webp": 78, "jpeg": 82}
+IMAGE_SOURCE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".tif", ".tiff"}
+IMAGE_VARIANT_NAME_RE = re.compile(r"^[0-9a-f]{64}-\d+\.(?:avif|webp|jpeg)$")
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+ASSET_MANIFEST_VERSION = 1
+ASSET_PLACEHOLDER_SIZE = 16
+DEFAULT_ARTWORK_CACHE_DIR = f"{DEFAULT_IMAGE_CACHE_DIR}/artwork"
+STORY_AST_VERSION = 1
+STORY_AST_META_FIELDS = (
+    "schema_version",
+    "id",
+    "title",
+    "subtitle",
+    "deck",
+    "authors",
+    "editors",
+    "publish_date",
+    "tags",
+    "locale",
+    "accentColor",
+    "heroGradient",
+    "typeRamp",
+)
+STORY_META_FIELDS = (*STORY_AST_META_FIELDS, "hero_image", "leadArt")
+PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n")
+DEFAULT_RESCAN_INTERVAL = 10.0
+DEFAULT_BUNDLE_DIR = ".cache/story-bundles"
+DEFAULT_PREWARM_WORKERS = 4
+STORY_SERVER_BACKLOG = 128
+KEEP_ALIVE_TIMEOUT = 30.0
+PROFILE_FORMATS = ("pstats", "collapsed")
+DEFAULT_TRACEMALLOC_TOP = 10
+TRACEMALLOC_MAX_TOP = 100
+DEFAULT_ACCESS_LOG_QUEUE = 10000
+ACCESS_LOG_SHED_RATIO = 0.75
+ACCESS_LOG_BATCH_SIZE = 512
+METRIC_STRIPES = 16
+METRIC_LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+METRIC_DEFINITIONS = {
+    "story_http_requests_total": ("counter", "HTTP requests by route class and status"),
+    "story_http_request_duration_seconds": (
+        "histogram",
+        "Time to handle an HTTP request by route class",
+    ),
+    "story_http_response_bytes_total": (
+        "counter",
+        "Response body bytes sent by route class",
+    ),
+    "story_http_requests_in_flight": ("gauge", "Requests currently being handled"),
+    "story_cache_requests_total": ("counter", "Cache lookups by cache and result"),
+    "story_cache_evictions_total": ("counter", "Entries evicted from each cache"),
+    "story_render_duration_seconds": (
+        "histogram",
+        "Time to build an uncached story page, JSON AST or bundle",
+    ),
+    "story_access_log_records_total": (
+        "counter",
+        "Access log records by outcome (written, sampled, shed or dropped)",
+    ),
+    "story_memory_cache_bytes": ("gauge", "Bytes held by in-memory response caches"),
+    "story_memory_budget_bytes": ("gauge", "Memory budget for response caches"),
+    "story_index_stories": ("gauge", "Stories in the library index"),
+    "story_search_documents": ("gauge", "Stories in the search index"),
+    "story_media_items": ("gauge", "Distinct Apple Music ids in the media index"),
+    "story_process_uptime_seconds": ("gauge", "Seconds since the server started"),
+}
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_HASH_LENGTH = 16
+BUNDLE_NAME_RE = re.compile(r"^(?P<id>.+?)(?:\.(?P<hash>[0-9a-f]{16}))?\.zip$")
+BUNDLE_COMPRESSIBLE_SUFFIXES = {".json", ".svg", ".txt", ".css", ".js", ".html", ".vtt"}
+ZIP_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+BYTE_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+FILE_CHUNK_SIZE = 1 << 16
+TOKEN_RE = re.compile(r"\w+")
+CATALOG_PER_PAGE = 24
+CATALOG_MAX_PER_PAGE = 100
+CATALOG_FACET_LIMIT = 20
+DEFAULT_SEARCH_INDEX_PATH = ".cache/story-search.jsonl"
+SEARCH_INDEX_VERSION = 2
+SEARCH_RESULT_LIMIT = 20
+SEARCH_MAX_RESULT_LIMIT = 100
+SEARCH_SNIPPET_CHARS = 200
+SEARCH_TEXT_ATTRS = ("title", "label", "value", "year", "attribution", "caption", "alt")
+DEFAULT_MEDIA_INDEX_PATH = ".cache/story-media.jsonl"
+MEDIA_INDEX_VERSION = 2
+INDEX_JOURNAL_SLACK = 64
+DEFAULT_LIBRARY_STATE_PATH = ".cache/story-library.json"
+LIBRARY_STATE_VERSION = 1
+RELATED_STORY_LIMIT = 4
+RELATED_FEATURE_WEIGHTS = {"media": 3.0, "artist": 1.5, "tag": 1.0}
+COMPILED_STORY_SUBDIR = "compiled"
+COMPILED_STORY_MAGIC = b"AMSC"
+COMPILED_STORY_VERSION = 1
+DEFAULT_RENDER_CACHE_DIR = ".cache/render"
+DEFAULT_RENDER_CACHE_MAX_BYTES = 256 << 20
+RENDER_CACHE_VERSION = 1
+RENDER_CACHE_SUFFIX = ".html"
+BM25_K1 = 1.2
+BM25_B = 0.75
+MDX_TAG_RE = re.compile(r"</?[A-Z]\w*((?:\"[^\"]*\"|[^\"/>])*)/?>")
+MARKDOWN_LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+MARKDOWN_SYNTAX_RE = re.compile(r"^\s*(?:#+|>|[-*+]|\d+\.)\s+|[*_`~]+", re.MULTILINE)
 
 BASE_CSS = """
 :root {
@@ -94,6 +237,12 @@ body {
   overflow: hidden;
   box-shadow: 0 40px 120px rgba(0, 0, 0, 0.45);
 }
+.hero-image picture,
+.lead-art picture,
+.gallery-item picture,
+.fullbleed picture {
+  display: contents;
+}
 .hero-image img {
   display: block;
   width: 100%;
@@ -318,6 +467,7 @@ body {
 }
 .fullbleed-media {
   width: 100%;
+  height: auto;
   display: block;
 }
 .fullbleed-caption {
@@ -534,6 +684,43 @@ body {
   opacity: 0.5;
   cursor: not-allowed;
 }
+.related-stories {
+  border-top: 1px solid rgba(17, 17, 17, 0.12);
+  padding-top: 40px;
+}
+.related-grid {
+  display: grid;
+  grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+  gap: 20px;
+}
+.related-card {
+  display: flex;
+  flex-direction: column;
+  border-radius: 20px;
+  overflow: hidden;
+  background: var(--surface);
+  color: inherit;
+  text-decoration: none;
+}
+.related-card img,
+.related-card-placeholder {
+  width: 100%;
+  height: 140px;
+  object-fit: cover;
+  background: linear-gradient(120deg, #e5e0da, #d9cfc6);
+}
+.related-card-body {
+  padding: 16px 18px 20px;
+  font-family: "SF Pro Display", "Inter", "Helvetica Neue", sans-serif;
+}
+.related-card-title {
+  font-weight: 600;
+  margin-bottom: 6px;
+}
+.related-card-subtitle {
+  font-size: 0.9rem;
+  color: var(--muted);
+}
 @media (max-width: 720px) {
   .hero {
     padding: 48px 28px 36px;
@@ -627,6 +814,70 @@ body {
   letter-spacing: 0.12em;
   color: rgba(245, 243, 239, 0.55);
 }
+.index-pagination {
+  display: flex;
+  justify-content: space-between;
+  align-items: center;
+  gap: 16px;
+  padding: 0 96px 80px;
+  color: rgba(245, 243, 239, 0.7);
+}
+.index-pagination a {
+  color: #f5f3ef;
+}
+.search-form {
+  display: flex;
+  gap: 12px;
+  max-width: 640px;
+  margin-top: 24px;
+}
+.search-form input {
+  flex: 1;
+  padding: 12px 16px;
+  border-radius: 12px;
+  border: 1px solid rgba(245, 243, 239, 0.2);
+  background: #1c1c20;
+  color: inherit;
+  font: inherit;
+}
+.search-form button {
+  padding: 12px 20px;
+  border-radius: 12px;
+  border: none;
+  background: #f5f3ef;
+  color: #0f0f10;
+  font: inherit;
+  cursor: pointer;
+}
+.search-results {
+  display: flex;
+  flex-direction: column;
+  gap: 16px;
+  max-width: 860px;
+  padding: 24px 96px 80px;
+}
+.search-result {
+  display: block;
+  padding: 20px 24px;
+  border-radius: 20px;
+  background: #1c1c20;
+  color: inherit;
+  text-decoration: none;
+}
+.search-result-title {
+  font-size: 1.2rem;
+  margin-bottom: 8px;
+}
+.search-result-snippet {
+  line-height: 1.6;
+  color: rgba(245, 243, 239, 0.75);
+}
+.search-result-snippet mark {
+  background: rgba(250, 45, 72, 0.35);
+  color: #f5f3ef;
+  border-radius: 4px;
+  padding: 0 2px;
+}
 @media (max-width: 720px) {
   .index-hero {
     padding: 48px 28px 24px;
@@ -634,19 +885,27 @@ body {
   .story-grid {
     padding: 16px 24px 56px;
   }
+  .index-pagination {
+    padding: 0 24px 56px;
+  }
+  .search-results {
+    padding: 16px 24px 56px;
+  }
 }
 """
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class StorySection:
     id: str
     title: str
     layout: str | None
     body: str
+    lead_media: str | None = None
+    blocks: tuple[tuple[str, int, int], ...] = ()
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class StoryMedia:
     key: str
     type: str
@@ -655,16 +914,17 @@ class StoryMedia:
     artist: str
     artwork_url: str | None
     apple_music_url: str | None
+    duration_ms: int | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Story:
     meta: dict[str, Any]
     sections: list[StorySection]
     media: dict[str, StoryMedia]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class StoryIndexEntry:
     id: str
     title: str
@@ -673,14 +933,378 @@ class StoryIndexEntry:
     hero_src: str | None
     tags: list[str]
     path: pathlib.Path
+    content_hash: str
+    version: tuple[int, int]
+
+
+@dataclass(frozen=True)
+class StoryBundle:
+    story_id: str
+    content_hash: str
+    path: pathlib.Path
+
+
+@dataclass(frozen=True)
+class CatalogPage:
+    ids: list[str]
+    total: int
+    page: int
+    per_page: int
+    facets: dict[str, list[tuple[str, int]]]
+
+
+@dataclass(frozen=True)
+class SearchSection:
+    id: str
+    title: str
+    text: str
+    terms: dict[str, int]
+    length: int
+
+
+@dataclass(frozen=True)
+class SearchDocument:
+    story_id: str
+    content_hash: str
+    title: str
+    sections: tuple[SearchSection, ...]
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    story_id: str
+    story_title: str
+    section_id: str
+    section_title: str
+    score: float
+    snippet: str
+
+
+@dataclass(frozen=True)
+class MediaDocument:
+    story_id: str
+    content_hash: str
+    sections: tuple[tuple[str, str], ...]
+    media: tuple[StoryMedia, ...]
+    references: tuple[tuple[int, int, int], ...]
+
+
+@dataclass(frozen=True)
+class RenderCacheStats:
+    entries: int
+    bytes: int
+    oldest: float | None
+    newest: float | None
+
+
+@dataclass(frozen=True)
+class StoryChange:
+    cursor: int
+    story_id: str
+    action: str
+    content_hash: str | None
+
+
+@dataclass(frozen=True)
+class ImageVariant:
+    name: str
+    width: int
+    format: str
+
+
+@dataclass(frozen=True)
+class ImagePipeline:
+    cache_dir: pathlib.Path
+    widths: tuple[int, ...] = IMAGE_VARIANT_WIDTHS
+    formats: tuple[str, ...] = IMAGE_VARIANT_FORMATS
+    workers: int | None = None
+
+
+@dataclass(frozen=True)
+class AssetInfo:
+    width: int | None
+    height: int | None
+    bytes: int
+    placeholder: str | None
+    mtime_ns: int
 
 
 class StoryParseError(RuntimeError):
     pass
 
 
+class ImagePipelineError(RuntimeError):
+    pass
+
+
+class StoryMetrics:
+    def __init__(
+        self,
+        stripes: int = METRIC_STRIPES,
+        buckets: tuple[float, ...] = METRIC_LATENCY_BUCKETS,
+    ) -> None:
+        self.buckets = buckets
+        self.stripes: list[
+            tuple[
+                threading.Lock,
+                dict[tuple[str, tuple[tuple[str, str], ...]], float],
+                dict[tuple[str, tuple[tuple[str, str], ...]], list[float]],
+            ]
+        ] = [(threading.Lock(), {}, {}) for _ in range(max(stripes, 1))]
+        self.assignments = itertools.count()
+        self.local = threading.local()
+        self.gauges: dict[str, Callable[[], float]] = {}
+        self.started = time.monotonic()
+
+    def stripe(self) -> tuple[Any, ...]:
+        index = getattr(self.local, "stripe", None)
+        if index is None:
+            index = self.local.stripe = next(self.assignments) % len(self.stripes)
+        return self.stripes[index]
+
+    def inc(
+        self, name: str, labels: tuple[tuple[str, str], ...] = (), amount: float = 1
+    ) -> None:
+        lock, counters, _ = self.stripe()
+        key = (name, labels)
+        with lock:
+            counters[key] = counters.get(key, 0) + amount
+
+    def observe(
+        self, name: str, labels: tuple[tuple[str, str], ...], value: float
+    ) -> None:
+        lock, _, histograms = self.stripe()
+        key = (name, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with lock:
+            counts = histograms.get(key)
+            if counts is None:
+                counts = histograms[key] = [0.0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def record_request(
+        self, route: str, status: int, sent: int, seconds: float
+    ) -> None:
+        lock, counters, histograms = self.stripe()
+        labels = (("route", route),)
+        requests_key = ("story_http_requests_total", (*labels, ("status", str(status))))
+        bytes_key = ("story_http_response_bytes_total", labels)
+        duration_key = ("story_http_request_duration_seconds", labels)
+        index = bisect.bisect_left(self.buckets, seconds)
+        with lock:
+            counters[requests_key] = counters.get(requests_key, 0) + 1
+            counters[bytes_key] = counters.get(bytes_key, 0) + sent
+            counts = histograms.get(duration_key)
+            if counts is None:
+                counts = histograms[duration_key] = [0.0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += seconds
+
+    def cache_lookup(self, cache: str, hit: bool) -> None:
+        self.inc(
+            "story_cache_requests_total",
+            (("cache", cache), ("result", "hit" if hit else "miss")),
+        )
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        self.gauges[name] = read
+
+    def snapshot(
+        self,
+    ) -> tuple[
+        dict[tuple[str, tuple[tuple[str, str], ...]], float],
+        dict[tuple[str, tuple[tuple[str, str], ...]], list[float]],
+    ]:
+        counters: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+        histograms: dict[tuple[str, tuple[tuple[str, str], ...]], list[float]] = {}
+        for lock, stripe_counters, stripe_histograms in self.stripes:
+            with lock:
+                for key, value in stripe_counters.items():
+                    counters[key] = counters.get(key, 0) + value
+                for key, counts in stripe_histograms.items():
+                    merged = histograms.setdefault(key, [0.0] * len(counts))
+                    for index, count in enumerate(counts):
+                        merged[index] += count
+        for name, read in self.gauges.items():
+            counters[(name, ())] = float(read())
+        counters[("story_process_uptime_seconds", ())] = (
+            time.monotonic() - self.started
+        )
+        return counters, histograms
+
+    def render(self) -> str:
+        counters, histograms = self.snapshot()
+        lines: list[str] = []
+        for name, (kind, help_text) in METRIC_DEFINITIONS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind != "histogram":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        series = format_metric_labels(labels)
+                        lines.append(f"{name}{series} {format_metric_value(value)}")
+                continue
+            for (metric, labels), counts in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0.0
+                bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, counts):
+                    cumulative += count
+                    bucket_labels = format_metric_labels((*labels, ("le", bound)))
+                    lines.append(
+                        f"{name}_bucket{bucket_labels} {format_metric_value(cumulative)}"
+                    )
+                series = format_metric_labels(labels)
+                lines.append(f"{name}_sum{series} {format_metric_value(counts[-1])}")
+                lines.append(f"{name}_count{series} {format_metric_value(cumulative)}")
+        return "\n".join(lines) + "\n"
+
+
+def format_metric_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def format_metric_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    pairs: list[str] = []
+    for key, value in labels:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def route_class(path: str) -> str:
+    if path in ("", "/", "/index.html"):
+        return "index"
+    if path in ("/metrics", "/healthz", "/readyz", "/debug/memory"):
+        return "internal"
+    if path in ("/search",):
+        return "search"
+    for prefix, route in (
+        ("/stories/", "story"),
+        ("/assets/", "asset"),
+        ("/api/", "api"),
+        ("/bundles/", "bundle"),
+    ):
+        if path.startswith(prefix):
+            return route
+    return "other"
+
+
+METRICS = StoryMetrics()
+STAGE_STATE = threading.local()
+MARKDOWN_STATE = threading.local()
+
+
+class StageTimings:
+    def __init__(self) -> None:
+        self.totals: dict[str, float] = {}
+        self.stack: list[list[Any]] = []
+        self.started = time.perf_counter()
+        self.previous: StageTimings | None = None
+        self.cache_status: str | None = None
+
+    def __enter__(self) -> StageTimings:
+        self.previous = getattr(STAGE_STATE, "timings", None)
+        STAGE_STATE.timings = self
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        STAGE_STATE.timings = self.previous
+
+    def enter(self, name: str) -> None:
+        now = time.perf_counter()
+        if self.stack:
+            parent = self.stack[-1]
+            self.totals[parent[0]] = self.totals.get(parent[0], 0.0) + now - parent[1]
+        self.stack.append([name, now])
+
+    def exit(self) -> None:
+        now = time.perf_counter()
+        name, started = self.stack.pop()
+        self.totals[name] = self.totals.get(name, 0.0) + now - started
+        if self.stack:
+            self.stack[-1][1] = now
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        entries = [
+            f"{name};dur={seconds * 1000:.2f}"
+            for name, seconds in sorted(self.totals.items(), key=lambda item: -item[1])
+        ]
+        entries.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(entries)
+
+
+def record_cache_status(hit: bool) -> None:
+    timings = getattr(STAGE_STATE, "timings", None)
+    if timings is not None and timings.cache_status is None:
+        timings.cache_status = "hit" if hit else "miss"
+
+
+class StageTimer:
+    __slots__ = ("name", "timings")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.timings: StageTimings | None = getattr(STAGE_STATE, "timings", None)
+
+    def __enter__(self) -> None:
+        if self.timings is not None:
+            self.timings.enter(self.name)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self.timings is not None:
+            self.timings.exit()
+
+
+class CollapsedStackProfiler:
+    def __init__(self) -> None:
+        self.totals: dict[str, int] = {}
+        self.stack: list[str] = []
+        self.last = 0
+
+    def trace(self, frame: Any, event: str, arg: Any) -> None:
+        now = time.perf_counter_ns()
+        if self.stack:
+            key = self.stack[-1]
+            self.totals[key] = self.totals.get(key, 0) + now - self.last
+        if event == "call":
+            code = frame.f_code
+            name = f"{pathlib.Path(code.co_filename).stem}:{code.co_name}"
+            self.stack.append(f"{self.stack[-1]};{name}" if self.stack else name)
+        elif event == "c_call":
+            name = getattr(arg, "__qualname__", None) or getattr(arg, "__name__", "?")
+            self.stack.append(f"{self.stack[-1]};{name}" if self.stack else name)
+        elif self.stack:
+            self.stack.pop()
+        self.last = time.perf_counter_ns()
+
+    def enable(self) -> None:
+        self.last = time.perf_counter_ns()
+        sys.setprofile(self.trace)
+
+    def disable(self) -> None:
+        sys.setprofile(None)
+
+    def dump_stats(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            for key, nanoseconds in sorted(self.totals.items()):
+                if nanoseconds >= 1000:
+                    handle.write(f"{key} {nanoseconds // 1000}\n")
+
+
 def load_story_text(path: pathlib.Path) -> tuple[dict[str, Any], str]:
-    text = path.read_text(encoding="utf-8")
+    return split_story_text(path.read_text(encoding="utf-8"))
+
+
+def split_story_text(text: str) -> tuple[dict[str, Any], str]:
     lines = text.splitlines()
     if not lines or lines[0].strip() != FRONT_MATTER_DELIMITER:
         raise StoryParseError("Missing front matter header '---' at top of file.")
@@ -696,12 +1320,43 @@ def load_story_text(path: pathlib.Path) -> tuple[dict[str, Any], str]:
 
     front_matter_text = "\n".join(lines[1:end_index])
     body = "\n".join(lines[end_index + 1 :])
-    data = yaml.safe_load(front_matter_text) or {}
+    data = parse_front_matter_yaml(front_matter_text)
     if not isinstance(data, dict):
         raise StoryParseError("Front matter must parse to a mapping/object.")
     return data, body
 
 
+def parse_front_matter_yaml(text: str) -> Any:
+    import yaml
+
+    try:
+        return yaml.safe_load(text) or {}
+    except yaml.YAMLError as exc:
+        raise StoryParseError(f"Invalid front matter YAML: {exc}") from exc
+
+
+def read_front_matter(handle: TextIO) -> dict[str, Any]:
+    if handle.readline().strip() != FRONT_MATTER_DELIMITER:
+        raise StoryParseError("Missing front matter header '---' at top of file.")
+    lines: list[str] = []
+    for line in iter(handle.readline, ""):
+        if line.strip() == FRONT_MATTER_DELIMITER:
+            break
+        lines.append(line)
+    else:
+        raise StoryParseError("Missing closing front matter '---'.")
+    with StageTimer("yaml"):
+        data = parse_front_matter_yaml("".join(lines))
+    if not isinstance(data, dict):
+        raise StoryParseError("Front matter must parse to a mapping/object.")
+    return data
+
+
+def read_story_front_matter(path: pathlib.Path) -> dict[str, Any]:
+    with path.open(encoding="utf-8") as handle:
+        return read_front_matter(handle)
+
+
 def parse_attrs(raw: str) -> dict[str, str]:
     return {key: value for key, value in ATTR_RE.findall(raw)}
 
@@ -713,13 +1368,27 @@ def is_absolute_url(url: str) -> bool:
     return bool(parsed.scheme) or url.startswith("/") or url.startswith("#")
 
 
-def resolve_asset_url(url: str | None, asset_prefix: str | None) -> str | None:
-    if not url or not asset_prefix or is_absolute_url(url):
-        return url
+def asset_relative_path(url: str) -> str:
     cleaned = url.lstrip("./")
     if cleaned.startswith("assets/"):
         cleaned = cleaned[len("assets/") :]
-    return f"{asset_prefix.rstrip('/')}/{cleaned}"
+    return cleaned
+
+
+def resolve_asset_url(url: str | None, asset_prefix: str | None) -> str | None:
+    if not url or not asset_prefix or is_absolute_url(url):
+        return url
+    return f"{asset_prefix.rstrip('/')}/{asset_relative_path(url)}"
+
+
+def local_asset_path(story_path: pathlib.Path, url: str | None) -> pathlib.Path | None:
+    if not url or is_absolute_url(url):
+        return None
+    asset_root = (story_path.parent / "assets").resolve()
+    candidate = (asset_root / asset_relative_path(url)).resolve()
+    if asset_root not in candidate.parents or not candidate.is_file():
+        return None
+    return candidate
 
 
 def rewrite_asset_urls(html_content: str, asset_prefix: str | None) -> str:
@@ -737,6 +1406,37 @@ def rewrite_asset_urls(html_content: str, asset_prefix: str | None) -> str:
     return re.sub(r'(src|href)="([^"]+)"', replace_attr, html_content)
 
 
+def intern_value(value: Any) -> Any:
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return [intern_value(item) for item in value]
+    if isinstance(value, dict):
+        return {sys.intern(str(key)): intern_value(item) for key, item in value.items()}
+    return value
+
+
+def compact_story_meta(meta: dict[str, Any]) -> dict[str, Any]:
+    return {
+        sys.intern(key): intern_value(meta[key])
+        for key in STORY_META_FIELDS
+        if meta.get(key) is not None
+    }
+
+
+def build_story_media(item: dict[str, Any], key: str) -> StoryMedia:
+    return StoryMedia(
+        key=sys.intern(key),
+        type=sys.intern(str(item.get("type", ""))),
+        apple_music_id=str(item.get("apple_music_id", "")),
+        title=sys.intern(str(item.get("title", ""))),
+        artist=sys.intern(str(item.get("artist", ""))),
+        artwork_url=intern_value(item.get("artwork_url")),
+        apple_music_url=intern_value(item.get("apple_music_url")),
+        duration_ms=item.get("duration_ms"),
+    )
+
+
 def build_media_lookup(raw_media: list[dict[str, Any]]) -> dict[str, StoryMedia]:
     lookup: dict[str, StoryMedia] = {}
     for item in raw_media:
@@ -745,15 +1445,7 @@ def build_media_lookup(raw_media: list[dict[str, Any]]) -> dict[str, StoryMedia]
         key = str(item.get("key", "")).strip()
         if not key:
             continue
-        lookup[key] = StoryMedia(
-            key=key,
-            type=str(item.get("type", "")),
-            apple_music_id=str(item.get("apple_music_id", "")),
-            title=str(item.get("title", "")),
-            artist=str(item.get("artist", "")),
-            artwork_url=item.get("artwork_url"),
-            apple_music_url=item.get("apple_music_url"),
-        )
+        lookup[key] = build_story_media(item, key)
     return lookup
 
 
@@ -847,9 +1539,235 @@ def build_apple_music_link(media: StoryMedia) -> str:
     return f"https://music.apple.com/{region}/{kind}/{media.apple_music_id}"
 
 
+class RenderCache:
+    def __init__(
+        self, root: pathlib.Path, max_bytes: int = DEFAULT_RENDER_CACHE_MAX_BYTES
+    ) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.version = "-".join(
+            (
+                str(RENDER_CACHE_VERSION),
+                module_fingerprint("markdown"),
+                hash_file(pathlib.Path(__file__))[:16],
+            )
+        )
+        self.written = 0
+        self.lock = threading.Lock()
+
+    def key(self, namespace: str, *parts: str) -> str:
+        digest = hashlib.sha256()
+        for part in (self.version, namespace, *parts):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path(self, key: str) -> pathlib.Path:
+        return self.root / key[:2] / f"{key}{RENDER_CACHE_SUFFIX}"
+
+    def get(self, key: str) -> str | None:
+        path = self.path(key)
+        try:
+            with StageTimer("cache"):
+                text = path.read_text(encoding="utf-8")
+                os.utime(path)
+        except OSError:
+            METRICS.cache_lookup("render", False)
+            return None
+        METRICS.cache_lookup("render", True)
+        return text
+
+    def put(self, key: str, value: str) -> None:
+        path = self.path(key)
+        data = value.encode("utf-8")
+        temp_path = path.with_name(
+            f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+            return
+        with self.lock:
+            self.written += len(data)
+            due = self.written * 10 > self.max_bytes
+        if due:
+            self.prune()
+
+    def fetch(
+        self, namespace: str, parts: Iterable[str], render: Callable[[], str]
+    ) -> str:
+        key = self.key(namespace, *parts)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        value = render()
+        self.put(key, value)
+        return value
+
+    def iter_entries(self) -> Iterator[tuple[pathlib.Path, os.stat_result]]:
+        if not self.root.is_dir():
+            return
+        for path in self.root.glob(f"*/*{RENDER_CACHE_SUFFIX}"):
+            try:
+                yield path, path.stat()
+            except OSError:
+                continue
+
+    def stats(self) -> RenderCacheStats:
+        sizes: list[int] = []
+        times: list[float] = []
+        for _, stat in self.iter_entries():
+            sizes.append(stat.st_size)
+            times.append(stat.st_mtime)
+        return RenderCacheStats(
+            entries=len(sizes),
+            bytes=sum(sizes),
+            oldest=min(times) if times else None,
+            newest=max(times) if times else None,
+        )
+
+    def prune(self, max_bytes: int | None = None) -> tuple[int, int]:
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self.iter_entries(), key=lambda item: item[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        removed = 0
+        freed = 0
+        for path, stat in entries:
+            if total <= limit:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= stat.st_size
+            removed += 1
+            freed += stat.st_size
+        with self.lock:
+            self.written = 0
+        METRICS.inc("story_cache_evictions_total", (("cache", "render"),), removed)
+        return removed, freed
+
+
+def render_context_key(
+    media_lookup: dict[str, StoryMedia],
+    asset_prefix: str | None,
+    image_variants: dict[str, tuple[ImageVariant, ...]] | None,
+    asset_manifest: dict[str, AssetInfo] | None,
+) -> str:
+    context = repr(
+        (
+            sorted(media_lookup.items()),
+            asset_prefix,
+            sorted((image_variants or {}).items()),
+            sorted((asset_manifest or {}).items()),
+        )
+    )
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()
+
+
+def module_fingerprint(name: str) -> str:
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.origin is None:
+        return "missing"
+    try:
+        stat = os.stat(spec.origin)
+    except OSError:
+        return "missing"
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def markdown_engine() -> Any:
+    engine = getattr(MARKDOWN_STATE, "engine", None)
+    if engine is None:
+        import markdown
+
+        engine = MARKDOWN_STATE.engine = markdown.Markdown(extensions=["extra"])
+    return engine
+
+
 def render_markdown_fragment(text: str, asset_prefix: str | None) -> str:
-    rendered = markdown.markdown(text, extensions=["extra"])
-    return rewrite_asset_urls(rendered, asset_prefix)
+    with StageTimer("markdown"):
+        rendered = markdown_engine().reset().convert(text)
+    with StageTimer("assets"):
+        return rewrite_asset_urls(rendered, asset_prefix)
+
+
+def image_variant_url(name: str, asset_prefix: str | None) -> str:
+    return resolve_asset_url(f"assets/{IMAGE_VARIANT_DIR}/{name}", asset_prefix) or name
+
+
+def build_image_srcset(
+    variants: Iterable[ImageVariant], asset_prefix: str | None
+) -> str:
+    return ", ".join(
+        f"{image_variant_url(variant.name, asset_prefix)} {variant.width}w"
+        for variant in sorted(variants, key=lambda item: item.width)
+    )
+
+
+def build_image_layout_attrs(info: AssetInfo | None) -> str:
+    if info is None:
+        return ""
+    attrs = ""
+    if info.width and info.height:
+        attrs += f' width="{info.width}" height="{info.height}"'
+    if info.placeholder:
+        attrs += (
+            ' style="background-image:url({placeholder});'
+            'background-size:cover;background-position:center"'
+        ).format(placeholder=html.escape(info.placeholder))
+    return attrs
+
+
+def render_image(
+    src: str,
+    alt: str,
+    variants: tuple[ImageVariant, ...] | None = None,
+    asset_prefix: str | None = None,
+    css_class: str | None = None,
+    sizes: str = "100vw",
+    info: AssetInfo | None = None,
+) -> str:
+    class_attr = f' class="{html.escape(css_class)}"' if css_class else ""
+    layout_attrs = build_image_layout_attrs(info)
+    if not variants:
+        return (
+            f'<img{class_attr} src="{html.escape(src)}" alt="{html.escape(alt)}"'
+            f"{layout_attrs}>"
+        )
+    by_format: dict[str, list[ImageVariant]] = {}
+    for variant in variants:
+        by_format.setdefault(variant.format, []).append(variant)
+    sources: list[str] = []
+    for image_format in IMAGE_VARIANT_FORMATS:
+        items = by_format.get(image_format)
+        if not items or image_format == "jpeg":
+            continue
+        sources.append(
+            '<source type="{type}" srcset="{srcset}" sizes="{sizes}">'.format(
+                type=IMAGE_VARIANT_MIME_TYPES[image_format],
+                srcset=html.escape(build_image_srcset(items, asset_prefix)),
+                sizes=html.escape(sizes),
+            )
+        )
+    fallback = by_format.get("jpeg")
+    srcset_attr = (
+        ' srcset="{srcset}" sizes="{sizes}"'.format(
+            srcset=html.escape(build_image_srcset(fallback, asset_prefix)),
+            sizes=html.escape(sizes),
+        )
+        if fallback
+        else ""
+    )
+    return (
+        f"<picture>{''.join(sources)}"
+        f'<img{class_attr} src="{html.escape(src)}"{srcset_attr} alt="{html.escape(alt)}"'
+        f"{layout_attrs}>"
+        "</picture>"
+    )
 
 
 def render_drop_quote(
@@ -959,11 +1877,18 @@ def render_timeline(content: str, asset_prefix: str | None) -> str:
     return f'<div class="timeline">{"".join(items)}</div>'
 
 
-def render_gallery(content: str, asset_prefix: str | None) -> str:
+def render_gallery(
+    content: str,
+    asset_prefix: str | None,
+    image_variants: dict[str, tuple[ImageVariant, ...]] | None = None,
+    asset_manifest: dict[str, AssetInfo] | None = None,
+) -> str:
+    image_variants = image_variants or {}
     items: list[str] = []
     for match in GALLERY_IMAGE_RE.finditer(content):
         attrs = parse_attrs(match.group(1))
-        src = resolve_asset_url(attrs.get("src"), asset_prefix)
+        raw_src = attrs.get("src")
+        src = resolve_asset_url(raw_src, asset_prefix)
         alt = attrs.get("alt", "")
         caption = attrs.get("caption")
         credit = attrs.get("credit")
@@ -981,9 +1906,17 @@ def render_gallery(content: str, asset_prefix: str | None) -> str:
             if caption_parts
             else ""
         )
+        image_html = render_image(
+            src,
+            alt,
+            image_variants.get(raw_src or ""),
+            asset_prefix,
+            sizes="(max-width: 720px) 100vw, 50vw",
+            info=lookup_asset_info(asset_manifest, raw_src),
+        )
         items.append(
             '<figure class="gallery-item">'
-            f'<img src="{html.escape(src)}" alt="{html.escape(alt)}">'
+            f"{image_html}"
             f"{caption_html}"
             "</figure>"
         )
@@ -992,8 +1925,15 @@ def render_gallery(content: str, asset_prefix: str | None) -> str:
     return f'<div class="gallery">{"".join(items)}</div>'
 
 
-def render_full_bleed(attrs: dict[str, str], asset_prefix: str | None) -> str:
-    src = resolve_asset_url(attrs.get("src"), asset_prefix)
+def render_full_bleed(
+    attrs: dict[str, str],
+    asset_prefix: str | None,
+    image_variants: dict[str, tuple[ImageVariant, ...]] | None = None,
+    asset_manifest: dict[str, AssetInfo] | None = None,
+) -> str:
+    image_variants = image_variants or {}
+    raw_src = attrs.get("src")
+    src = resolve_asset_url(raw_src, asset_prefix)
     if not src:
         return ""
     alt = attrs.get("alt", "")
@@ -1005,9 +1945,13 @@ def render_full_bleed(attrs: dict[str, str], asset_prefix: str | None) -> str:
             f'<video class="fullbleed-media" src="{html.escape(src)}" controls></video>'
         )
     else:
-        media_html = (
-            f'<img class="fullbleed-media" src="{html.escape(src)}" '
-            f'alt="{html.escape(alt)}">'
+        media_html = render_image(
+            src,
+            alt,
+            image_variants.get(raw_src or ""),
+            asset_prefix,
+            css_class="fullbleed-media",
+            info=lookup_asset_info(asset_manifest, raw_src),
         )
     caption_parts = []
     if caption:
@@ -1036,6 +1980,9 @@ BLOCK_PATTERNS: list[tuple[str, re.Pattern[str]]] = [
 ]
 
 
+BLOCK_REGEXES = dict(BLOCK_PATTERNS)
+
+
 def find_next_block(raw_body: str, start: int) -> tuple[str, re.Match[str]] | None:
     matches: list[tuple[int, str, re.Match[str]]] = []
     for kind, regex in BLOCK_PATTERNS:
@@ -1066,26 +2013,72 @@ def build_gradient(value: Any) -> str | None:
     return f"linear-gradient(120deg, {stops})"
 
 
-def render_section_body(
-    raw_body: str, media_lookup: dict[str, StoryMedia], asset_prefix: str | None = None
-) -> str:
-    parts: list[str] = []
+def section_block_spans(raw_body: str) -> tuple[tuple[str, int, int], ...]:
+    spans: list[tuple[str, int, int]] = []
     cursor = 0
     while True:
         next_block = find_next_block(raw_body, cursor)
         if not next_block:
-            tail = raw_body[cursor:].strip()
-            if tail:
-                parts.append(render_markdown_fragment(tail, asset_prefix))
-            break
+            if raw_body[cursor:].strip():
+                spans.append(("text", cursor, len(raw_body)))
+            return tuple(spans)
         kind, match = next_block
-        text = raw_body[cursor : match.start()].strip()
-        if text:
-            parts.append(render_markdown_fragment(text, asset_prefix))
-        if kind == "media":
+        if raw_body[cursor : match.start()].strip():
+            spans.append(("text", cursor, match.start()))
+        spans.append((kind, match.start(), match.end()))
+        cursor = match.end()
+
+
+def iter_section_blocks(
+    raw_body: str, spans: tuple[tuple[str, int, int], ...] | None = None
+) -> Iterator[tuple[str, str | re.Match[str]]]:
+    if not spans:
+        spans = section_block_spans(raw_body)
+    for kind, start, end in spans:
+        if kind == "text":
+            yield kind, raw_body[start:end].strip()
+            continue
+        match = BLOCK_REGEXES[kind].match(raw_body, start)
+        if match is not None:
+            yield kind, match
+
+
+def render_section_body(
+    raw_body: str,
+    media_lookup: dict[str, StoryMedia],
+    asset_prefix: str | None = None,
+    image_variants: dict[str, tuple[ImageVariant, ...]] | None = None,
+    asset_manifest: dict[str, AssetInfo] | None = None,
+    blocks: tuple[tuple[str, int, int], ...] | None = None,
+    render_cache: RenderCache | None = None,
+) -> str:
+    parts: list[str] = []
+    for kind, match in iter_section_blocks(raw_body, blocks):
+        if isinstance(match, str):
+            if render_cache is None:
+                parts.append(render_markdown_fragment(match, asset_prefix))
+            else:
+                parts.append(
+                    render_cache.fetch(
+                        "markdown",
+                        (match, asset_prefix or ""),
+                        lambda: render_markdown_fragment(match, asset_prefix),
+                    )
+                )
+        elif kind == "media":
             attrs = parse_attrs(match.group(1))
             ref = attrs.get("ref", "")
-            parts.append(render_media_card(ref, media_lookup.get(ref), asset_prefix))
+            media = media_lookup.get(ref)
+            if render_cache is None:
+                parts.append(render_media_card(ref, media, asset_prefix))
+            else:
+                parts.append(
+                    render_cache.fetch(
+                        "media-card",
+                        (ref, repr(media), asset_prefix or ""),
+                        lambda: render_media_card(ref, media, asset_prefix),
+                    )
+                )
         elif kind == "dropquote":
             attrs = parse_attrs(match.group(1) or "")
             parts.append(render_drop_quote(attrs, match.group(2), asset_prefix))
@@ -1100,44 +2093,115 @@ def render_section_body(
         elif kind == "timeline":
             parts.append(render_timeline(match.group(1), asset_prefix))
         elif kind == "gallery":
-            parts.append(render_gallery(match.group(1), asset_prefix))
+            parts.append(
+                render_gallery(
+                    match.group(1), asset_prefix, image_variants, asset_manifest
+                )
+            )
         elif kind == "fullbleed":
             attrs = parse_attrs(match.group(1) or "")
-            parts.append(render_full_bleed(attrs, asset_prefix))
-        cursor = match.end()
+            parts.append(
+                render_full_bleed(attrs, asset_prefix, image_variants, asset_manifest)
+            )
     return "\n".join(parts)
 
 
 def parse_sections(
     body: str, section_meta: dict[str, dict[str, Any]]
 ) -> list[StorySection]:
-    sections: list[StorySection] = []
-    for match in SECTION_RE.finditer(body):
-        attrs = parse_attrs(match.group(1))
-        content = match.group(2).strip()
-        section_id = attrs.get("id") or ""
-        meta = section_meta.get(section_id, {})
-        title = attrs.get("title") or meta.get("title") or ""
-        layout = attrs.get("layout") or meta.get("layout")
-        sections.append(
-            StorySection(id=section_id, title=title, layout=layout, body=content)
-        )
+    sections = [
+        build_section(match, section_meta) for match in SECTION_RE.finditer(body)
+    ]
     if not sections:
         raise StoryParseError("No <Section> blocks found in story body.")
     return sections
 
 
-def validate_story_meta(meta: dict[str, Any]) -> list[str]:
+def build_section(
+    match: re.Match[str], section_meta: dict[str, dict[str, Any]]
+) -> StorySection:
+    attrs = parse_attrs(match.group(1))
+    content = match.group(2).strip()
+    section_id = attrs.get("id") or ""
+    meta = section_meta.get(section_id, {})
+    title = attrs.get("title") or meta.get("title") or ""
+    layout = attrs.get("layout") or meta.get("layout")
+    lead_media = meta.get("lead_media")
+    return StorySection(
+        id=sys.intern(section_id),
+        title=title,
+        layout=intern_value(layout),
+        body=content,
+        lead_media=intern_value(str(lead_media)) if lead_media else None,
+        blocks=section_block_spans(content),
+    )
+
+
+def iter_story_sections(
+    handle: TextIO, section_meta: dict[str, dict[str, Any]]
+) -> Iterator[StorySection]:
+    with handle:
+        pending: list[str] = []
+        found = False
+        for line in handle:
+            pending.append(line)
+            if "</Section>" not in line:
+                continue
+            buffer = "".join(pending)
+            end = 0
+            with StageTimer("sections"):
+                sections: list[StorySection] = []
+                for match in SECTION_RE.finditer(buffer):
+                    sections.append(build_section(match, section_meta))
+                    end = match.end()
+            found = found or bool(sections)
+            yield from sections
+            pending = [buffer[end:]]
+        if not found:
+            raise StoryParseError("No <Section> blocks found in story body.")
+
+
+def stream_story(path: pathlib.Path) -> tuple[Story, Iterator[StorySection]]:
+    handle = path.open(encoding="utf-8")
+    try:
+        meta = read_front_matter(handle)
+        with StageTimer("validate"):
+            errors = validate_story_meta(meta)
+        if errors:
+            raise StoryParseError("Schema validation failed: " + "; ".join(errors))
+    except BaseException:
+        handle.close()
+        raise
+    section_meta = {
+        str(item.get("id")): item
+        for item in meta.get("sections", [])
+        if isinstance(item, dict) and item.get("id")
+    }
+    story = Story(
+        meta=compact_story_meta(meta),
+        sections=[],
+        media=build_media_lookup(meta.get("media", [])),
+    )
+    return story, iter_story_sections(handle, section_meta)
+
+
+@functools.lru_cache(maxsize=1)
+def load_story_validator() -> Callable[[dict[str, Any]], Any] | None:
     validator_path = pathlib.Path(__file__).with_name("validate_story.py")
     if not validator_path.exists():
-        return []
+        return None
     spec = importlib.util.spec_from_file_location("validate_story", validator_path)
     if spec is None or spec.loader is None:
-        return []
+        return None
     module = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(module)
     validate = getattr(module, "validate_story", None)
-    if callable(validate):
+    return validate if callable(validate) else None
+
+
+def validate_story_meta(meta: dict[str, Any]) -> list[str]:
+    validate = load_story_validator()
+    if validate is not None:
         result = validate(meta)
         if isinstance(result, Iterable):
             return list(result)
@@ -1145,19 +2209,313 @@ def validate_story_meta(meta: dict[str, Any]) -> list[str]:
     return []
 
 
-def build_story(path: pathlib.Path) -> Story:
-    meta, body = load_story_text(path)
-    errors = validate_story_meta(meta)
-    if errors:
-        raise StoryParseError("Schema validation failed: " + "; ".join(errors))
-    section_meta = {
-        str(item.get("id")): item
-        for item in meta.get("sections", [])
-        if isinstance(item, dict) and item.get("id")
+def compiled_story_path(cache_dir: pathlib.Path, digest: str) -> pathlib.Path:
+    return cache_dir / digest[:2] / f"{digest}.story"
+
+
+@functools.lru_cache(maxsize=1)
+def compiled_code_fingerprint() -> str:
+    digest = hashlib.sha256()
+    digest.update(
+        f"{COMPILED_STORY_VERSION}:{sys.version_info[:3]}:{marshal.version}".encode()
+    )
+    script = pathlib.Path(__file__)
+    for source in (script, script.with_name("validate_story.py")):
+        try:
+            digest.update(hash_file(source).encode("ascii"))
+        except OSError:
+            digest.update(b"missing")
+    return digest.hexdigest()[:16]
+
+
+def compiled_story_header() -> bytes:
+    return (
+        COMPILED_STORY_MAGIC
+        + bytes([COMPILED_STORY_VERSION])
+        + compiled_code_fingerprint().encode("ascii")
+    )
+
+
+def compiled_story_dir(args: argparse.Namespace) -> pathlib.Path | None:
+    cache_dir = getattr(args, "cache_dir", None)
+    return pathlib.Path(cache_dir) / COMPILED_STORY_SUBDIR if cache_dir else None
+
+
+def encode_compiled_story(story: Story) -> bytes:
+    payload = (
+        story.meta,
+        tuple(
+            (
+                section.id,
+                section.title,
+                section.layout,
+                section.body,
+                section.lead_media,
+                section.blocks,
+            )
+            for section in story.sections
+        ),
+        tuple(
+            (
+                media.key,
+                media.type,
+                media.apple_music_id,
+                media.title,
+                media.artist,
+                media.artwork_url,
+                media.apple_music_url,
+                media.duration_ms,
+            )
+            for media in story.media.values()
+        ),
+    )
+    return compiled_story_header() + marshal.dumps(payload)
+
+
+def decode_compiled_story(data: bytes) -> Story | None:
+    header = compiled_story_header()
+    if not data.startswith(header):
+        return None
+    try:
+        meta, sections, media = marshal.loads(data[len(header) :])
+    except (EOFError, ValueError, TypeError):
+        return None
+    return Story(
+        meta=meta,
+        sections=[StorySection(*item) for item in sections],
+        media={item[0]: StoryMedia(*item) for item in media},
+    )
+
+
+def write_compiled_story(path: pathlib.Path, story: Story) -> None:
+    try:
+        data = encode_compiled_story(story)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+    except (OSError, ValueError):
+        return
+
+
+def build_story(
+    path: pathlib.Path, compiled_dir: pathlib.Path | None = None
+) -> Story:
+    compiled_path = None
+    if compiled_dir is not None:
+        with StageTimer("hash"):
+            digest = hashlib.sha256(
+                f"{compiled_code_fingerprint()}:{hash_file(path)}".encode("ascii")
+            ).hexdigest()
+        compiled_path = compiled_story_path(compiled_dir, digest)
+        try:
+            with StageTimer("compiled"):
+                story = decode_compiled_story(compiled_path.read_bytes())
+        except OSError:
+            story = None
+        METRICS.cache_lookup("compiled", story is not None)
+        if story is not None:
+            return story
+    story, sections = stream_story(path)
+    story = Story(meta=story.meta, sections=list(sections), media=story.media)
+    if compiled_path is not None:
+        write_compiled_story(compiled_path, story)
+    return story
+
+
+def story_version(path: pathlib.Path) -> tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def drop_empty(payload: dict[str, Any]) -> dict[str, Any]:
+    return {
+        key: value for key, value in payload.items() if value not in (None, "", [], {})
+    }
+
+
+def build_image_ast(
+    src: str | None,
+    alt: str | None,
+    asset_prefix: str | None,
+    asset_manifest: dict[str, AssetInfo] | None,
+    image_variants: dict[str, tuple[ImageVariant, ...]] | None = None,
+    **extra: Any,
+) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "src": resolve_asset_url(src, asset_prefix),
+        "alt": alt,
+        **extra,
+    }
+    info = lookup_asset_info(asset_manifest, src)
+    if info is not None:
+        payload.update(
+            width=info.width, height=info.height, placeholder=info.placeholder
+        )
+    variants = (image_variants or {}).get(src or "")
+    if variants:
+        payload["variants"] = [
+            {
+                "src": image_variant_url(variant.name, asset_prefix),
+                "width": variant.width,
+                "format": variant.format,
+            }
+            for variant in variants
+        ]
+    return drop_empty(payload)
+
+
+def build_block_ast(
+    kind: str,
+    match: str | re.Match[str],
+    asset_prefix: str | None = None,
+    asset_manifest: dict[str, AssetInfo] | None = None,
+    image_variants: dict[str, tuple[ImageVariant, ...]] | None = None,
+) -> list[dict[str, Any]]:
+    if isinstance(match, str):
+        return [
+            {"type": "paragraph", "text": paragraph.strip()}
+            for paragraph in PARAGRAPH_SPLIT_RE.split(match)
+            if paragraph.strip()
+        ]
+    if kind == "media":
+        attrs = parse_attrs(match.group(1))
+        return [{"type": "media", "ref": attrs.pop("ref", ""), **attrs}]
+    if kind == "factgrid":
+        facts = []
+        for fact in FACT_RE.finditer(match.group(1)):
+            attrs = parse_attrs(fact.group(1))
+            if attrs.get("label") and attrs.get("value"):
+                facts.append({"label": attrs["label"], "value": attrs["value"]})
+        return [{"type": "factGrid", "facts": facts}]
+    if kind == "timeline":
+        items = [
+            {
+                "year": parse_attrs(item.group(1)).get("year", ""),
+                "text": item.group(2).strip(),
+            }
+            for item in TIMELINE_ITEM_RE.finditer(match.group(1))
+        ]
+        return [{"type": "timeline", "items": items}]
+    if kind == "gallery":
+        images = []
+        for image in GALLERY_IMAGE_RE.finditer(match.group(1)):
+            attrs = parse_attrs(image.group(1))
+            if not attrs.get("src"):
+                continue
+            images.append(
+                build_image_ast(
+                    attrs.get("src"),
+                    attrs.get("alt", ""),
+                    asset_prefix,
+                    asset_manifest,
+                    image_variants,
+                    caption=attrs.get("caption"),
+                    credit=attrs.get("credit"),
+                )
+            )
+        return [{"type": "gallery", "images": images}]
+    attrs = parse_attrs(match.group(1) or "")
+    if kind == "fullbleed":
+        if not attrs.get("src"):
+            return []
+        return [
+            {
+                "type": "fullBleed",
+                "kind": attrs.get("kind", "image"),
+                **build_image_ast(
+                    attrs.get("src"),
+                    attrs.get("alt", ""),
+                    asset_prefix,
+                    asset_manifest,
+                    image_variants,
+                    caption=attrs.get("caption"),
+                    credit=attrs.get("credit"),
+                ),
+            }
+        ]
+    text = match.group(2).strip()
+    if kind == "dropquote":
+        block = {"type": "dropQuote", "text": text, "attribution": attrs.get("attribution")}
+    elif kind == "sidenote":
+        block = {"type": "sideNote", "text": text, "label": attrs.get("label")}
+    else:
+        block = {
+            "type": "featureBox",
+            "title": attrs.get("title"),
+            "summary": attrs.get("summary"),
+            "expandable": attrs.get("expandable", "false").lower() == "true",
+            "text": text,
+        }
+    return [drop_empty(block)]
+
+
+def build_story_ast(
+    story: Story,
+    asset_prefix: str | None = None,
+    asset_manifest: dict[str, AssetInfo] | None = None,
+    image_variants: dict[str, tuple[ImageVariant, ...]] | None = None,
+) -> dict[str, Any]:
+    meta = drop_empty({key: story.meta.get(key) for key in STORY_AST_META_FIELDS})
+    for key in ("hero_image", "leadArt"):
+        image = story.meta.get(key)
+        if isinstance(image, dict) and image.get("src"):
+            meta[key] = build_image_ast(
+                str(image["src"]),
+                image.get("alt"),
+                asset_prefix,
+                asset_manifest,
+                image_variants,
+                caption=image.get("caption"),
+                credit=image.get("credit"),
+            )
+    sections = []
+    for section in story.sections:
+        blocks: list[dict[str, Any]] = []
+        for kind, match in iter_section_blocks(section.body, section.blocks):
+            blocks.extend(
+                build_block_ast(
+                    kind, match, asset_prefix, asset_manifest, image_variants
+                )
+            )
+        sections.append(
+            drop_empty(
+                {
+                    "id": section.id,
+                    "title": section.title,
+                    "layout": section.layout,
+                    "lead_media": section.lead_media,
+                    "blocks": blocks,
+                }
+            )
+        )
+    media = [
+        drop_empty(
+            {
+                "key": item.key,
+                "type": item.type,
+                "apple_music_id": item.apple_music_id,
+                "title": item.title,
+                "artist": item.artist,
+                "artwork_url": item.artwork_url,
+                "apple_music_url": item.apple_music_url,
+                "duration_ms": item.duration_ms,
+            }
+        )
+        for item in story.media.values()
+    ]
+    return {
+        "version": STORY_AST_VERSION,
+        "meta": meta,
+        "sections": sections,
+        "media": media,
     }
-    sections = parse_sections(body, section_meta)
-    media_lookup = build_media_lookup(meta.get("media", []))
-    return Story(meta=meta, sections=sections, media=media_lookup)
+
+
+def encode_story_ast(ast: dict[str, Any]) -> bytes:
+    return json.dumps(
+        ast, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
 
 
 def discover_story_paths(paths: Iterable[str | pathlib.Path]) -> list[pathlib.Path]:
@@ -1184,150 +2542,1561 @@ def discover_story_paths(paths: Iterable[str | pathlib.Path]) -> list[pathlib.Pa
 
 def build_story_index(
     paths: Iterable[str | pathlib.Path],
+    previous: dict[str, StoryIndexEntry] | None = None,
 ) -> dict[str, StoryIndexEntry]:
+    reusable = {entry.path: entry for entry in (previous or {}).values()}
     entries: dict[str, StoryIndexEntry] = {}
     for story_path in discover_story_paths(paths):
         try:
-            meta, _ = load_story_text(story_path)
-        except (OSError, StoryParseError):
+            version = story_version(story_path)
+            cached = reusable.get(story_path)
+            if cached is not None and cached.version == version:
+                entries.setdefault(cached.id, cached)
+                continue
+            content_hash = hash_file(story_path)
+            meta = read_story_front_matter(story_path)
+        except (OSError, UnicodeDecodeError, StoryParseError):
             continue
         story_id = str(meta.get("id") or story_path.parent.name).strip()
         if not story_id or story_id in entries:
             continue
         hero = meta.get("hero_image") or {}
         entries[story_id] = StoryIndexEntry(
-            id=story_id,
+            id=sys.intern(story_id),
             title=str(meta.get("title", story_id)),
             subtitle=meta.get("subtitle"),
-            authors=list(meta.get("authors", [])),
-            hero_src=hero.get("src"),
-            tags=list(meta.get("tags", [])),
+            authors=intern_value(list(meta.get("authors", []))),
+            hero_src=intern_value(hero.get("src")),
+            tags=intern_value(list(meta.get("tags", []))),
             path=story_path,
+            content_hash=content_hash,
+            version=version,
         )
     return entries
 
 
-def render_index_html(entries: dict[str, StoryIndexEntry]) -> str:
-    cards: list[str] = []
-    for entry in sorted(entries.values(), key=lambda item: item.title.lower()):
-        hero_src = resolve_asset_url(entry.hero_src, f"/assets/{entry.id}")
-        if hero_src:
-            hero_html = (
-                f'<img src="{html.escape(hero_src)}" alt="{html.escape(entry.title)}">'
+class StoryLibrary:
+    def __init__(
+        self,
+        paths: Iterable[str | pathlib.Path],
+        rescan_interval: float = DEFAULT_RESCAN_INTERVAL,
+        search_index_path: pathlib.Path | None = None,
+        media_index_path: pathlib.Path | None = None,
+        compiled_dir: pathlib.Path | None = None,
+        state_path: pathlib.Path | None = None,
+    ) -> None:
+        self.paths = list(paths)
+        self.compiled_dir = compiled_dir
+        self.state_path = state_path
+        self.rescan_interval = rescan_interval
+        self.epoch = str(time.time_ns() // 1_000_000)
+        self.cursor = 0
+        self.entries: dict[str, StoryIndexEntry] = {}
+        self.latest_changes: dict[str, StoryChange] = {}
+        if state_path is not None:
+            self.load_state()
+        self.catalog = StoryCatalog()
+        self.search = StorySearchIndex(search_index_path)
+        self.media = MediaCatalog(media_index_path)
+        self.related = RelatedStoryIndex()
+        self.refreshed_at = 0.0
+        self.refresh_lock = threading.Lock()
+        self.refresh()
+
+    def load_state(self) -> None:
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != LIBRARY_STATE_VERSION:
+            return
+        try:
+            changes = sorted(
+                (
+                    StoryChange(
+                        cursor=int(item["cursor"]),
+                        story_id=str(item["id"]),
+                        action=str(item["action"]),
+                        content_hash=item.get("hash"),
+                    )
+                    for item in data.get("changes") or []
+                ),
+                key=lambda change: change.cursor,
             )
-        else:
-            hero_html = '<div class="story-card-placeholder"></div>'
-        subtitle_html = (
-            f'<div class="story-card-subtitle">{html.escape(str(entry.subtitle))}</div>'
-            if entry.subtitle
-            else ""
+            epoch = str(data["epoch"])
+            cursor = int(data["cursor"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self.epoch = epoch
+        self.cursor = max([cursor, *(change.cursor for change in changes)])
+        self.latest_changes = {change.story_id: change for change in changes}
+
+    def save_state(self) -> None:
+        if self.state_path is None:
+            return
+        payload = {
+            "version": LIBRARY_STATE_VERSION,
+            "epoch": self.epoch,
+            "cursor": self.cursor,
+            "changes": [
+                drop_empty(
+                    {
+                        "cursor": change.cursor,
+                        "id": change.story_id,
+                        "action": change.action,
+                        "hash": change.content_hash,
+                    }
+                )
+                for change in self.latest_changes.values()
+            ],
+        }
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.state_path.with_name(
+            f".{self.state_path.name}.{os.getpid()}.tmp"
         )
-        meta_parts = []
-        if entry.authors:
-            meta_parts.append(
-                ", ".join(html.escape(author) for author in entry.authors)
+        temp_path.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(temp_path, self.state_path)
+
+    def refresh(self) -> list[StoryChange]:
+        with self.refresh_lock:
+            return self.apply_refresh()
+
+    def apply_refresh(self) -> list[StoryChange]:
+        previous = self.entries
+        entries = build_story_index(self.paths, previous)
+        pending: list[tuple[str, str, str | None]] = []
+        for story_id, entry in entries.items():
+            old = previous.get(story_id)
+            if old is None or old.content_hash != entry.content_hash:
+                action = "added" if old is None else "updated"
+                pending.append((story_id, action, entry.content_hash))
+        logged = {
+            story_id
+            for story_id, change in self.latest_changes.items()
+            if change.content_hash is not None
+        }
+        for story_id in sorted((previous.keys() | logged) - entries.keys()):
+            pending.append((story_id, "removed", None))
+        latest = dict(self.latest_changes)
+        cursor = self.cursor
+        changes: list[StoryChange] = []
+        for story_id, action, content_hash in pending:
+            last = latest.get(story_id)
+            if last is not None and last.content_hash == content_hash:
+                changes.append(
+                    StoryChange(
+                        cursor=last.cursor,
+                        story_id=story_id,
+                        action=action,
+                        content_hash=content_hash,
+                    )
+                )
+                continue
+            if action == "added" and last is not None and last.content_hash:
+                action = "updated"
+            cursor += 1
+            change = StoryChange(
+                cursor=cursor,
+                story_id=story_id,
+                action=action,
+                content_hash=content_hash,
             )
-        if entry.tags:
-            meta_parts.append(", ".join(html.escape(tag) for tag in entry.tags[:3]))
-        meta_html = (
-            f'<div class="story-card-meta">{" · ".join(meta_parts)}</div>'
-            if meta_parts
-            else ""
-        )
-        cards.append(
-            '<a class="story-card" href="/stories/{id}">'
-            "{hero}"
-            '<div class="story-card-body">'
-            '<div class="story-card-title">{title}</div>'
-            "{subtitle}"
-            "{meta}"
-            "</div>"
-            "</a>".format(
-                id=html.escape(entry.id),
-                hero=hero_html,
-                title=html.escape(entry.title),
-                subtitle=subtitle_html,
-                meta=meta_html,
+            latest.pop(story_id, None)
+            latest[story_id] = change
+            changes.append(change)
+        self.catalog.update(entries, changes)
+        stale = self.search.stale_ids(entries, changes)
+        stale |= self.media.stale_ids(entries, changes)
+        stories = load_index_stories(entries, stale, self.compiled_dir)
+        self.search.update(entries, stories)
+        self.media.update(entries, stories)
+        self.related.update(entries, self.media.documents, changes)
+        self.entries = entries
+        self.latest_changes = latest
+        saved = self.state_path is None or self.state_path.exists()
+        if cursor != self.cursor or not saved:
+            self.cursor = cursor
+            self.save_state()
+        self.refreshed_at = time.monotonic()
+        return changes
+
+    def snapshot(self) -> StoryLibrary:
+        with self.refresh_lock:
+            clone = copy.copy(self)
+            clone.entries = dict(self.entries)
+            clone.latest_changes = dict(self.latest_changes)
+            clone.catalog = snapshot_index(self.catalog)
+            clone.search = snapshot_index(self.search)
+            clone.media = snapshot_index(self.media)
+            clone.related = snapshot_index(self.related)
+            clone.refresh_lock = threading.Lock()
+        return clone
+
+    def maybe_refresh(self) -> None:
+        if self.rescan_interval <= 0:
+            return
+        if time.monotonic() - self.refreshed_at < self.rescan_interval:
+            return
+        if not self.refresh_lock.acquire(blocking=False):
+            return
+        threading.Thread(target=self.background_refresh, daemon=True).start()
+
+    def background_refresh(self) -> None:
+        try:
+            self.apply_refresh()
+        except (OSError, StoryParseError) as exc:
+            self.refreshed_at = time.monotonic()
+            print(f"Error: story rescan failed: {exc}", file=sys.stderr)
+        finally:
+            self.refresh_lock.release()
+
+    def format_cursor(self, cursor: int) -> str:
+        return f"{self.epoch}.{cursor}"
+
+    def changes_since(self, cursor: str | None) -> dict[str, Any]:
+        epoch, _, raw_position = (cursor or "").partition(".")
+        reset = epoch != self.epoch or not raw_position.isdigit()
+        position = 0 if reset else int(raw_position)
+        current = self.cursor
+        latest = self.latest_changes
+        changes: list[StoryChange] = []
+        for change in reversed(latest.values()):
+            if change.cursor <= position:
+                break
+            if reset and change.action == "removed":
+                continue
+            changes.append(change)
+        changes.reverse()
+        return {
+            "cursor": self.format_cursor(current),
+            "reset": reset,
+            "changes": [
+                drop_empty(
+                    {
+                        "id": change.story_id,
+                        "action": change.action,
+                        "hash": change.content_hash,
+                    }
+                )
+                for change in changes
+                if change.cursor <= current
+            ],
+        }
+
+
+def snapshot_index(index: Any) -> Any:
+    with index.lock:
+        clone = copy.copy(index)
+        for name, value in vars(index).items():
+            if isinstance(value, (dict, list, IndexJournal)):
+                setattr(clone, name, copy.copy(value))
+        index.owned = set()
+        clone.owned = set()
+    clone.lock = threading.Lock()
+    return clone
+
+
+def owned_member(
+    index: Any, table: dict[Any, Any], key: Any, factory: Callable[[], Any]
+) -> Any:
+    member = table.get(key)
+    if member is None:
+        member = table[key] = factory()
+    elif id(member) in index.owned:
+        return member
+    else:
+        member = table[key] = copy.copy(member)
+    index.owned.add(id(member))
+    return member
+
+
+def load_index_stories(
+    entries: dict[str, StoryIndexEntry],
+    story_ids: Iterable[str],
+    compiled_dir: pathlib.Path | None = None,
+) -> dict[str, Story | None]:
+    stories: dict[str, Story | None] = {}
+    for story_id in sorted(story_ids):
+        entry = entries.get(story_id)
+        if entry is None:
+            stories[story_id] = None
+            continue
+        try:
+            stories[story_id] = build_story(entry.path, compiled_dir)
+        except (OSError, UnicodeDecodeError, StoryParseError):
+            stories[story_id] = None
+    return stories
+
+
+def stale_story_ids(
+    documents: dict[str, Any],
+    synced: bool,
+    entries: dict[str, StoryIndexEntry],
+    changes: Iterable[StoryChange],
+) -> set[str]:
+    story_ids = {change.story_id for change in changes}
+    if not synced:
+        story_ids |= documents.keys() | entries.keys()
+    stale: set[str] = set()
+    for story_id in story_ids:
+        entry = entries.get(story_id)
+        current = documents.get(story_id)
+        if entry is None:
+            if current is not None:
+                stale.add(story_id)
+        elif current is None or current.content_hash != entry.content_hash:
+            stale.add(story_id)
+    return stale
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def normalize_facet(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+class StoryCatalog:
+    def __init__(self) -> None:
+        self.entries: dict[str, StoryIndexEntry] = {}
+        self.order: list[tuple[str, str]] = []
+        self.facets: dict[str, dict[str, set[str]]] = {"tags": {}, "authors": {}}
+        self.labels: dict[str, dict[str, str]] = {"tags": {}, "authors": {}}
+        self.title_tokens: dict[str, set[str]] = {}
+        self.global_facets: dict[str, list[tuple[str, int]]] | None = None
+        self.owned: set[int] = set()
+        self.lock = threading.Lock()
+
+    def update(
+        self, entries: dict[str, StoryIndexEntry], changes: Iterable[StoryChange]
+    ) -> None:
+        with self.lock:
+            for change in changes:
+                old = self.entries.pop(change.story_id, None)
+                if old is not None:
+                    self.unindex(old)
+                entry = entries.get(change.story_id)
+                if change.action != "removed" and entry is not None:
+                    self.entries[entry.id] = entry
+                    self.index(entry)
+            self.global_facets = None
+
+    def entry_facets(self, entry: StoryIndexEntry) -> dict[str, list[str]]:
+        return {
+            "tags": [str(tag) for tag in entry.tags],
+            "authors": [str(author) for author in entry.authors],
+        }
+
+    def index(self, entry: StoryIndexEntry) -> None:
+        bisect.insort(self.order, (entry.title.lower(), entry.id))
+        for facet, values in self.entry_facets(entry).items():
+            facet_index = owned_member(self, self.facets, facet, dict)
+            labels = owned_member(self, self.labels, facet, dict)
+            for value in values:
+                key = normalize_facet(value)
+                owned_member(self, facet_index, key, set).add(entry.id)
+                labels.setdefault(key, value)
+        for token in set(tokenize(entry.title)):
+            owned_member(self, self.title_tokens, token, set).add(entry.id)
+
+    def unindex(self, entry: StoryIndexEntry) -> None:
+        position = bisect.bisect_left(self.order, (entry.title.lower(), entry.id))
+        if position < len(self.order) and self.order[position][1] == entry.id:
+            del self.order[position]
+        for facet, values in self.entry_facets(entry).items():
+            facet_index = owned_member(self, self.facets, facet, dict)
+            labels = owned_member(self, self.labels, facet, dict)
+            for value in values:
+                key = normalize_facet(value)
+                if key not in facet_index:
+                    continue
+                members = owned_member(self, facet_index, key, set)
+                members.discard(entry.id)
+                if not members:
+                    del facet_index[key]
+                    labels.pop(key, None)
+        for token in set(tokenize(entry.title)):
+            if token in self.title_tokens:
+                members = owned_member(self, self.title_tokens, token, set)
+                members.discard(entry.id)
+                if not members:
+                    del self.title_tokens[token]
+
+    def count_facets(
+        self, ids: Iterable[str] | None
+    ) -> dict[str, list[tuple[str, int]]]:
+        result: dict[str, list[tuple[str, int]]] = {}
+        for facet, index in self.facets.items():
+            if ids is None:
+                counts = {key: len(members) for key, members in index.items()}
+            else:
+                counts = {}
+                for story_id in ids:
+                    for value in self.entry_facets(self.entries[story_id])[facet]:
+                        key = normalize_facet(value)
+                        counts[key] = counts.get(key, 0) + 1
+            top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+            result[facet] = [
+                (self.labels[facet].get(key, key), count)
+                for key, count in top[:CATALOG_FACET_LIMIT]
+            ]
+        return result
+
+    def query(
+        self,
+        tag: str | None = None,
+        author: str | None = None,
+        q: str | None = None,
+        page: int = 1,
+        per_page: int = CATALOG_PER_PAGE,
+    ) -> CatalogPage:
+        per_page = max(1, min(per_page, CATALOG_MAX_PER_PAGE))
+        page = max(1, page)
+        start = (page - 1) * per_page
+        with self.lock:
+            filters: list[set[str]] = []
+            if tag:
+                filters.append(self.facets["tags"].get(normalize_facet(tag), set()))
+            if author:
+                filters.append(
+                    self.facets["authors"].get(normalize_facet(author), set())
+                )
+            for token in tokenize(q or ""):
+                filters.append(self.title_tokens.get(token, set()))
+            if not filters:
+                if self.global_facets is None:
+                    self.global_facets = self.count_facets(None)
+                return CatalogPage(
+                    ids=[story_id for _, story_id in self.order[start : start + per_page]],
+                    total=len(self.order),
+                    page=page,
+                    per_page=per_page,
+                    facets=self.global_facets,
+                )
+            filters.sort(key=len)
+            matches = set(filters[0]).intersection(*filters[1:])
+            ordered = sorted(
+                matches,
+                key=lambda story_id: (self.entries[story_id].title.lower(), story_id),
+            )
+            return CatalogPage(
+                ids=ordered[start : start + per_page],
+                total=len(ordered),
+                page=page,
+                per_page=per_page,
+                facets=self.count_facets(matches),
+            )
+
+
+def catalog_page_payload(
+    page: CatalogPage, entries: dict[str, StoryIndexEntry]
+) -> dict[str, Any]:
+    stories = []
+    for story_id in page.ids:
+        entry = entries.get(story_id)
+        if entry is None:
+            continue
+        stories.append(
+            drop_empty(
+                {
+                    "id": entry.id,
+                    "title": entry.title,
+                    "subtitle": entry.subtitle,
+                    "authors": entry.authors,
+                    "tags": entry.tags,
+                    "hero_src": resolve_asset_url(entry.hero_src, f"/assets/{entry.id}"),
+                    "hash": entry.content_hash,
+                }
             )
         )
+    return {
+        "page": page.page,
+        "per_page": page.per_page,
+        "total": page.total,
+        "pages": max(1, -(-page.total // page.per_page)),
+        "stories": stories,
+        "facets": {
+            facet: [{"value": value, "count": count} for value, count in values]
+            for facet, values in page.facets.items()
+        },
+    }
+
+
+def parse_catalog_query(query: str) -> dict[str, Any]:
+    params = urllib.parse.parse_qs(query)
 
+    def first(name: str) -> str | None:
+        values = params.get(name)
+        return values[0] if values else None
+
+    def number(name: str, default: int) -> int:
+        try:
+            return int(first(name) or default)
+        except ValueError:
+            return default
+
+    return {
+        "tag": first("tag"),
+        "author": first("author"),
+        "q": first("q"),
+        "page": number("page", 1),
+        "per_page": number("per_page", CATALOG_PER_PAGE),
+    }
+
+
+def render_pagination_html(page: CatalogPage, filters: dict[str, Any]) -> str:
+    pages = max(1, -(-page.total // page.per_page))
+    if pages <= 1:
+        return ""
+
+    def link(target: int, label: str) -> str:
+        params = {
+            key: value
+            for key, value in filters.items()
+            if value and key in ("tag", "author", "q")
+        }
+        params["page"] = target
+        if page.per_page != CATALOG_PER_PAGE:
+            params["per_page"] = page.per_page
+        href = "/?" + urllib.parse.urlencode(params)
+        return f'<a href="{html.escape(href)}">{label}</a>'
+
+    previous_html = (
+        link(page.page - 1, "&larr; Previous") if page.page > 1 else "<span></span>"
+    )
+    next_html = (
+        link(page.page + 1, "Next &rarr;") if page.page < pages else "<span></span>"
+    )
     return (
-        "<!doctype html>"
-        '<html lang="en">'
-        "<head>"
-        '<meta charset="utf-8">'
-        '<meta name="viewport" content="width=device-width,initial-scale=1">'
-        "<title>Apple Music Stories</title>"
-        "<style>"
-        f"{INDEX_CSS}"
-        "</style>"
-        "</head>"
-        "<body>"
-        '<header class="index-hero">'
-        '<div class="index-title">Apple Music Stories</div>'
-        '<div class="index-subtitle">'
-        "Browse available stories and launch the renderer with MusicKit playback."
-        "</div>"
-        "</header>"
-        '<section class="story-grid">'
-        f"{''.join(cards)}"
-        "</section>"
-        "</body>"
-        "</html>"
+        '<nav class="index-pagination">'
+        f"{previous_html}"
+        f"<span>Page {page.page} of {pages}</span>"
+        f"{next_html}"
+        "</nav>"
     )
 
 
-def render_story_html(
-    story: Story, developer_token: str | None = None, asset_prefix: str | None = None
-) -> str:
-    title = html.escape(str(story.meta.get("title", "Untitled")))
-    subtitle = story.meta.get("subtitle")
-    deck = story.meta.get("deck")
-    authors = ", ".join(story.meta.get("authors", []))
-    publish_date = html.escape(str(story.meta.get("publish_date", "")))
-    accent_color = story.meta.get("accentColor")
-    hero_gradient = build_gradient(story.meta.get("heroGradient"))
-    type_ramp = str(story.meta.get("typeRamp", "")).lower()
-    hero = story.meta.get("hero_image") or {}
-    hero_src = resolve_asset_url(hero.get("src"), asset_prefix)
-    hero_alt = html.escape(str(hero.get("alt", "")))
-    hero_credit = hero.get("credit")
-    lead_art = story.meta.get("leadArt") or {}
-    lead_art_src = resolve_asset_url(lead_art.get("src"), asset_prefix)
-    lead_art_alt = html.escape(str(lead_art.get("alt", "")))
-    lead_art_caption = lead_art.get("caption")
-    lead_art_credit = lead_art.get("credit")
-    developer_token = developer_token or ""
-    has_token = bool(developer_token)
+def section_search_text(section: StorySection, media: dict[str, StoryMedia]) -> str:
+    def replace_tag(match: re.Match[str]) -> str:
+        attrs = parse_attrs(match.group(1) or "")
+        item = media.get(attrs.get("ref", ""))
+        if item is not None:
+            return f" {item.title}, {item.artist} "
+        values = [attrs[key] for key in SEARCH_TEXT_ATTRS if attrs.get(key)]
+        return f" {' '.join(values)} "
+
+    text = MDX_TAG_RE.sub(replace_tag, section.body)
+    text = MARKDOWN_LINK_RE.sub(r"\1", text)
+    text = MARKDOWN_SYNTAX_RE.sub(" ", text)
+    return " ".join(text.split())
 
-    sections_html: list[str] = []
+
+def build_search_document(entry: StoryIndexEntry, story: Story) -> SearchDocument:
+    sections: list[SearchSection] = []
     for section in story.sections:
-        content_html = render_section_body(section.body, story.media, asset_prefix)
-        classes = ["section"]
-        if section.layout:
-            classes.append(section.layout)
-        layout_class = " ".join(classes)
-        sections_html.append(
-            '<section class="{layout}">'
-            '<h2 class="section-header">{title}</h2>'
-            '<div class="section-body">{body}</div>'
-            "</section>".format(
-                layout=html.escape(layout_class),
-                title=html.escape(section.title or ""),
-                body=content_html,
+        text = section_search_text(section, story.media)
+        tokens = tokenize(section.title) + tokenize(text)
+        terms: dict[str, int] = {}
+        for token in tokens:
+            terms[token] = terms.get(token, 0) + 1
+        sections.append(
+            SearchSection(
+                id=section.id,
+                title=section.title,
+                text=text,
+                terms=terms,
+                length=len(tokens),
             )
         )
+    return SearchDocument(
+        story_id=entry.id,
+        content_hash=entry.content_hash,
+        title=entry.title,
+        sections=tuple(sections),
+    )
 
-    hero_block = ""
-    if hero_src:
-        hero_block = (
-            '<div class="hero-image">'
-            f'<img src="{html.escape(hero_src)}" alt="{hero_alt}">'
-            "</div>"
-        )
-        if hero_credit:
-            hero_block += (
-                f'<div class="hero-credit">{html.escape(str(hero_credit))}</div>'
+
+def build_search_snippet(text: str, terms: list[str]) -> str:
+    pattern = re.compile(
+        r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")\b", re.IGNORECASE
+    )
+    match = pattern.search(text)
+    start = 0
+    if match is not None and match.start() > SEARCH_SNIPPET_CHARS // 3:
+        start = match.start() - SEARCH_SNIPPET_CHARS // 3
+        space = text.find(" ", start, match.start())
+        if space != -1:
+            start = space + 1
+    end = min(len(text), start + SEARCH_SNIPPET_CHARS)
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        if space > start:
+            end = space
+    excerpt = text[start:end]
+    parts = ["&hellip;" if start else ""]
+    position = 0
+    for hit in pattern.finditer(excerpt):
+        parts.append(html.escape(excerpt[position : hit.start()]))
+        parts.append(f"<mark>{html.escape(hit.group(0))}</mark>")
+        position = hit.end()
+    parts.append(html.escape(excerpt[position:]))
+    if end < len(text):
+        parts.append("&hellip;")
+    return "".join(parts)
+
+
+class IndexJournal:
+    def __init__(self, path: pathlib.Path | None, version: int) -> None:
+        self.path = path
+        self.version = version
+        self.records = 0
+        self.clean = False
+
+    def load(self) -> dict[str, dict[str, Any]]:
+        items: dict[str, dict[str, Any]] = {}
+        self.records = 0
+        self.clean = False
+        try:
+            handle = self.path.open(encoding="utf-8")
+        except OSError:
+            return items
+        with handle:
+            try:
+                header = json.loads(handle.readline())
+            except ValueError:
+                return items
+            if not isinstance(header, dict) or header.get("version") != self.version:
+                return items
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                    story_id = str(record["id"])
+                except (ValueError, TypeError, KeyError):
+                    return items
+                if record.get("removed"):
+                    items.pop(story_id, None)
+                else:
+                    items[story_id] = record
+                self.records += 1
+        self.clean = True
+        return items
+
+    def save(
+        self,
+        documents: dict[str, Any],
+        story_ids: Iterable[str],
+        encode: Callable[[Any], dict[str, Any]],
+    ) -> None:
+        if self.path is None:
+            return
+        story_ids = sorted(story_ids)
+        limit = 2 * len(documents) + INDEX_JOURNAL_SLACK
+        rewrite = (
+            not self.clean
+            or self.records + len(story_ids) > limit
+            or not self.path.exists()
+        )
+        if rewrite:
+            story_ids = sorted(documents)
+        lines: list[str] = []
+        for story_id in story_ids:
+            document = documents.get(story_id)
+            record = {"removed": True} if document is None else encode(document)
+            lines.append(json.dumps({"id": story_id, **record}) + "\n")
+        if rewrite:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            header = json.dumps({"version": self.version}) + "\n"
+            temp_path.write_text(header + "".join(lines), encoding="utf-8")
+            os.replace(temp_path, self.path)
+            self.records = len(lines)
+            self.clean = True
+            return
+        with self.path.open("a", encoding="utf-8") as handle:
+            handle.write("".join(lines))
+        self.records += len(lines)
+
+
+class StorySearchIndex:
+    def __init__(self, path: pathlib.Path | None = None) -> None:
+        self.path = path
+        self.documents: dict[str, SearchDocument] = {}
+        self.postings: dict[str, dict[tuple[str, int], int]] = {}
+        self.lengths: dict[tuple[str, int], int] = {}
+        self.total_length = 0
+        self.norms: dict[tuple[str, int], float] | None = None
+        self.synced = False
+        self.journal = IndexJournal(path, SEARCH_INDEX_VERSION)
+        self.owned: set[int] = set()
+        self.lock = threading.Lock()
+        if path is not None:
+            self.load()
+
+    def load(self) -> None:
+        for story_id, item in self.journal.load().items():
+            sections = tuple(
+                SearchSection(
+                    id=str(section.get("id", "")),
+                    title=str(section.get("title", "")),
+                    text=str(section.get("text", "")),
+                    terms=dict(section.get("terms") or {}),
+                    length=int(section.get("length", 0)),
+                )
+                for section in item.get("sections", [])
+            )
+            self.add(
+                SearchDocument(
+                    story_id=story_id,
+                    content_hash=str(item.get("hash", "")),
+                    title=str(item.get("title", story_id)),
+                    sections=sections,
+                )
+            )
+
+    def encode(self, document: SearchDocument) -> dict[str, Any]:
+        return {
+            "hash": document.content_hash,
+            "title": document.title,
+            "sections": [
+                {
+                    "id": section.id,
+                    "title": section.title,
+                    "text": section.text,
+                    "terms": section.terms,
+                    "length": section.length,
+                }
+                for section in document.sections
+            ],
+        }
+
+    def save(self, story_ids: Iterable[str]) -> None:
+        self.journal.save(self.documents, story_ids, self.encode)
+
+    def add(self, document: SearchDocument) -> None:
+        self.norms = None
+        self.documents[document.story_id] = document
+        for position, section in enumerate(document.sections):
+            key = (document.story_id, position)
+            self.lengths[key] = section.length
+            self.total_length += section.length
+            for term, frequency in section.terms.items():
+                owned_member(self, self.postings, term, dict)[key] = frequency
+
+    def remove(self, story_id: str) -> None:
+        document = self.documents.pop(story_id, None)
+        if document is None:
+            return
+        self.norms = None
+        for position, section in enumerate(document.sections):
+            key = (story_id, position)
+            self.total_length -= self.lengths.pop(key, 0)
+            for term in section.terms:
+                if term not in self.postings:
+                    continue
+                postings = owned_member(self, self.postings, term, dict)
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[term]
+
+    def stale_ids(
+        self, entries: dict[str, StoryIndexEntry], changes: Iterable[StoryChange]
+    ) -> set[str]:
+        return stale_story_ids(self.documents, self.synced, entries, changes)
+
+    def update(
+        self, entries: dict[str, StoryIndexEntry], stories: dict[str, Story | None]
+    ) -> None:
+        updates: dict[str, SearchDocument | None] = {}
+        for story_id, story in stories.items():
+            entry = entries.get(story_id)
+            current = self.documents.get(story_id)
+            if entry is None or story is None:
+                if current is not None:
+                    updates[story_id] = None
+                continue
+            if current is not None and current.content_hash == entry.content_hash:
+                continue
+            updates[story_id] = build_search_document(entry, story)
+        with self.lock:
+            for story_id, document in updates.items():
+                self.remove(story_id)
+                if document is not None:
+                    self.add(document)
+        if updates:
+            self.save(updates)
+        self.synced = True
+
+    def search(self, query: str, limit: int = SEARCH_RESULT_LIMIT) -> list[SearchHit]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        limit = max(1, min(limit, SEARCH_MAX_RESULT_LIMIT))
+        with self.lock:
+            count = len(self.lengths)
+            if not terms or not count:
+                return []
+            if self.norms is None:
+                average = max(self.total_length / count, 1.0)
+                self.norms = {
+                    key: BM25_K1 * (1 - BM25_B + BM25_B * length / average)
+                    for key, length in self.lengths.items()
+                }
+            norms = self.norms
+            scores: dict[tuple[str, int], float] = {}
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                frequency_count = len(postings)
+                idf = math.log(
+                    1 + (count - frequency_count + 0.5) / (frequency_count + 0.5)
+                )
+                weight = idf * (BM25_K1 + 1)
+                for key, frequency in postings.items():
+                    scores[key] = scores.get(key, 0.0) + weight * frequency / (
+                        frequency + norms[key]
+                    )
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            hits: list[SearchHit] = []
+            for (story_id, position), score in top:
+                document = self.documents[story_id]
+                section = document.sections[position]
+                hits.append(
+                    SearchHit(
+                        story_id=story_id,
+                        story_title=document.title,
+                        section_id=section.id,
+                        section_title=section.title,
+                        score=score,
+                        snippet=build_search_snippet(section.text, terms),
+                    )
+                )
+        return hits
+
+
+def media_identity(media: StoryMedia) -> tuple[str, str]:
+    return media.type.strip().lower(), media.apple_music_id.strip()
+
+
+def build_media_document(entry: StoryIndexEntry, story: Story) -> MediaDocument:
+    keys = list(story.media)
+    slots = {key: position for position, key in enumerate(keys)}
+    references: list[tuple[int, int, int]] = []
+    placed: set[int] = set()
+    for section_position, section in enumerate(story.sections):
+        lead = slots.get(section.lead_media or "")
+        if lead is not None:
+            references.append((lead, section_position, -1))
+            placed.add(lead)
+        for position, match in enumerate(MEDIA_REF_RE.finditer(section.body)):
+            slot = slots.get(parse_attrs(match.group(1)).get("ref", ""))
+            if slot is not None:
+                references.append((slot, section_position, position))
+                placed.add(slot)
+    for slot in range(len(keys)):
+        if slot not in placed:
+            references.append((slot, -1, -1))
+    return MediaDocument(
+        story_id=entry.id,
+        content_hash=entry.content_hash,
+        sections=tuple((section.id, section.title) for section in story.sections),
+        media=tuple(story.media[key] for key in keys),
+        references=tuple(references),
+    )
+
+
+class MediaCatalog:
+    def __init__(self, path: pathlib.Path | None = None) -> None:
+        self.path = path
+        self.documents: dict[str, MediaDocument] = {}
+        self.records: dict[tuple[str, str], StoryMedia] = {}
+        self.references: dict[tuple[str, str], array.array] = {}
+        self.types: dict[str, set[str]] = {}
+        self.slots: dict[str, int] = {}
+        self.slot_ids: list[str | None] = []
+        self.free_slots: list[int] = []
+        self.synced = False
+        self.journal = IndexJournal(path, MEDIA_INDEX_VERSION)
+        self.owned: set[int] = set()
+        self.lock = threading.Lock()
+        if path is not None:
+            self.load()
+
+    def load(self) -> None:
+        for story_id, item in self.journal.load().items():
+            media = tuple(
+                build_story_media(record, str(record.get("key", "")))
+                for record in item.get("media", [])
+            )
+            self.add(
+                MediaDocument(
+                    story_id=story_id,
+                    content_hash=str(item.get("hash", "")),
+                    sections=tuple(
+                        (str(section_id), str(title))
+                        for section_id, title in item.get("sections", [])
+                    ),
+                    media=media,
+                    references=tuple(
+                        (int(slot), int(section), int(position))
+                        for slot, section, position in item.get("references", [])
+                    ),
+                )
+            )
+
+    def encode(self, document: MediaDocument) -> dict[str, Any]:
+        return {
+            "hash": document.content_hash,
+            "sections": [list(section) for section in document.sections],
+            "media": [
+                drop_empty(
+                    {
+                        "key": media.key,
+                        "type": media.type,
+                        "apple_music_id": media.apple_music_id,
+                        "title": media.title,
+                        "artist": media.artist,
+                        "artwork_url": media.artwork_url,
+                        "apple_music_url": media.apple_music_url,
+                        "duration_ms": media.duration_ms,
+                    }
+                )
+                for media in document.media
+            ],
+            "references": [list(item) for item in document.references],
+        }
+
+    def save(self, story_ids: Iterable[str]) -> None:
+        self.journal.save(self.documents, story_ids, self.encode)
+
+    def story_slot(self, story_id: str) -> int:
+        slot = self.slots.get(story_id)
+        if slot is not None:
+            return slot
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slot_ids[slot] = story_id
+        else:
+            slot = len(self.slot_ids)
+            self.slot_ids.append(story_id)
+        self.slots[story_id] = slot
+        return slot
+
+    def add(self, document: MediaDocument) -> None:
+        self.documents[document.story_id] = document
+        story_slot = self.story_slot(document.story_id)
+        for media_slot, section, position in document.references:
+            media = document.media[media_slot]
+            identity = media_identity(media)
+            if not identity[1]:
+                continue
+            self.records[identity] = media
+            owned_member(self, self.types, identity[1], set).add(identity[0])
+            owned_member(
+                self, self.references, identity, functools.partial(array.array, "i")
+            ).extend((story_slot, section, position))
+
+    def remove(self, story_id: str) -> None:
+        document = self.documents.pop(story_id, None)
+        story_slot = self.slots.pop(story_id, None)
+        if document is None or story_slot is None:
+            return
+        for identity in {media_identity(media) for media in document.media}:
+            references = self.references.get(identity)
+            if references is None:
+                continue
+            kept = array.array("i")
+            for offset in range(0, len(references), 3):
+                if references[offset] != story_slot:
+                    kept.extend(references[offset : offset + 3])
+            if kept:
+                self.references[identity] = kept
+                continue
+            del self.references[identity]
+            self.records.pop(identity, None)
+            if identity[1] in self.types:
+                types = owned_member(self, self.types, identity[1], set)
+                types.discard(identity[0])
+                if not types:
+                    del self.types[identity[1]]
+        self.slot_ids[story_slot] = None
+        self.free_slots.append(story_slot)
+
+    def stale_ids(
+        self, entries: dict[str, StoryIndexEntry], changes: Iterable[StoryChange]
+    ) -> set[str]:
+        return stale_story_ids(self.documents, self.synced, entries, changes)
+
+    def update(
+        self, entries: dict[str, StoryIndexEntry], stories: dict[str, Story | None]
+    ) -> None:
+        updates: dict[str, MediaDocument | None] = {}
+        for story_id, story in stories.items():
+            entry = entries.get(story_id)
+            current = self.documents.get(story_id)
+            if entry is None or story is None:
+                if current is not None:
+                    updates[story_id] = None
+                continue
+            if current is not None and current.content_hash == entry.content_hash:
+                continue
+            updates[story_id] = build_media_document(entry, story)
+        with self.lock:
+            for story_id, document in updates.items():
+                self.remove(story_id)
+                if document is not None:
+                    self.add(document)
+        if updates:
+            self.save(updates)
+        self.synced = True
+
+    def appearances(
+        self, apple_music_id: str, media_type: str | None = None
+    ) -> list[dict[str, Any]]:
+        apple_music_id = apple_music_id.strip()
+        with self.lock:
+            types = sorted(self.types.get(apple_music_id, ()))
+            if media_type:
+                types = [item for item in types if item == media_type.strip().lower()]
+            results: list[dict[str, Any]] = []
+            for kind in types:
+                identity = (kind, apple_music_id)
+                references = self.references[identity]
+                stories: dict[str, list[dict[str, Any]]] = {}
+                for offset in range(0, len(references), 3):
+                    story_slot, section, position = references[offset : offset + 3]
+                    story_id = self.slot_ids[story_slot]
+                    document = self.documents[story_id]
+                    placements = stories.setdefault(story_id, [])
+                    if section < 0:
+                        continue
+                    section_id, section_title = document.sections[section]
+                    placements.append(
+                        drop_empty(
+                            {
+                                "section_id": section_id,
+                                "section_title": section_title,
+                                "position": position if position >= 0 else None,
+                                "lead": position < 0 or None,
+                            }
+                        )
+                    )
+                results.append(
+                    {
+                        "media": media_payload(self.records[identity]),
+                        "stories": [
+                            {"id": story_id, "sections": placements}
+                            for story_id, placements in sorted(stories.items())
+                        ],
+                    }
+                )
+        return results
+
+    def summary(self) -> list[dict[str, Any]]:
+        with self.lock:
+            items = []
+            for identity, references in sorted(self.references.items()):
+                story_slots = {
+                    references[offset] for offset in range(0, len(references), 3)
+                }
+                items.append(
+                    {**media_payload(self.records[identity]), "stories": len(story_slots)}
+                )
+        return items
+
+
+def related_story_vector(
+    entry: StoryIndexEntry, document: MediaDocument | None
+) -> dict[str, float]:
+    vector: dict[str, float] = {}
+    for tag in entry.tags:
+        vector[f"tag:{normalize_facet(tag)}"] = RELATED_FEATURE_WEIGHTS["tag"]
+    for media in document.media if document is not None else ():
+        kind, apple_music_id = media_identity(media)
+        if apple_music_id:
+            vector[f"media:{kind}:{apple_music_id}"] = RELATED_FEATURE_WEIGHTS["media"]
+        if media.artist.strip():
+            vector[f"artist:{normalize_facet(media.artist)}"] = RELATED_FEATURE_WEIGHTS[
+                "artist"
+            ]
+    return vector
+
+
+class RelatedStoryIndex:
+    def __init__(self, limit: int = RELATED_STORY_LIMIT) -> None:
+        self.limit = limit
+        self.vectors: dict[str, dict[str, float]] = {}
+        self.norms: dict[str, float] = {}
+        self.postings: dict[str, set[str]] = {}
+        self.table: dict[str, tuple[tuple[str, float], ...]] = {}
+        self.owned: set[int] = set()
+        self.lock = threading.Lock()
+
+    def neighbours(self, story_id: str) -> set[str]:
+        found: set[str] = set()
+        for feature in self.vectors.get(story_id, {}):
+            found |= self.postings.get(feature, set())
+        return found
+
+    def remove(self, story_id: str) -> None:
+        for feature in self.vectors.pop(story_id, {}):
+            if feature in self.postings:
+                members = owned_member(self, self.postings, feature, set)
+                members.discard(story_id)
+                if not members:
+                    del self.postings[feature]
+        self.norms.pop(story_id, None)
+        self.table.pop(story_id, None)
+
+    def add(self, story_id: str, vector: dict[str, float]) -> None:
+        if not vector:
+            return
+        self.vectors[story_id] = vector
+        self.norms[story_id] = math.sqrt(sum(value * value for value in vector.values()))
+        for feature in vector:
+            owned_member(self, self.postings, feature, set).add(story_id)
+
+    def similarity(self, story_id: str, other: str) -> float:
+        vector = self.vectors.get(story_id)
+        other_vector = self.vectors.get(other)
+        if not vector or not other_vector:
+            return 0.0
+        dot = sum(
+            weight * other_vector[feature]
+            for feature, weight in vector.items()
+            if feature in other_vector
+        )
+        return dot / (self.norms[story_id] * self.norms[other])
+
+    def score(self, story_id: str) -> tuple[tuple[str, float], ...]:
+        vector = self.vectors.get(story_id)
+        if not vector:
+            return ()
+        dots: dict[str, float] = {}
+        postings = self.postings
+        for feature, weight in vector.items():
+            contribution = weight * weight
+            for other in postings.get(feature, ()):
+                dots[other] = dots.get(other, 0.0) + contribution
+        dots.pop(story_id, None)
+        norm = self.norms[story_id]
+        norms = self.norms
+        top = heapq.nsmallest(
+            self.limit,
+            ((-dot / (norm * norms[other]), other) for other, dot in dots.items()),
+        )
+        return tuple((other, -similarity) for similarity, other in top)
+
+    def touch(self, story_id: str, other: str, similarity: float) -> bool:
+        current = self.table.get(story_id, ())
+        ranked = [item for item in current if item[0] != other]
+        if len(ranked) < len(current) and similarity < dict(current)[other]:
+            return False
+        if similarity > 0:
+            ranked.append((other, similarity))
+            ranked.sort(key=lambda item: (-item[1], item[0]))
+        self.table[story_id] = tuple(ranked[: self.limit])
+        return True
+
+    def update(
+        self,
+        entries: dict[str, StoryIndexEntry],
+        documents: dict[str, MediaDocument],
+        changes: Iterable[StoryChange],
+    ) -> None:
+        changed = {change.story_id for change in changes}
+        if not changed:
+            return
+        with self.lock:
+            rescore = set(changed)
+            bulk = len(changed) * 2 > len(self.vectors)
+            for story_id in changed:
+                previous = set() if bulk else self.neighbours(story_id)
+                self.remove(story_id)
+                entry = entries.get(story_id)
+                if entry is not None:
+                    vector = related_story_vector(entry, documents.get(story_id))
+                    self.add(story_id, vector)
+                if bulk:
+                    continue
+                for other in (previous | self.neighbours(story_id)) - rescore:
+                    similarity = self.similarity(other, story_id)
+                    if not self.touch(other, story_id, similarity):
+                        rescore.add(other)
+            if bulk:
+                rescore = set(self.vectors) | changed
+            for story_id in rescore:
+                if story_id in self.vectors:
+                    self.table[story_id] = self.score(story_id)
+                else:
+                    self.table.pop(story_id, None)
+
+    def related(self, story_id: str) -> tuple[tuple[str, float], ...]:
+        return self.table.get(story_id, ())
+
+
+def related_entries(
+    library: StoryLibrary, story_id: str, entries: dict[str, StoryIndexEntry]
+) -> list[tuple[StoryIndexEntry, float]]:
+    return [
+        (entries[other], score)
+        for other, score in library.related.related(story_id)
+        if other in entries
+    ]
+
+
+def related_stories_payload(
+    related: list[tuple[StoryIndexEntry, float]],
+) -> list[dict[str, Any]]:
+    return [
+        drop_empty(
+            {
+                "id": entry.id,
+                "title": entry.title,
+                "subtitle": entry.subtitle,
+                "hero_src": resolve_asset_url(entry.hero_src, f"/assets/{entry.id}"),
+                "score": round(score, 4),
+            }
+        )
+        for entry, score in related
+    ]
+
+
+def media_payload(media: StoryMedia) -> dict[str, Any]:
+    return drop_empty(
+        {
+            "type": media.type,
+            "apple_music_id": media.apple_music_id,
+            "title": media.title,
+            "artist": media.artist,
+            "artwork_url": media.artwork_url,
+            "apple_music_url": media.apple_music_url,
+            "duration_ms": media.duration_ms,
+        }
+    )
+
+
+def search_hit_url(hit: SearchHit) -> str:
+    url = f"/stories/{urllib.parse.quote(hit.story_id)}"
+    if hit.section_id:
+        url += f"#{urllib.parse.quote(hit.section_id)}"
+    return url
+
+
+def search_results_payload(query: str, hits: list[SearchHit]) -> dict[str, Any]:
+    return {
+        "query": query,
+        "results": [
+            drop_empty(
+                {
+                    "story_id": hit.story_id,
+                    "story_title": hit.story_title,
+                    "section_id": hit.section_id,
+                    "section_title": hit.section_title,
+                    "url": search_hit_url(hit),
+                    "score": round(hit.score, 4),
+                    "snippet": hit.snippet,
+                }
+            )
+            for hit in hits
+        ],
+    }
+
+
+def parse_search_query(query: str) -> tuple[str, int]:
+    params = urllib.parse.parse_qs(query)
+    text = (params.get("q") or [""])[0].strip()
+    try:
+        limit = int((params.get("limit") or [SEARCH_RESULT_LIMIT])[0])
+    except ValueError:
+        limit = SEARCH_RESULT_LIMIT
+    return text, limit
+
+
+def render_index_html(
+    entries: dict[str, StoryIndexEntry],
+    page: CatalogPage | None = None,
+    filters: dict[str, Any] | None = None,
+) -> str:
+    if page is None:
+        ordered = sorted(entries.values(), key=lambda item: item.title.lower())
+    else:
+        ordered = [entries[story_id] for story_id in page.ids if story_id in entries]
+    cards: list[str] = []
+    for entry in ordered:
+        hero_src = resolve_asset_url(entry.hero_src, f"/assets/{entry.id}")
+        if hero_src:
+            hero_html = (
+                f'<img src="{html.escape(hero_src)}" alt="{html.escape(entry.title)}">'
+            )
+        else:
+            hero_html = '<div class="story-card-placeholder"></div>'
+        subtitle_html = (
+            f'<div class="story-card-subtitle">{html.escape(str(entry.subtitle))}</div>'
+            if entry.subtitle
+            else ""
+        )
+        meta_parts = []
+        if entry.authors:
+            meta_parts.append(
+                ", ".join(html.escape(author) for author in entry.authors)
+            )
+        if entry.tags:
+            meta_parts.append(", ".join(html.escape(tag) for tag in entry.tags[:3]))
+        meta_html = (
+            f'<div class="story-card-meta">{" · ".join(meta_parts)}</div>'
+            if meta_parts
+            else ""
+        )
+        cards.append(
+            '<a class="story-card" href="/stories/{id}">'
+            "{hero}"
+            '<div class="story-card-body">'
+            '<div class="story-card-title">{title}</div>'
+            "{subtitle}"
+            "{meta}"
+            "</div>"
+            "</a>".format(
+                id=html.escape(entry.id),
+                hero=hero_html,
+                title=html.escape(entry.title),
+                subtitle=subtitle_html,
+                meta=meta_html,
+            )
+        )
+
+    return (
+        "<!doctype html>"
+        '<html lang="en">'
+        "<head>"
+        '<meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width,initial-scale=1">'
+        "<title>Apple Music Stories</title>"
+        "<style>"
+        f"{INDEX_CSS}"
+        "</style>"
+        "</head>"
+        "<body>"
+        '<header class="index-hero">'
+        '<div class="index-title">Apple Music Stories</div>'
+        '<div class="index-subtitle">'
+        "Browse available stories and launch the renderer with MusicKit playback."
+        "</div>"
+        "</header>"
+        '<section class="story-grid">'
+        f"{''.join(cards)}"
+        "</section>"
+        f"{render_pagination_html(page, filters or {}) if page else ''}"
+        "</body>"
+        "</html>"
+    )
+
+
+def render_search_html(query: str, hits: list[SearchHit]) -> str:
+    results: list[str] = []
+    for hit in hits:
+        title = hit.story_title
+        if hit.section_title:
+            title += f" · {hit.section_title}"
+        results.append(
+            '<a class="search-result" href="{url}">'
+            '<div class="search-result-title">{title}</div>'
+            '<div class="search-result-snippet">{snippet}</div>'
+            "</a>".format(
+                url=html.escape(search_hit_url(hit)),
+                title=html.escape(title),
+                snippet=hit.snippet,
+            )
+        )
+    if query and not hits:
+        summary = f"No sections match &ldquo;{html.escape(query)}&rdquo;."
+    elif query:
+        summary = f"Top {len(hits)} sections for &ldquo;{html.escape(query)}&rdquo;."
+    else:
+        summary = "Search every section of every story."
+    return (
+        "<!doctype html>"
+        '<html lang="en">'
+        "<head>"
+        '<meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width,initial-scale=1">'
+        "<title>Search · Apple Music Stories</title>"
+        "<style>"
+        f"{INDEX_CSS}"
+        "</style>"
+        "</head>"
+        "<body>"
+        '<header class="index-hero">'
+        '<div class="index-title">Search</div>'
+        f'<div class="index-subtitle">{summary}</div>'
+        '<form class="search-form" action="/search" method="get">'
+        f'<input type="search" name="q" value="{html.escape(query)}" '
+        'placeholder="Artists, places, ideas" autofocus>'
+        '<button type="submit">Search</button>'
+        "</form>"
+        "</header>"
+        '<section class="search-results">'
+        f"{''.join(results)}"
+        "</section>"
+        "</body>"
+        "</html>"
+    )
+
+
+def render_related_html(related: list[tuple[StoryIndexEntry, float]]) -> str:
+    if not related:
+        return ""
+    cards: list[str] = []
+    for entry, _ in related:
+        hero_src = resolve_asset_url(entry.hero_src, f"/assets/{entry.id}")
+        hero_html = (
+            f'<img src="{html.escape(hero_src)}" alt="" loading="lazy">'
+            if hero_src
+            else '<div class="related-card-placeholder"></div>'
+        )
+        subtitle_html = (
+            f'<div class="related-card-subtitle">{html.escape(str(entry.subtitle))}</div>'
+            if entry.subtitle
+            else ""
+        )
+        cards.append(
+            f'<a class="related-card" href="/stories/{html.escape(entry.id)}">'
+            f"{hero_html}"
+            '<div class="related-card-body">'
+            f'<div class="related-card-title">{html.escape(entry.title)}</div>'
+            f"{subtitle_html}"
+            "</div>"
+            "</a>"
+        )
+    return (
+        '<aside class="section related-stories">'
+        '<h2 class="section-header">Keep reading</h2>'
+        f'<div class="related-grid">{"".join(cards)}</div>'
+        "</aside>"
+    )
+
+
+def render_section_html(
+    section: StorySection,
+    media_lookup: dict[str, StoryMedia],
+    asset_prefix: str | None = None,
+    image_variants: dict[str, tuple[ImageVariant, ...]] | None = None,
+    asset_manifest: dict[str, AssetInfo] | None = None,
+    render_cache: RenderCache | None = None,
+    context_key: str = "",
+) -> str:
+    if render_cache is not None and context_key:
+        return render_cache.fetch(
+            "section",
+            (
+                context_key,
+                section.id,
+                section.title,
+                section.layout or "",
+                section.body,
+            ),
+            lambda: render_section_html(
+                section,
+                media_lookup,
+                asset_prefix,
+                image_variants,
+                asset_manifest,
+                render_cache,
+            ),
+        )
+    content_html = render_section_body(
+        section.body,
+        media_lookup,
+        asset_prefix,
+        image_variants,
+        asset_manifest,
+        section.blocks,
+        render_cache,
+    )
+    classes = ["section"]
+    if section.layout:
+        classes.append(section.layout)
+    layout_class = " ".join(classes)
+    anchor = f' id="{html.escape(section.id)}"' if section.id else ""
+    return (
+        '<section class="{layout}"{anchor}>'
+        '<h2 class="section-header">{title}</h2>'
+        '<div class="section-body">{body}</div>'
+        "</section>".format(
+            layout=html.escape(layout_class),
+            anchor=anchor,
+            title=html.escape(section.title or ""),
+            body=content_html,
+        )
+    )
+
+
+def render_story_html(
+    story: Story,
+    developer_token: str | None = None,
+    asset_prefix: str | None = None,
+    image_variants: dict[str, tuple[ImageVariant, ...]] | None = None,
+    asset_manifest: dict[str, AssetInfo] | None = None,
+    related: list[tuple[StoryIndexEntry, float]] | None = None,
+    render_cache: RenderCache | None = None,
+) -> str:
+    with StageTimer("html"):
+        return "".join(
+            iter_story_html(
+                story,
+                developer_token,
+                asset_prefix,
+                image_variants,
+                asset_manifest,
+                related,
+                render_cache=render_cache,
+            )
+        )
+
+
+def iter_story_html(
+    story: Story,
+    developer_token: str | None = None,
+    asset_prefix: str | None = None,
+    image_variants: dict[str, tuple[ImageVariant, ...]] | None = None,
+    asset_manifest: dict[str, AssetInfo] | None = None,
+    related: list[tuple[StoryIndexEntry, float]] | None = None,
+    sections: Iterable[StorySection] | None = None,
+    render_cache: RenderCache | None = None,
+) -> Iterator[str]:
+    image_variants = image_variants or {}
+    title = html.escape(str(story.meta.get("title", "Untitled")))
+    subtitle = story.meta.get("subtitle")
+    deck = story.meta.get("deck")
+    authors = ", ".join(story.meta.get("authors", []))
+    publish_date = html.escape(str(story.meta.get("publish_date", "")))
+    accent_color = story.meta.get("accentColor")
+    hero_gradient = build_gradient(story.meta.get("heroGradient"))
+    type_ramp = str(story.meta.get("typeRamp", "")).lower()
+    hero = story.meta.get("hero_image") or {}
+    hero_src = resolve_asset_url(hero.get("src"), asset_prefix)
+    hero_alt = str(hero.get("alt", ""))
+    hero_credit = hero.get("credit")
+    lead_art = story.meta.get("leadArt") or {}
+    lead_art_src = resolve_asset_url(lead_art.get("src"), asset_prefix)
+    lead_art_alt = str(lead_art.get("alt", ""))
+    lead_art_caption = lead_art.get("caption")
+    lead_art_credit = lead_art.get("credit")
+    developer_token = developer_token or ""
+    has_token = bool(developer_token)
+
+    hero_block = ""
+    if hero_src:
+        hero_image_html = render_image(
+            hero_src,
+            hero_alt,
+            image_variants.get(str(hero.get("src") or "")),
+            asset_prefix,
+            info=lookup_asset_info(asset_manifest, hero.get("src")),
+        )
+        hero_block = f'<div class="hero-image">{hero_image_html}</div>'
+        if hero_credit:
+            hero_block += (
+                f'<div class="hero-credit">{html.escape(str(hero_credit))}</div>'
             )
 
     lead_art_block = ""
@@ -1344,9 +4113,16 @@ def render_story_html(
             if caption_parts
             else ""
         )
+        lead_art_image_html = render_image(
+            lead_art_src,
+            lead_art_alt,
+            image_variants.get(str(lead_art.get("src") or "")),
+            asset_prefix,
+            info=lookup_asset_info(asset_manifest, lead_art.get("src")),
+        )
         lead_art_block = (
             '<figure class="lead-art">'
-            f'<img src="{html.escape(lead_art_src)}" alt="{lead_art_alt}">'
+            f"{lead_art_image_html}"
             f"{caption_html}"
             "</figure>"
         )
@@ -1659,7 +4435,7 @@ def render_story_html(
     ]
     musickit_script = "\n".join(script_lines)
 
-    return (
+    yield (
         "<!doctype html>"
         '<html lang="en">'
         "<head>"
@@ -1684,7 +4460,24 @@ def render_story_html(
         f"{auth_banner}"
         "</header>"
         '<main class="container">'
-        f"{''.join(sections_html)}"
+    )
+    context_key = ""
+    if render_cache is not None:
+        context_key = render_context_key(
+            story.media, asset_prefix, image_variants, asset_manifest
+        )
+    for section in story.sections if sections is None else sections:
+        yield render_section_html(
+            section,
+            story.media,
+            asset_prefix,
+            image_variants,
+            asset_manifest,
+            render_cache,
+            context_key,
+        )
+    yield (
+        f"{render_related_html(related or [])}"
         "</main>"
         f"{media_json_tag}"
         f"{playback_bar}"
@@ -1694,34 +4487,805 @@ def render_story_html(
     )
 
 
-def make_story_handler(
-    entries: dict[str, StoryIndexEntry], developer_token: str
-) -> type[http.server.BaseHTTPRequestHandler]:
-    class StoryHandler(http.server.BaseHTTPRequestHandler):
-        def do_GET(self) -> None:  # noqa: N802
-            parsed = urllib.parse.urlparse(self.path)
-            path = parsed.path
-            if path in ("", "/", "/index.html"):
-                self.send_html(render_index_html(entries))
-                return
-            if path.startswith("/stories/"):
-                story_id = path.split("/", 2)[2]
-                entry = entries.get(story_id)
-                if entry is None:
-                    self.send_not_found("Story not found")
-                    return
-                try:
-                    story = build_story(entry.path)
-                    html_text = render_story_html(
-                        story,
-                        developer_token=developer_token,
-                        asset_prefix=f"/assets/{story_id}",
+def make_story_server(
+    address: tuple[str, int], handler: type[http.server.BaseHTTPRequestHandler]
+) -> http.server.ThreadingHTTPServer:
+    import http.server
+
+    server = http.server.ThreadingHTTPServer(address, handler, False)
+    server.request_queue_size = STORY_SERVER_BACKLOG
+    try:
+        server.server_bind()
+        server.server_activate()
+    except OSError:
+        server.server_close()
+        raise
+    return server
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.calls: dict[tuple[Any, ...], concurrent.futures.Future[Any]] = {}
+
+    def do(self, key: tuple[Any, ...], fn: Callable[[], Any]) -> Any:
+        import concurrent.futures
+
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if future is None:
+                future = self.calls[key] = concurrent.futures.Future()
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(fn())
+        except BaseException as exc:
+            future.set_exception(exc)
+        finally:
+            with self.lock:
+                del self.calls[key]
+        return future.result()
+
+
+class StoryWarmup:
+    def __init__(
+        self,
+        enabled: bool = False,
+        workers: int = DEFAULT_PREWARM_WORKERS,
+        limit: int | None = None,
+        background: bool = True,
+    ) -> None:
+        self.enabled = enabled
+        self.workers = max(workers, 1)
+        self.limit = limit
+        self.background = background
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+        self.total = 0
+        self.warmed = 0
+        self.failed = 0
+        self.elapsed: float | None = None
+        if not enabled:
+            self.ready.set()
+
+    def select(self, entries: dict[str, StoryIndexEntry]) -> list[StoryIndexEntry]:
+        ordered = sorted(
+            entries.values(), key=lambda entry: (-entry.version[0], entry.id)
+        )
+        return ordered if self.limit is None else ordered[: self.limit]
+
+    def warm_one(
+        self, entry: StoryIndexEntry, warm: Callable[[StoryIndexEntry], None]
+    ) -> None:
+        started = time.perf_counter()
+        try:
+            warm(entry)
+        except (OSError, StoryParseError) as exc:
+            with self.lock:
+                self.failed += 1
+            print(f"Error: could not prewarm {entry.id}: {exc}")
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.warmed += 1
+        print(f"Warmed {entry.id} in {elapsed_ms:.1f} ms")
+
+    def run(
+        self,
+        entries: dict[str, StoryIndexEntry],
+        warm: Callable[[StoryIndexEntry], None],
+    ) -> None:
+        import concurrent.futures
+
+        started = time.monotonic()
+        try:
+            selected = self.select(entries)
+            self.total = len(selected)
+            with concurrent.futures.ThreadPoolExecutor(self.workers) as pool:
+                for entry in selected:
+                    pool.submit(self.warm_one, entry, warm)
+        finally:
+            self.elapsed = time.monotonic() - started
+            self.ready.set()
+        print(
+            f"Prewarmed {self.warmed} of {self.total} stories "
+            f"in {self.elapsed:.2f}s ({self.failed} failed)"
+        )
+
+    def start(
+        self,
+        entries: dict[str, StoryIndexEntry],
+        warm: Callable[[StoryIndexEntry], None],
+    ) -> None:
+        if not self.enabled:
+            return
+        if not self.background:
+            self.run(entries, warm)
+            return
+        threading.Thread(
+            target=self.run, args=(entries, warm), name="story-prewarm", daemon=True
+        ).start()
+
+    def payload(self) -> dict[str, Any]:
+        return {
+            "status": "ready" if self.ready.is_set() else "warming",
+            "warmed": self.warmed,
+            "failed": self.failed,
+            "total": self.total,
+            "seconds": None if self.elapsed is None else round(self.elapsed, 3),
+        }
+
+
+class BudgetedCache:
+    def __init__(self, name: str, budget: MemoryBudget) -> None:
+        self.name = name
+        self.budget = budget
+        self.entries: dict[str, tuple[Any, int, int]] = {}
+        self.bytes = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        with self.budget.lock:
+            item = self.entries.pop(key, None)
+            if item is None:
+                return None
+            self.entries[key] = (item[0], item[1], next(self.budget.ticks))
+            return item[0]
+
+    def put(self, key: str, value: Any, size: int) -> None:
+        with self.budget.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self.entries[key] = (value, size, next(self.budget.ticks))
+            self.bytes += size
+            self.budget.enforce()
+
+    def adopt(self, other: BudgetedCache) -> None:
+        with self.budget.lock:
+            self.entries = dict(other.entries)
+            self.bytes = other.bytes
+            self.budget.enforce()
+
+    def oldest_tick(self) -> int:
+        return next(iter(self.entries.values()))[2]
+
+    def evict_oldest(self) -> int:
+        key = next(iter(self.entries))
+        _, size, _ = self.entries.pop(key)
+        self.bytes -= size
+        self.evictions += 1
+        METRICS.inc("story_cache_evictions_total", (("cache", self.name),))
+        return size
+
+
+class MemoryBudget:
+    def __init__(self, limit: int | None = None) -> None:
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.ticks = itertools.count()
+        self.caches: dict[str, BudgetedCache] = {}
+
+    def cache(self, name: str) -> BudgetedCache:
+        with self.lock:
+            cache = self.caches[name] = BudgetedCache(name, self)
+            return cache
+
+    def used(self) -> int:
+        return sum(cache.bytes for cache in list(self.caches.values()))
+
+    def enforce(self) -> None:
+        if self.limit is None:
+            return
+        used = self.used()
+        while used > self.limit:
+            candidates = [cache for cache in self.caches.values() if cache.entries]
+            if not candidates:
+                return
+            used -= min(candidates, key=BudgetedCache.oldest_tick).evict_oldest()
+
+    def payload(self) -> dict[str, Any]:
+        with self.lock:
+            caches = {
+                name: {
+                    "entries": len(cache.entries),
+                    "bytes": cache.bytes,
+                    "evictions": cache.evictions,
+                }
+                for name, cache in sorted(self.caches.items())
+            }
+            used = self.used()
+        return {
+            "budget_bytes": self.limit,
+            "used_bytes": used,
+            "rss_bytes": current_rss_bytes(),
+            "caches": caches,
+        }
+
+
+def current_rss_bytes() -> int | None:
+    try:
+        statm = pathlib.Path("/proc/self/statm").read_text(encoding="ascii")
+    except OSError:
+        return None
+    return int(statm.split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def tracemalloc_payload(limit: int) -> dict[str, Any] | None:
+    import tracemalloc
+
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),)
+    )
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "traced_bytes": current,
+        "peak_bytes": peak,
+        "top": [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "bytes": stat.size,
+                "blocks": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:limit]
+        ],
+    }
+
+
+class AccessLog:
+    def __init__(
+        self,
+        path: str,
+        sample_rate: float = 1.0,
+        queue_size: int = DEFAULT_ACCESS_LOG_QUEUE,
+    ) -> None:
+        self.path = path
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.queue: queue.Queue[dict[str, Any] | None] = queue.Queue(
+            max(queue_size, 1)
+        )
+        self.shed_size = max(int(self.queue.maxsize * ACCESS_LOG_SHED_RATIO), 1)
+        self.handle: TextIO | None = None
+        self.thread: threading.Thread | None = None
+
+    def record(self, entry: dict[str, Any]) -> None:
+        if entry["status"] < 400:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                METRICS.inc("story_access_log_records_total", (("result", "sampled"),))
+                return
+            if self.queue.qsize() >= self.shed_size:
+                METRICS.inc("story_access_log_records_total", (("result", "shed"),))
+                return
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            METRICS.inc("story_access_log_records_total", (("result", "dropped"),))
+
+    def run(self, handle: TextIO) -> None:
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+        while True:
+            entry = self.queue.get()
+            lines: list[str] = []
+            while entry is not None:
+                if self.sample_rate < 1.0 and entry["status"] < 400:
+                    entry["sample_rate"] = self.sample_rate
+                lines.append(encode(entry))
+                if len(lines) >= ACCESS_LOG_BATCH_SIZE:
+                    self.write(handle, lines)
+                    lines = []
+                try:
+                    entry = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            self.write(handle, lines)
+            handle.flush()
+            if entry is None:
+                return
+
+    def write(self, handle: TextIO, lines: list[str]) -> None:
+        if not lines:
+            return
+        handle.write("\n".join(lines) + "\n")
+        METRICS.inc(
+            "story_access_log_records_total", (("result", "written"),), len(lines)
+        )
+
+    def start(self) -> None:
+        if self.path == "-":
+            self.handle = sys.stdout
+        else:
+            self.handle = open(self.path, "a", encoding="utf-8", buffering=1 << 16)
+        self.thread = threading.Thread(
+            target=self.run, args=(self.handle,), name="story-access-log", daemon=True
+        )
+        self.thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self.thread is None or self.handle is None:
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(timeout)
+        if self.handle is not sys.stdout:
+            self.handle.close()
+
+
+def access_log_story_id(path: str) -> str | None:
+    if path.startswith("/api/stories/"):
+        name = path[len("/api/stories/") :]
+        for suffix in ("/assets.json", ".json"):
+            if name.endswith(suffix):
+                name = name[: -len(suffix)]
+                break
+        else:
+            return None
+        if not name or "/" in name:
+            return None
+    elif path.startswith("/bundles/"):
+        match = BUNDLE_NAME_RE.match(path[len("/bundles/") :])
+        if match is None:
+            return None
+        name = match.group("id")
+    elif path.startswith(("/stories/", "/assets/")):
+        name = path.split("/", 3)[2]
+    else:
+        return None
+    return urllib.parse.unquote(name) or None
+
+
+def asset_state_digest(
+    manifest: dict[str, AssetInfo],
+    variants: dict[str, tuple[ImageVariant, ...]] | None = None,
+) -> str:
+    digest = hashlib.sha256()
+    for key, info in sorted(manifest.items()):
+        digest.update(
+            f"{key}\0{info.width}\0{info.height}\0{info.bytes}\0"
+            f"{info.placeholder}\0{info.mtime_ns}\n".encode("utf-8")
+        )
+    for source, items in sorted((variants or {}).items()):
+        names = ",".join(variant.name for variant in items)
+        digest.update(f"{source}\0{names}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class Renderer:
+    def __init__(
+        self,
+        library: StoryLibrary | None = None,
+        developer_token: str = "",
+        render_cache: RenderCache | None = None,
+        memory_budget: MemoryBudget | None = None,
+        image_variants: dict[str, dict[str, tuple[ImageVariant, ...]]] | None = None,
+        asset_manifests: dict[str, dict[str, AssetInfo]] | None = None,
+        compiled_dir: pathlib.Path | None = None,
+        previous: Renderer | None = None,
+    ) -> None:
+        if library is None:
+            library = StoryLibrary(DEFAULT_STORY_DIRS, 0)
+        self.library = library
+        self.developer_token = developer_token
+        self.render_cache = render_cache
+        self.memory_budget = memory_budget or MemoryBudget()
+        self.image_variants = image_variants or {}
+        self.asset_manifests = asset_manifests or {}
+        self.compiled_dir = compiled_dir
+        self.json_cache = self.memory_budget.cache("json")
+        self.html_cache = self.memory_budget.cache("html")
+        self.page_cache = self.memory_budget.cache("page")
+        self.flights = SingleFlight()
+        self.asset_states: dict[str, tuple[dict[str, AssetInfo], str]] = {}
+        self.loaded_manifests: dict[
+            pathlib.Path, tuple[tuple[int, int] | None, dict[str, AssetInfo], str]
+        ] = {}
+        if previous is not None:
+            self.json_cache.adopt(previous.json_cache)
+            if previous.developer_token == developer_token:
+                self.html_cache.adopt(previous.html_cache)
+                self.page_cache.adopt(previous.page_cache)
+
+    def entry(self, story_id: str) -> StoryIndexEntry:
+        entry = self.library.entries.get(story_id)
+        if entry is None:
+            raise KeyError(f"Story not found: {story_id}")
+        return entry
+
+    def asset_state(
+        self, story_id: str | None, path: pathlib.Path
+    ) -> tuple[dict[str, AssetInfo], str]:
+        variants = self.image_variants.get(story_id) if story_id else None
+        if story_id is not None and story_id in self.asset_manifests:
+            state = self.asset_states.get(story_id)
+            if state is None:
+                manifest = self.asset_manifests[story_id]
+                state = (manifest, asset_state_digest(manifest, variants))
+                self.asset_states[story_id] = state
+            return state
+        manifest_path = path.parent / ASSET_MANIFEST_NAME
+        try:
+            stat = manifest_path.stat()
+            version: tuple[int, int] | None = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            version = None
+        loaded = self.loaded_manifests.get(manifest_path)
+        if loaded is not None and loaded[0] == version:
+            return loaded[1], loaded[2]
+        manifest = load_asset_manifest(path) if version is not None else {}
+        digest = asset_state_digest(manifest, variants)
+        self.loaded_manifests[manifest_path] = (version, manifest, digest)
+        return manifest, digest
+
+    def render_story(self, path: str | pathlib.Path) -> str:
+        story_path = resolve_story_path(pathlib.Path(path))
+        manifest, asset_digest = self.asset_state(None, story_path)
+        key = (story_version(story_path), asset_digest)
+        cached = self.page_cache.get(str(story_path))
+        hit = cached is not None and cached[0] == key
+        METRICS.cache_lookup("page", hit)
+        if cached is not None and hit:
+            return cached[1]
+
+        def build() -> str:
+            html_text = render_story_html(
+                build_story(story_path, self.compiled_dir),
+                developer_token=self.developer_token,
+                asset_manifest=manifest,
+                render_cache=self.render_cache,
+            )
+            self.page_cache.put(
+                str(story_path), (key, html_text), sys.getsizeof(html_text) + 256
+            )
+            return html_text
+
+        return self.flights.do(("page", str(story_path), key), build)
+
+    def render_index(self, query: str = "") -> str:
+        self.library.maybe_refresh()
+        filters = parse_catalog_query(query)
+        page = self.library.catalog.query(**filters)
+        return render_index_html(self.library.entries, page, filters)
+
+    def story_html(self, story_id: str) -> str:
+        entry = self.entry(story_id)
+        related = related_entries(self.library, story_id, self.library.entries)
+        manifest, asset_digest = self.asset_state(story_id, entry.path)
+        key = (
+            story_version(entry.path),
+            asset_digest,
+            tuple(item.id for item, _ in related),
+        )
+        cached = self.html_cache.get(story_id)
+        hit = cached is not None and cached[0] == key
+        METRICS.cache_lookup("html", hit)
+        record_cache_status(hit)
+        if cached is not None and hit:
+            return cached[1]
+
+        def build() -> str:
+            started = time.perf_counter()
+            html_text = render_story_html(
+                build_story(entry.path, self.compiled_dir),
+                developer_token=self.developer_token,
+                asset_prefix=f"/assets/{story_id}",
+                image_variants=self.image_variants.get(story_id),
+                asset_manifest=manifest,
+                related=related,
+                render_cache=self.render_cache,
+            )
+            self.html_cache.put(
+                story_id, (key, html_text), sys.getsizeof(html_text) + 256
+            )
+            METRICS.observe(
+                "story_render_duration_seconds",
+                (("kind", "html"),),
+                time.perf_counter() - started,
+            )
+            return html_text
+
+        return self.flights.do(("html", story_id, key), build)
+
+    def story_json_payload(self, story_id: str) -> tuple[str, bytes]:
+        entry = self.entry(story_id)
+        related = related_entries(self.library, story_id, self.library.entries)
+        manifest, asset_digest = self.asset_state(story_id, entry.path)
+        key = (
+            story_version(entry.path),
+            asset_digest,
+            tuple(item.id for item, _ in related),
+        )
+        cached = self.json_cache.get(story_id)
+        hit = cached is not None and cached[0] == key
+        METRICS.cache_lookup("json", hit)
+        record_cache_status(hit)
+        if cached is not None and hit:
+            return cached[1], cached[2]
+
+        def build() -> tuple[str, bytes]:
+            started = time.perf_counter()
+            story = build_story(entry.path, self.compiled_dir)
+            with StageTimer("ast"):
+                ast = build_story_ast(
+                    story,
+                    f"/assets/{story_id}",
+                    manifest,
+                    self.image_variants.get(story_id),
+                )
+                if related:
+                    ast["related"] = related_stories_payload(related)
+                payload = encode_story_ast(ast)
+            digest = hashlib.sha256(payload).hexdigest()[:24]
+            etag = f'"v{STORY_AST_VERSION}-{digest}"'
+            self.json_cache.put(
+                story_id, (key, etag, payload), sys.getsizeof(payload) + 256
+            )
+            METRICS.observe(
+                "story_render_duration_seconds",
+                (("kind", "json"),),
+                time.perf_counter() - started,
+            )
+            return etag, payload
+
+        return self.flights.do(("json", story_id, key), build)
+
+    def story_json(self, story_id: str) -> bytes:
+        return self.story_json_payload(story_id)[1]
+
+    def warm(self, entry: StoryIndexEntry) -> None:
+        self.story_html(entry.id)
+        self.story_json_payload(entry.id)
+
+
+def make_story_handler(
+    library: StoryLibrary,
+    developer_token: str,
+    image_pipeline: ImagePipeline | None = None,
+    image_variants: dict[str, dict[str, tuple[ImageVariant, ...]]] | None = None,
+    asset_manifests: dict[str, dict[str, AssetInfo]] | None = None,
+    bundle_dir: pathlib.Path | None = None,
+    artwork_cache: pathlib.Path | None = None,
+    render_cache: RenderCache | None = None,
+    warmup: StoryWarmup | None = None,
+    access_log: AccessLog | None = None,
+    memory_budget: MemoryBudget | None = None,
+    previous: type[http.server.BaseHTTPRequestHandler] | None = None,
+    compiled_dir: pathlib.Path | None = None,
+) -> type[http.server.BaseHTTPRequestHandler]:
+    import http.server
+
+    image_variants = image_variants or {}
+    asset_manifests = asset_manifests or {}
+    warmup = warmup or StoryWarmup()
+    renderer = Renderer(
+        library,
+        developer_token,
+        render_cache,
+        memory_budget,
+        image_variants,
+        asset_manifests,
+        compiled_dir,
+        getattr(previous, "renderer", None),
+    )
+    memory_budget = renderer.memory_budget
+    bundle_cache = memory_budget.cache("bundle")
+    if previous is not None and hasattr(previous, "bundle_cache"):
+        bundle_cache.adopt(previous.bundle_cache)
+    flights = SingleFlight()
+
+    def load_story_bundle(story_id: str, entry: StoryIndexEntry) -> StoryBundle:
+        assert bundle_dir is not None
+        version = (
+            story_version(entry.path),
+            renderer.asset_state(story_id, entry.path)[1],
+            asset_files_version(entry.path.parent / "assets"),
+        )
+        cached = bundle_cache.get(story_id)
+        hit = cached is not None and cached[0] == version and cached[1].path.exists()
+        METRICS.cache_lookup("bundle", hit)
+        record_cache_status(hit)
+        if cached is not None and hit:
+            return cached[1]
+
+        def build() -> StoryBundle:
+            started = time.perf_counter()
+            bundle = build_story_bundle(
+                entry.path,
+                build_story(entry.path, compiled_dir),
+                bundle_dir,
+                image_pipeline,
+                image_variants.get(story_id),
+                asset_manifests.get(story_id),
+                artwork_cache,
+            )
+            bundle_cache.put(
+                story_id, (version, bundle), sys.getsizeof(bundle) + 256
+            )
+            METRICS.observe(
+                "story_render_duration_seconds",
+                (("kind", "bundle"),),
+                time.perf_counter() - started,
+            )
+            return bundle
+
+        return flights.do(("bundle", story_id, version), build)
+
+    class StoryHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        timeout = KEEP_ALIVE_TIMEOUT
+        disable_nagle_algorithm = True
+        timings: StageTimings | None = None
+        status_code = 0
+        response_bytes = 0
+
+        def do_GET(self) -> None:  # noqa: N802
+            path = urllib.parse.urlsplit(self.path).path
+            route = route_class(path)
+            started = time.perf_counter()
+            self.status_code = 0
+            self.response_bytes = 0
+            METRICS.inc("story_http_requests_in_flight")
+            try:
+                with StageTimings() as self.timings:
+                    self.handle_get()
+            finally:
+                duration = time.perf_counter() - started
+                METRICS.inc("story_http_requests_in_flight", amount=-1)
+                METRICS.record_request(
+                    route, self.status_code, self.response_bytes, duration
+                )
+                if access_log is not None:
+                    access_log.record(
+                        {
+                            "time": round(time.time(), 3),
+                            "method": self.command,
+                            "path": path,
+                            "route": route,
+                            "status": self.status_code,
+                            "bytes": self.response_bytes,
+                            "duration_ms": round(duration * 1000, 3),
+                            "cache": self.timings.cache_status
+                            if self.timings is not None
+                            else None,
+                            "story_id": access_log_story_id(path),
+                            "client": self.client_address[0],
+                        }
                     )
+
+        def send_response(self, code: int, message: str | None = None) -> None:
+            self.status_code = code
+            super().send_response(code, message)
+
+        def send_header(self, keyword: str, value: str) -> None:
+            if keyword == "Content-Length":
+                self.response_bytes += int(value)
+            super().send_header(keyword, value)
+
+        def end_headers(self) -> None:
+            if self.timings is not None:
+                self.send_header("Server-Timing", self.timings.server_timing())
+            if self.server.RequestHandlerClass is not type(self):
+                self.send_header("Connection", "close")
+                self.close_connection = True
+            super().end_headers()
+
+        def handle_get(self) -> None:
+            parsed = urllib.parse.urlparse(self.path)
+            path = parsed.path
+            if path == "/healthz":
+                self.send_json({"status": "ok"})
+                return
+            if path == "/metrics":
+                payload = METRICS.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+            if path == "/debug/memory":
+                params = urllib.parse.parse_qs(parsed.query)
+                try:
+                    top = int(params.get("top", [DEFAULT_TRACEMALLOC_TOP])[0])
+                except ValueError:
+                    top = DEFAULT_TRACEMALLOC_TOP
+                payload = memory_budget.payload()
+                payload["tracemalloc"] = tracemalloc_payload(
+                    min(max(top, 1), TRACEMALLOC_MAX_TOP)
+                )
+                self.send_json(payload)
+                return
+            if path == "/readyz":
+                self.send_json(
+                    warmup.payload(), status=200 if warmup.ready.is_set() else 503
+                )
+                return
+            if path in (
+                "",
+                "/",
+                "/index.html",
+                "/search",
+                "/api/search",
+                "/api/media",
+                "/api/stories",
+                "/api/stories/changes",
+            ):
+                library.maybe_refresh()
+            entries = library.entries
+            if path in ("", "/", "/index.html"):
+                self.send_html(renderer.render_index(parsed.query))
+                return
+            if path in ("/search", "/api/search"):
+                query, limit = parse_search_query(parsed.query)
+                hits = library.search.search(query, limit)
+                if path == "/search":
+                    self.send_html(render_search_html(query, hits))
+                else:
+                    self.send_json(search_results_payload(query, hits))
+                return
+            if path == "/api/media":
+                self.send_json({"media": library.media.summary()})
+                return
+            if path.startswith("/api/media/"):
+                apple_music_id = urllib.parse.unquote(path.removeprefix("/api/media/"))
+                params = urllib.parse.parse_qs(parsed.query)
+                results = library.media.appearances(
+                    apple_music_id, (params.get("type") or [None])[0]
+                )
+                if not results:
+                    self.send_not_found("Media not referenced by any story")
+                    return
+                self.send_json({"apple_music_id": apple_music_id, "media": results})
+                return
+            if path == "/api/stories":
+                page = library.catalog.query(**parse_catalog_query(parsed.query))
+                self.send_json(catalog_page_payload(page, entries))
+                return
+            if path == "/api/stories/changes":
+                query = urllib.parse.parse_qs(parsed.query)
+                since = query.get("since", [None])[0]
+                self.send_json(library.changes_since(since))
+                return
+            if path.startswith("/api/stories/") and path.endswith("/assets.json"):
+                story_id = path[len("/api/stories/") : -len("/assets.json")]
+                if story_id not in entries:
+                    self.send_not_found("Story not found")
+                    return
+                manifest = renderer.asset_state(story_id, entries[story_id].path)[0]
+                self.send_json(asset_manifest_payload(manifest))
+                return
+            if path.startswith("/api/stories/") and path.endswith(".json"):
+                story_id = path[len("/api/stories/") : -len(".json")]
+                entry = entries.get(story_id)
+                if entry is None:
+                    self.send_json({"error": "Story not found"}, status=404)
+                    return
+                try:
+                    etag, payload = renderer.story_json_payload(story_id)
+                except (OSError, StoryParseError) as exc:
+                    self.send_json({"error": str(exc)}, status=500)
+                    return
+                self.send_etagged(payload, etag, "application/json")
+                return
+            if path.startswith("/stories/"):
+                story_id = path.split("/", 2)[2]
+                entry = entries.get(story_id)
+                if entry is None:
+                    self.send_not_found("Story not found")
+                    return
+                try:
+                    html_text = renderer.story_html(story_id)
                 except (OSError, StoryParseError) as exc:
                     self.send_server_error(str(exc))
                     return
                 self.send_html(html_text)
                 return
+            if path.startswith("/bundles/") and bundle_dir is not None:
+                self.send_bundle(path[len("/bundles/") :], entries)
+                return
             if path.startswith("/assets/"):
                 parts = path.strip("/").split("/", 2)
                 if len(parts) < 3:
@@ -1732,6 +5296,9 @@ def make_story_handler(
                 if entry is None:
                     self.send_not_found("Asset not found")
                     return
+                if asset_path.startswith(f"{IMAGE_VARIANT_DIR}/"):
+                    self.send_image_variant(asset_path.split("/", 1)[1])
+                    return
                 asset_root = (entry.path.parent / "assets").resolve()
                 candidate = (asset_root / asset_path).resolve()
                 if asset_root not in candidate.parents and candidate != asset_root:
@@ -1752,15 +5319,118 @@ def make_story_handler(
             self.end_headers()
             self.wfile.write(payload)
 
-        def send_file(self, path: pathlib.Path) -> None:
-            mime_type, _ = mimetypes.guess_type(str(path))
-            payload = path.read_bytes()
+        def send_json(self, payload: Any, status: int = 200) -> None:
+            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_etagged(self, payload: bytes, etag: str, content_type: str) -> None:
+            if etag_matches(self.headers.get("If-None-Match", ""), etag):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
             self.send_response(200)
-            self.send_header("Content-Type", mime_type or "application/octet-stream")
+            self.send_header("Content-Type", content_type)
             self.send_header("Content-Length", str(len(payload)))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
             self.end_headers()
             self.wfile.write(payload)
 
+        def send_file(
+            self,
+            path: pathlib.Path,
+            cache_control: str | None = None,
+            mime_type: str | None = None,
+        ) -> None:
+            if mime_type is None:
+                import mimetypes
+
+                mime_type, _ = mimetypes.guess_type(str(path))
+            size = path.stat().st_size
+            start, end = 0, size - 1
+            status = 200
+            range_header = self.headers.get("Range")
+            if range_header:
+                try:
+                    byte_range = parse_byte_range(range_header, size)
+                except ValueError:
+                    byte_range = (start, end)
+                else:
+                    status = 206
+                if byte_range is None:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                start, end = byte_range
+            self.send_response(status)
+            self.send_header("Content-Type", mime_type or "application/octet-stream")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            if cache_control:
+                self.send_header("Cache-Control", cache_control)
+            self.end_headers()
+            with path.open("rb") as handle:
+                handle.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = handle.read(min(FILE_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+
+        def send_bundle(
+            self, name: str, entries: dict[str, StoryIndexEntry]
+        ) -> None:
+            match = BUNDLE_NAME_RE.match(name)
+            entry = entries.get(match.group("id")) if match else None
+            if match is None or entry is None:
+                self.send_not_found("Bundle not found")
+                return
+            try:
+                bundle = load_story_bundle(entry.id, entry)
+            except (OSError, StoryParseError) as exc:
+                self.send_server_error(str(exc))
+                return
+            if match.group("hash") is None:
+                self.send_response(302)
+                self.send_header("Location", f"/bundles/{bundle.path.name}")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            assert bundle_dir is not None
+            candidate = bundle_dir / name
+            if not candidate.is_file():
+                self.send_not_found("Bundle not found")
+                return
+            self.send_file(
+                candidate, "public, max-age=31536000, immutable", "application/zip"
+            )
+
+        def send_image_variant(self, name: str) -> None:
+            if image_pipeline is None or not IMAGE_VARIANT_NAME_RE.match(name):
+                self.send_not_found("Asset not found")
+                return
+            candidate = image_variant_path(image_pipeline.cache_dir, name)
+            if not candidate.is_file():
+                self.send_not_found("Asset not found")
+                return
+            self.send_file(
+                candidate,
+                "public, max-age=31536000, immutable",
+                IMAGE_VARIANT_MIME_TYPES[candidate.suffix.lstrip(".")],
+            )
+
         def send_not_found(self, message: str) -> None:
             self.send_html(f"<h1>404</h1><p>{html.escape(message)}</p>", status=404)
 
@@ -1770,6 +5440,15 @@ def make_story_handler(
         def log_message(self, format: str, *args: Any) -> None:  # noqa: A003
             return
 
+    METRICS.gauge("story_memory_cache_bytes", memory_budget.used)
+    METRICS.gauge("story_memory_budget_bytes", lambda: memory_budget.limit or 0)
+    METRICS.gauge("story_index_stories", lambda: len(library.entries))
+    METRICS.gauge("story_search_documents", lambda: len(library.search.documents))
+    METRICS.gauge("story_media_items", lambda: len(library.media.records))
+    StoryHandler.library = library
+    StoryHandler.renderer = renderer
+    StoryHandler.bundle_cache = bundle_cache
+    warmup.start(library.entries, renderer.warm)
     return StoryHandler
 
 
@@ -1788,15 +5467,661 @@ def copy_assets(source: pathlib.Path, destination: pathlib.Path) -> None:
         shutil.copytree(assets, destination / "assets", dirs_exist_ok=True)
 
 
+def load_image_pipeline(
+    cache_dir: str | pathlib.Path, workers: int | None = None
+) -> ImagePipeline:
+    if importlib.util.find_spec("PIL") is None:
+        raise ImagePipelineError("Image optimization requires Pillow (pip install Pillow).")
+    from PIL import features
+
+    formats: list[str] = []
+    for image_format in IMAGE_VARIANT_FORMATS:
+        try:
+            supported = image_format == "jpeg" or features.check_module(image_format)
+        except ValueError:
+            supported = False
+        if supported:
+            formats.append(image_format)
+    return ImagePipeline(
+        cache_dir=pathlib.Path(cache_dir), formats=tuple(formats), workers=workers
+    )
+
+
+def collect_image_sources(story: Story) -> list[str]:
+    sources: list[str] = []
+    for key in ("hero_image", "leadArt"):
+        value = story.meta.get(key) or {}
+        if isinstance(value, dict) and value.get("src"):
+            sources.append(str(value["src"]))
+    for section in story.sections:
+        for match in GALLERY_IMAGE_RE.finditer(section.body):
+            src = parse_attrs(match.group(1)).get("src")
+            if src:
+                sources.append(src)
+        for match in FULL_BLEED_RE.finditer(section.body):
+            attrs = parse_attrs(match.group(1))
+            if attrs.get("src") and attrs.get("kind", "image") != "video":
+                sources.append(attrs["src"])
+    return list(dict.fromkeys(sources))
+
+
+def story_image_sources(
+    story_path: pathlib.Path, story: Story
+) -> dict[str, pathlib.Path]:
+    sources: dict[str, pathlib.Path] = {}
+    for src in collect_image_sources(story):
+        path = local_asset_path(story_path, src)
+        if path is not None and path.suffix.lower() in IMAGE_SOURCE_SUFFIXES:
+            sources[src] = path
+    return sources
+
+
+def hash_file(path: pathlib.Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def image_variant_path(cache_dir: pathlib.Path, name: str) -> pathlib.Path:
+    return cache_dir / name[:2] / name
+
+
+def read_cached_image_variants(
+    pipeline: ImagePipeline, digest: str
+) -> tuple[ImageVariant, ...] | None:
+    index_path = image_variant_path(pipeline.cache_dir, f"{digest}.json")
+    try:
+        data = json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if tuple(data.get("widths", ())) != pipeline.widths or tuple(
+        data.get("formats", ())
+    ) != pipeline.formats:
+        return None
+    variants = tuple(
+        ImageVariant(name=item[0], width=int(item[1]), format=item[2])
+        for item in data.get("variants", [])
+    )
+    if not all(
+        image_variant_path(pipeline.cache_dir, item.name).exists() for item in variants
+    ):
+        return None
+    return variants
+
+
+def generate_variants_for_image(
+    source: str,
+    digest: str,
+    cache_dir: str,
+    widths: tuple[int, ...],
+    formats: tuple[str, ...],
+) -> list[tuple[str, int, str]]:
+    from PIL import Image, ImageOps
+
+    root = pathlib.Path(cache_dir)
+    produced: list[tuple[str, int, str]] = []
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        for width in sorted({min(width, image.width) for width in widths}):
+            height = max(1, round(image.height * width / image.width))
+            resized = (
+                image
+                if width == image.width
+                else image.resize((width, height), Image.Resampling.LANCZOS)
+            )
+            for image_format in formats:
+                name = f"{digest}-{width}.{image_format}"
+                path = image_variant_path(root, name)
+                if not path.exists():
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    output = resized
+                    if image_format == "jpeg" and output.mode != "RGB":
+                        output = output.convert("RGB")
+                    temp_path = path.with_name(f".{name}.{os.getpid()}.tmp")
+                    output.save(
+                        temp_path,
+                        format=image_format.upper(),
+                        quality=IMAGE_VARIANT_QUALITY[image_format],
+                    )
+                    os.replace(temp_path, path)
+                produced.append((name, width, image_format))
+    index_path = image_variant_path(root, f"{digest}.json")
+    temp_index = index_path.with_name(f".{index_path.name}.{os.getpid()}.tmp")
+    temp_index.write_text(
+        json.dumps(
+            {"widths": list(widths), "formats": list(formats), "variants": produced}
+        ),
+        encoding="utf-8",
+    )
+    os.replace(temp_index, index_path)
+    return produced
+
+
+def generate_image_variants(
+    pipeline: ImagePipeline, sources: Iterable[pathlib.Path]
+) -> dict[pathlib.Path, tuple[ImageVariant, ...]]:
+    results: dict[pathlib.Path, tuple[ImageVariant, ...]] = {}
+    pending: dict[pathlib.Path, str] = {}
+    for source in dict.fromkeys(sources):
+        digest = hash_file(source)
+        cached = read_cached_image_variants(pipeline, digest)
+        if cached is None:
+            pending[source] = digest
+        else:
+            results[source] = cached
+    if not pending:
+        return results
+    import concurrent.futures
+    from concurrent.futures.process import BrokenProcessPool
+
+    from PIL import Image
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=pipeline.workers) as pool:
+        futures = {
+            pool.submit(
+                generate_variants_for_image,
+                str(source),
+                digest,
+                str(pipeline.cache_dir),
+                pipeline.widths,
+                pipeline.formats,
+            ): source
+            for source, digest in pending.items()
+        }
+        for future in concurrent.futures.as_completed(futures):
+            source = futures[future]
+            try:
+                produced = future.result()
+            except (
+                OSError,
+                ValueError,
+                Image.DecompressionBombError,
+                BrokenProcessPool,
+            ) as exc:
+                print(f"Warning: could not optimize {source}: {exc}", file=sys.stderr)
+                continue
+            results[source] = tuple(
+                ImageVariant(name=name, width=width, format=image_format)
+                for name, width, image_format in produced
+            )
+    return results
+
+
+def build_image_variant_map(
+    pipeline: ImagePipeline, stories: dict[str, tuple[pathlib.Path, Story]]
+) -> dict[str, dict[str, tuple[ImageVariant, ...]]]:
+    story_sources = {
+        story_id: story_image_sources(story_path, story)
+        for story_id, (story_path, story) in stories.items()
+    }
+    generated = generate_image_variants(
+        pipeline,
+        (path for sources in story_sources.values() for path in sources.values()),
+    )
+    return {
+        story_id: {
+            src: generated[path] for src, path in sources.items() if path in generated
+        }
+        for story_id, sources in story_sources.items()
+    }
+
+
+def copy_image_variants(
+    pipeline: ImagePipeline,
+    image_variants: dict[str, tuple[ImageVariant, ...]],
+    destination: pathlib.Path,
+) -> None:
+    variant_dir = destination / "assets" / IMAGE_VARIANT_DIR
+    for variants in image_variants.values():
+        for variant in variants:
+            target = variant_dir / variant.name
+            if target.exists():
+                continue
+            variant_dir.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(
+                image_variant_path(pipeline.cache_dir, variant.name), target
+            )
+
+
+def asset_manifest_key(url: str | None) -> str | None:
+    if not url:
+        return None
+    return url if is_absolute_url(url) else asset_relative_path(url)
+
+
+def lookup_asset_info(
+    asset_manifest: dict[str, AssetInfo] | None, url: str | None
+) -> AssetInfo | None:
+    key = asset_manifest_key(url)
+    if not asset_manifest or key is None:
+        return None
+    return asset_manifest.get(key)
+
+
+def artwork_cache_path(cache_dir: pathlib.Path, url: str) -> pathlib.Path:
+    return cache_dir / hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def collect_artwork_urls(story: Story) -> list[str]:
+    urls = [src for src in collect_image_sources(story) if is_absolute_url(src)]
+    urls.extend(item.artwork_url for item in story.media.values() if item.artwork_url)
+    return list(dict.fromkeys(urls))
+
+
+def read_image_info(path: pathlib.Path) -> tuple[int | None, int | None, str | None]:
+    if importlib.util.find_spec("PIL") is None:
+        return None, None, None
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(path) as original:
+            image = ImageOps.exif_transpose(original)
+            width, height = image.size
+            thumbnail = image.convert("RGB")
+            thumbnail.thumbnail((ASSET_PLACEHOLDER_SIZE, ASSET_PLACEHOLDER_SIZE))
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, format="JPEG", quality=40)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None, None, None
+    encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+    return width, height, f"data:image/jpeg;base64,{encoded}"
+
+
+def describe_asset(path: pathlib.Path, previous: AssetInfo | None) -> AssetInfo:
+    stat = path.stat()
+    if (
+        previous is not None
+        and previous.mtime_ns == stat.st_mtime_ns
+        and previous.bytes == stat.st_size
+    ):
+        return previous
+    width, height, placeholder = read_image_info(path)
+    return AssetInfo(
+        width=width,
+        height=height,
+        bytes=stat.st_size,
+        placeholder=placeholder,
+        mtime_ns=stat.st_mtime_ns,
+    )
+
+
+def asset_info_payload(info: AssetInfo) -> dict[str, Any]:
+    return {
+        "width": info.width,
+        "height": info.height,
+        "bytes": info.bytes,
+        "placeholder": info.placeholder,
+    }
+
+
+def load_asset_manifest(story_path: pathlib.Path) -> dict[str, AssetInfo]:
+    manifest_path = story_path.parent / ASSET_MANIFEST_NAME
+    try:
+        data = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != ASSET_MANIFEST_VERSION:
+        return {}
+    manifest: dict[str, AssetInfo] = {}
+    for key, item in (data.get("assets") or {}).items():
+        if not isinstance(item, dict):
+            continue
+        manifest[key] = AssetInfo(
+            width=item.get("width"),
+            height=item.get("height"),
+            bytes=int(item.get("bytes", 0)),
+            placeholder=item.get("placeholder"),
+            mtime_ns=int(item.get("mtime_ns", 0)),
+        )
+    return manifest
+
+
+def write_asset_manifest(
+    story_path: pathlib.Path, manifest: dict[str, AssetInfo]
+) -> None:
+    payload = {
+        "version": ASSET_MANIFEST_VERSION,
+        "assets": {
+            key: {**asset_info_payload(info), "mtime_ns": info.mtime_ns}
+            for key, info in sorted(manifest.items())
+        },
+    }
+    manifest_path = story_path.parent / ASSET_MANIFEST_NAME
+    temp_path = manifest_path.with_name(f".{ASSET_MANIFEST_NAME}.{os.getpid()}.tmp")
+    temp_path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    os.replace(temp_path, manifest_path)
+
+
+def index_story_assets(
+    story_path: pathlib.Path,
+    story: Story,
+    artwork_cache: pathlib.Path | None = None,
+) -> dict[str, AssetInfo]:
+    previous = load_asset_manifest(story_path)
+    manifest: dict[str, AssetInfo] = {}
+    asset_root = story_path.parent / "assets"
+    if asset_root.is_dir():
+        for path in sorted(asset_root.rglob("*")):
+            if path.is_file() and not path.name.startswith("."):
+                key = path.relative_to(asset_root).as_posix()
+                manifest[key] = describe_asset(path, previous.get(key))
+    if artwork_cache is not None:
+        for url in collect_artwork_urls(story):
+            cached = artwork_cache_path(artwork_cache, url)
+            if cached.is_file():
+                manifest[url] = describe_asset(cached, previous.get(url))
+    if manifest != previous:
+        write_asset_manifest(story_path, manifest)
+    return manifest
+
+
+def asset_manifest_payload(manifest: dict[str, AssetInfo]) -> dict[str, Any]:
+    return {
+        "version": ASSET_MANIFEST_VERSION,
+        "assets": {key: asset_info_payload(info) for key, info in manifest.items()},
+    }
+
+
+def fingerprint_name(relative: str, digest: str) -> str:
+    path = pathlib.PurePosixPath(relative)
+    return str(path.with_name(f"{path.stem}.{digest[:12]}{path.suffix}"))
+
+
+def rewrite_ast_urls(node: Any, urls: dict[str, str]) -> Any:
+    if isinstance(node, dict):
+        return {
+            key: urls.get(value, value)
+            if key in ("src", "artwork_url") and isinstance(value, str)
+            else rewrite_ast_urls(value, urls)
+            for key, value in node.items()
+        }
+    if isinstance(node, list):
+        return [rewrite_ast_urls(item, urls) for item in node]
+    return node
+
+
+def asset_files_version(asset_root: pathlib.Path) -> str:
+    digest = hashlib.sha256()
+    if asset_root.is_dir():
+        for path in sorted(asset_root.rglob("*")):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            stat = path.stat()
+            relative = path.relative_to(asset_root).as_posix()
+            digest.update(f"{relative}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def collect_bundle_files(
+    story_path: pathlib.Path,
+    story: Story,
+    image_pipeline: ImagePipeline | None = None,
+    image_variants: dict[str, tuple[ImageVariant, ...]] | None = None,
+    artwork_cache: pathlib.Path | None = None,
+) -> tuple[dict[str, pathlib.Path], dict[str, str]]:
+    files: dict[str, pathlib.Path] = {}
+    urls: dict[str, str] = {}
+    asset_root = story_path.parent / "assets"
+    if asset_root.is_dir():
+        for path in sorted(asset_root.rglob("*")):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            relative = path.relative_to(asset_root).as_posix()
+            name = f"assets/{fingerprint_name(relative, hash_file(path))}"
+            files[name] = path
+            urls[f"assets/{relative}"] = name
+    if image_pipeline is not None:
+        for variants in (image_variants or {}).values():
+            for variant in variants:
+                files[f"assets/{IMAGE_VARIANT_DIR}/{variant.name}"] = (
+                    image_variant_path(image_pipeline.cache_dir, variant.name)
+                )
+    if artwork_cache is not None:
+        for url in collect_artwork_urls(story):
+            cached = artwork_cache_path(artwork_cache, url)
+            if not cached.is_file():
+                continue
+            suffix = pathlib.PurePosixPath(urllib.parse.urlparse(url).path).suffix
+            name = f"artwork/{hash_file(cached)[:24]}{suffix}"
+            files[name] = cached
+            urls[url] = name
+    return files, urls
+
+
+def write_zip_entry(
+    archive: zipfile.ZipFile, name: str, source: pathlib.Path | bytes
+) -> None:
+    info = zipfile.ZipInfo(name, ZIP_TIMESTAMP)
+    suffix = pathlib.PurePosixPath(name).suffix.lower()
+    info.compress_type = (
+        zipfile.ZIP_DEFLATED
+        if suffix in BUNDLE_COMPRESSIBLE_SUFFIXES
+        else zipfile.ZIP_STORED
+    )
+    if isinstance(source, bytes):
+        archive.writestr(info, source)
+        return
+    with source.open("rb") as handle, archive.open(info, "w") as target:
+        shutil.copyfileobj(handle, target, FILE_CHUNK_SIZE)
+
+
+def build_story_bundle(
+    story_path: pathlib.Path,
+    story: Story,
+    output_dir: pathlib.Path,
+    image_pipeline: ImagePipeline | None = None,
+    image_variants: dict[str, tuple[ImageVariant, ...]] | None = None,
+    asset_manifest: dict[str, AssetInfo] | None = None,
+    artwork_cache: pathlib.Path | None = None,
+) -> StoryBundle:
+    story_id = str(story.meta.get("id") or story_path.parent.name).strip()
+    files, urls = collect_bundle_files(
+        story_path, story, image_pipeline, image_variants, artwork_cache
+    )
+    ast = build_story_ast(story, "assets", asset_manifest, image_variants)
+    story_json = encode_story_ast(rewrite_ast_urls(ast, urls))
+    file_hashes = {
+        "story.json": {
+            "sha256": hashlib.sha256(story_json).hexdigest(),
+            "bytes": len(story_json),
+        }
+    }
+    for name, path in sorted(files.items()):
+        file_hashes[name] = {"sha256": hash_file(path), "bytes": path.stat().st_size}
+    content_hash = hashlib.sha256(
+        json.dumps(file_hashes, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    bundle_path = output_dir / f"{story_id}.{content_hash[:BUNDLE_HASH_LENGTH]}.zip"
+    bundle = StoryBundle(story_id=story_id, content_hash=content_hash, path=bundle_path)
+    if bundle_path.exists():
+        prune_story_bundles(bundle)
+        return bundle
+    manifest = {
+        "version": BUNDLE_FORMAT_VERSION,
+        "id": story_id,
+        "hash": content_hash,
+        "story_ast_version": STORY_AST_VERSION,
+        "files": file_hashes,
+    }
+    output_dir.mkdir(parents=True, exist_ok=True)
+    handle, temp_name = tempfile.mkstemp(
+        dir=output_dir, prefix=f".{bundle_path.name}.", suffix=".tmp"
+    )
+    os.close(handle)
+    try:
+        with zipfile.ZipFile(temp_name, "w") as archive:
+            write_zip_entry(
+                archive, "manifest.json", json.dumps(manifest, indent=2).encode("utf-8")
+            )
+            write_zip_entry(archive, "story.json", story_json)
+            for name, path in sorted(files.items()):
+                write_zip_entry(archive, name, path)
+        os.replace(temp_name, bundle_path)
+    finally:
+        if os.path.exists(temp_name):
+            os.unlink(temp_name)
+    prune_story_bundles(bundle)
+    return bundle
+
+
+def prune_story_bundles(bundle: StoryBundle) -> None:
+    for path in bundle.path.parent.glob("*.zip"):
+        match = BUNDLE_NAME_RE.match(path.name)
+        if (
+            match is None
+            or match.group("id") != bundle.story_id
+            or match.group("hash") is None
+            or path == bundle.path
+        ):
+            continue
+        path.unlink(missing_ok=True)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:].strip()
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def parse_byte_range(header: str, size: int) -> tuple[int, int] | None:
+    match = BYTE_RANGE_RE.match(header.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        raise ValueError(f"Unsupported range header: {header}")
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0 or size == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return None
+    return start, end
+
+
+def add_image_pipeline_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--optimize-images",
+        action="store_true",
+        help="Generate responsive AVIF/WebP/JPEG variants for local image assets",
+    )
+    parser.add_argument(
+        "--image-cache",
+        default=DEFAULT_IMAGE_CACHE_DIR,
+        help="Content-addressed cache directory for image variants",
+    )
+    parser.add_argument(
+        "--image-workers",
+        type=int,
+        default=None,
+        help="Worker processes used to generate image variants",
+    )
+    parser.add_argument(
+        "--index-assets",
+        action="store_true",
+        help=f"Refresh each story's {ASSET_MANIFEST_NAME} before rendering",
+    )
+    parser.add_argument(
+        "--artwork-cache",
+        default=DEFAULT_ARTWORK_CACHE_DIR,
+        help="Directory of cached artwork downloads, named by URL SHA-256",
+    )
+
+
+def add_render_cache_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--cache-dir",
+        nargs="?",
+        const=DEFAULT_RENDER_CACHE_DIR,
+        default=None,
+        help=(
+            "Persist rendered fragments in this directory "
+            f"(default {DEFAULT_RENDER_CACHE_DIR} when given without a value)"
+        ),
+    )
+    parser.add_argument(
+        "--cache-max-bytes",
+        type=int,
+        default=DEFAULT_RENDER_CACHE_MAX_BYTES,
+        help="Evict least recently used fragments beyond this many bytes",
+    )
+
+
+def load_render_cache(args: argparse.Namespace) -> RenderCache | None:
+    if not args.cache_dir:
+        return None
+    return RenderCache(pathlib.Path(args.cache_dir), args.cache_max_bytes)
+
+
+def add_library_index_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--search-index",
+        default=DEFAULT_SEARCH_INDEX_PATH,
+        help="Path of the persisted full-text search index",
+    )
+    parser.add_argument(
+        "--media-index",
+        default=DEFAULT_MEDIA_INDEX_PATH,
+        help="Path of the persisted cross-story media index",
+    )
+    parser.add_argument(
+        "--library-state",
+        default=DEFAULT_LIBRARY_STATE_PATH,
+        help="Path of the persisted change log behind /api/stories/changes cursors",
+    )
+
+
+def load_library(args: argparse.Namespace, rescan_interval: float = 0) -> StoryLibrary:
+    return StoryLibrary(
+        args.stories or list(DEFAULT_STORY_DIRS),
+        rescan_interval,
+        pathlib.Path(args.search_index),
+        pathlib.Path(args.media_index),
+        compiled_story_dir(args),
+        pathlib.Path(args.library_state),
+    )
+
+
 def parse_render_args(argv: list[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Render a music story to HTML.")
     parser.add_argument("input", help="Path to story.mdx or story directory")
     parser.add_argument("output", help="Output directory")
+    parser.add_argument(
+        "--format",
+        choices=("html", "json"),
+        default="html",
+        help="Write index.html or a pre-parsed story.json AST",
+    )
+    add_render_cache_args(parser)
     parser.add_argument(
         "--developer-token",
         default=os.environ.get("APPLE_MUSIC_DEVELOPER_TOKEN", ""),
         help="Apple Music developer token",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print time spent in each parse and render stage",
+    )
+    parser.add_argument(
+        "--profile-output",
+        help="Also write a function-level profile of the render to this file",
+    )
+    parser.add_argument(
+        "--profile-format",
+        choices=PROFILE_FORMATS,
+        default="pstats",
+        help="cProfile stats, or collapsed stacks for flamegraph tools",
+    )
+    add_image_pipeline_args(parser)
     return parser.parse_args(argv)
 
 
@@ -1815,24 +6140,297 @@ def parse_serve_args(argv: list[str]) -> argparse.Namespace:
         default=os.environ.get("APPLE_MUSIC_DEVELOPER_TOKEN", ""),
         help="Apple Music developer token",
     )
+    parser.add_argument(
+        "--developer-token-file",
+        help="Read the Apple Music developer token from this file (re-read on SIGHUP)",
+    )
     parser.add_argument("--tls-cert", help="Path to TLS certificate (PEM)")
     parser.add_argument("--tls-key", help="Path to TLS private key (PEM)")
+    parser.add_argument(
+        "--rescan-interval",
+        type=float,
+        default=DEFAULT_RESCAN_INTERVAL,
+        help="Seconds between story directory rescans (0 disables rescanning)",
+    )
+    parser.add_argument(
+        "--bundle-dir",
+        default=DEFAULT_BUNDLE_DIR,
+        help="Directory for content-addressed offline story bundles",
+    )
+    parser.add_argument(
+        "--prewarm",
+        nargs="?",
+        type=int,
+        const=0,
+        default=None,
+        metavar="N",
+        help=(
+            "Render stories in the background at startup; /readyz reports 503 "
+            "until done. N limits warming to the most recently updated stories"
+        ),
+    )
+    parser.add_argument(
+        "--prewarm-workers",
+        type=int,
+        default=DEFAULT_PREWARM_WORKERS,
+        help="Threads used to prewarm stories",
+    )
+    parser.add_argument(
+        "--access-log",
+        metavar="PATH",
+        help="Append JSON-lines access logs to PATH ('-' for stdout)",
+    )
+    parser.add_argument(
+        "--access-log-sample",
+        type=float,
+        default=1.0,
+        help="Fraction of successful requests to log; errors are always kept",
+    )
+    parser.add_argument(
+        "--access-log-queue",
+        type=int,
+        default=DEFAULT_ACCESS_LOG_QUEUE,
+        help="Records buffered for the log writer before new ones are dropped",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        help=(
+            "Cap the bytes held by in-memory story HTML, JSON and bundle caches, "
+            "evicting the least recently used entries across all of them"
+        ),
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        nargs="?",
+        type=int,
+        const=1,
+        default=None,
+        metavar="FRAMES",
+        help="Trace allocations so /debug/memory reports the top allocation sites",
+    )
+    add_library_index_args(parser)
+    add_render_cache_args(parser)
+    add_image_pipeline_args(parser)
+    return parser.parse_args(argv)
+
+
+def parse_bundle_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Package a story as a content-addressed offline bundle."
+    )
+    parser.add_argument("input", help="Path to story.mdx or story directory")
+    parser.add_argument(
+        "output",
+        nargs="?",
+        default=DEFAULT_BUNDLE_DIR,
+        help="Output directory for <id>.<hash>.zip",
+    )
+    add_image_pipeline_args(parser)
+    return parser.parse_args(argv)
+
+
+def parse_index_assets_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=f"Record image dimensions and placeholders in {ASSET_MANIFEST_NAME}."
+    )
+    parser.add_argument(
+        "stories",
+        nargs="*",
+        default=None,
+        help="Story directories or story.mdx paths",
+    )
+    parser.add_argument(
+        "--artwork-cache",
+        default=DEFAULT_ARTWORK_CACHE_DIR,
+        help="Directory of cached artwork downloads, named by URL SHA-256",
+    )
+    return parser.parse_args(argv)
+
+
+def parse_search_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Search story sections.")
+    parser.add_argument("query", help="Words to search for")
+    parser.add_argument(
+        "--stories",
+        nargs="*",
+        default=None,
+        help="Story directories or story.mdx paths",
+    )
+    add_library_index_args(parser)
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=SEARCH_RESULT_LIMIT,
+        help="Maximum number of sections to list",
+    )
+    return parser.parse_args(argv)
+
+
+def parse_media_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="List the stories and sections that reference Apple Music media."
+    )
+    parser.add_argument(
+        "apple_music_id",
+        nargs="?",
+        help="Apple Music ID to look up (omit to list every referenced item)",
+    )
+    parser.add_argument("--type", help="Only match this media type")
+    parser.add_argument(
+        "--stories",
+        nargs="*",
+        default=None,
+        help="Story directories or story.mdx paths",
+    )
+    add_library_index_args(parser)
+    parser.add_argument("--json", action="store_true", help="Print the lookup as JSON")
+    return parser.parse_args(argv)
+
+
+def write_text_chunks(path: pathlib.Path, chunks: Iterable[str]) -> None:
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with temp_path.open("w", encoding="utf-8") as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def parse_cache_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inspect or prune the render cache.")
+    parser.add_argument("action", choices=("stats", "prune"))
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_RENDER_CACHE_DIR,
+        help="Render cache directory",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=DEFAULT_RENDER_CACHE_MAX_BYTES,
+        help="Prune least recently used fragments down to this size (0 clears it)",
+    )
     return parser.parse_args(argv)
 
 
+def run_cache(args: argparse.Namespace) -> int:
+    cache = RenderCache(pathlib.Path(args.cache_dir), args.max_bytes)
+    if args.action == "prune":
+        removed, freed = cache.prune()
+        print(f"Removed {removed} fragments ({freed:,} bytes) from {cache.root}")
+        return 0
+    stats = cache.stats()
+    print(f"Cache:    {cache.root}")
+    print(f"Entries:  {stats.entries}")
+    print(f"Bytes:    {stats.bytes:,} of {cache.max_bytes:,}")
+    if stats.oldest is not None and stats.newest is not None:
+        for label, timestamp in (("Oldest", stats.oldest), ("Newest", stats.newest)):
+            formatted = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+            print(f"{label + ':':<10}{formatted}")
+    return 0
+
+
 def run_render(args: argparse.Namespace) -> int:
+    if not args.profile and not args.profile_output:
+        return render_story_output(args)
+    profiler: cProfile.Profile | CollapsedStackProfiler | None = None
+    if args.profile_output:
+        if args.profile_format == "collapsed":
+            profiler = CollapsedStackProfiler()
+        else:
+            import cProfile
+
+            profiler = cProfile.Profile()
+    with StageTimings() as timings:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            status = render_story_output(args)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    elapsed = timings.elapsed()
+    print(f"{'stage':<12} {'ms':>10} {'share':>7}")
+    for name, seconds in sorted(timings.totals.items(), key=lambda item: -item[1]):
+        print(f"{name:<12} {seconds * 1000:>10.2f} {seconds / elapsed:>7.1%}")
+    other = elapsed - sum(timings.totals.values())
+    print(f"{'other':<12} {other * 1000:>10.2f} {other / elapsed:>7.1%}")
+    print(f"{'total':<12} {elapsed * 1000:>10.2f}")
+    if profiler is not None:
+        try:
+            profiler.dump_stats(args.profile_output)
+        except OSError as exc:
+            print(f"Error: {exc}")
+            return 1
+        print(f"Wrote {args.profile_format} profile to {args.profile_output}")
+    return status
+
+
+def render_story_output(args: argparse.Namespace) -> int:
     try:
         story_path = resolve_story_path(pathlib.Path(args.input))
-        story = build_story(story_path)
+        sections = None
+        if (
+            args.format == "html"
+            and not args.optimize_images
+            and not args.index_assets
+            and not args.cache_dir
+        ):
+            story, sections = stream_story(story_path)
+        else:
+            story = build_story(story_path, compiled_story_dir(args))
         output_dir = pathlib.Path(args.output)
         output_dir.mkdir(parents=True, exist_ok=True)
-        output_file = output_dir / "index.html"
-        output_file.write_text(
-            render_story_html(story, developer_token=args.developer_token),
-            encoding="utf-8",
-        )
+        image_variants: dict[str, tuple[ImageVariant, ...]] = {}
+        pipeline = None
+        if args.optimize_images:
+            pipeline = load_image_pipeline(args.image_cache, args.image_workers)
+            image_variants = build_image_variant_map(
+                pipeline, {"story": (story_path, story)}
+            )["story"]
+        if args.index_assets:
+            asset_manifest = index_story_assets(
+                story_path, story, pathlib.Path(args.artwork_cache)
+            )
+        else:
+            asset_manifest = load_asset_manifest(story_path)
+        if args.format == "json":
+            output_file = output_dir / "story.json"
+            with StageTimer("ast"):
+                payload = encode_story_ast(
+                    build_story_ast(
+                        story,
+                        asset_manifest=asset_manifest,
+                        image_variants=image_variants,
+                    )
+                )
+            output_file.write_bytes(payload)
+        else:
+            output_file = output_dir / "index.html"
+            with StageTimer("html"):
+                write_text_chunks(
+                    output_file,
+                    iter_story_html(
+                        story,
+                        developer_token=args.developer_token,
+                        image_variants=image_variants,
+                        asset_manifest=asset_manifest,
+                        sections=sections,
+                        render_cache=load_render_cache(args),
+                    ),
+                )
         copy_assets(story_path, output_dir)
-    except (OSError, StoryParseError) as exc:
+        if pipeline is not None:
+            copy_image_variants(pipeline, image_variants, output_dir)
+        if asset_manifest:
+            (output_dir / ASSET_MANIFEST_NAME).write_text(
+                json.dumps(asset_manifest_payload(asset_manifest)), encoding="utf-8"
+            )
+    except (OSError, StoryParseError, ImagePipelineError) as exc:
         print(f"Error: {exc}")
         return 1
 
@@ -1840,30 +6438,279 @@ def run_render(args: argparse.Namespace) -> int:
     return 0
 
 
+def run_bundle(args: argparse.Namespace) -> int:
+    try:
+        story_path = resolve_story_path(pathlib.Path(args.input))
+        story = build_story(story_path)
+        pipeline = None
+        image_variants: dict[str, tuple[ImageVariant, ...]] = {}
+        if args.optimize_images:
+            pipeline = load_image_pipeline(args.image_cache, args.image_workers)
+            image_variants = build_image_variant_map(
+                pipeline, {"story": (story_path, story)}
+            )["story"]
+        artwork_cache = pathlib.Path(args.artwork_cache)
+        if args.index_assets:
+            asset_manifest = index_story_assets(story_path, story, artwork_cache)
+        else:
+            asset_manifest = load_asset_manifest(story_path)
+        bundle = build_story_bundle(
+            story_path,
+            story,
+            pathlib.Path(args.output),
+            pipeline,
+            image_variants,
+            asset_manifest,
+            artwork_cache,
+        )
+    except (OSError, StoryParseError, ImagePipelineError) as exc:
+        print(f"Error: {exc}")
+        return 1
+
+    print(f"Bundled {story_path} -> {bundle.path}")
+    return 0
+
+
+def run_index_assets(args: argparse.Namespace) -> int:
+    story_paths = discover_story_paths(args.stories or list(DEFAULT_STORY_DIRS))
+    if not story_paths:
+        print("No stories found to index.")
+        return 1
+    failures = 0
+    for story_path in story_paths:
+        try:
+            story = build_story(story_path)
+            manifest = index_story_assets(
+                story_path, story, pathlib.Path(args.artwork_cache)
+            )
+        except (OSError, StoryParseError) as exc:
+            print(f"Error: {story_path}: {exc}")
+            failures += 1
+            continue
+        print(f"Indexed {len(manifest)} assets for {story_path}")
+    return 1 if failures else 0
+
+
+def run_search(args: argparse.Namespace) -> int:
+    try:
+        library = load_library(args)
+    except OSError as exc:
+        print(f"Error: {exc}")
+        return 1
+    hits = library.search.search(args.query, args.limit)
+    if not hits:
+        print(f"No sections match {args.query!r}.")
+        return 1
+    for hit in hits:
+        snippet = hit.snippet.replace("<mark>", "[").replace("</mark>", "]")
+        print(f"{hit.score:6.2f}  {search_hit_url(hit)}  {hit.section_title}")
+        print(f"        {html.unescape(snippet)}")
+    return 0
+
+
+def run_media(args: argparse.Namespace) -> int:
+    try:
+        library = load_library(args)
+    except OSError as exc:
+        print(f"Error: {exc}")
+        return 1
+    if not args.apple_music_id:
+        summary = library.media.summary()
+        if args.json:
+            print(json.dumps({"media": summary}, indent=2))
+            return 0
+        for item in summary:
+            print(
+                f"{item['type']:<12} {item['apple_music_id']:<12} {item['stories']:>3}  "
+                f"{item.get('title', '')} — {item.get('artist', '')}"
+            )
+        return 0
+    results = library.media.appearances(args.apple_music_id, args.type)
+    if not results:
+        print(f"No stories reference {args.apple_music_id}.")
+        return 1
+    if args.json:
+        payload = {"apple_music_id": args.apple_music_id, "media": results}
+        print(json.dumps(payload, indent=2))
+        return 0
+    for result in results:
+        media = result["media"]
+        print(f"{media['type']} {media.get('title', '')} — {media.get('artist', '')}")
+        for story in result["stories"]:
+            print(f"  {story['id']}")
+            for placement in story["sections"]:
+                where = "lead" if placement.get("lead") else f"#{placement['position']}"
+                print(f"    {placement['section_id']} ({where})")
+    return 0
+
+
+def load_developer_token(args: argparse.Namespace) -> str:
+    if not args.developer_token_file:
+        return args.developer_token
+    return pathlib.Path(args.developer_token_file).read_text(encoding="utf-8").strip()
+
+
+def build_serve_handler(
+    args: argparse.Namespace,
+    library: StoryLibrary,
+    warmup: StoryWarmup,
+    access_log: AccessLog | None = None,
+    memory_budget: MemoryBudget | None = None,
+    previous: type[http.server.BaseHTTPRequestHandler] | None = None,
+) -> type[http.server.BaseHTTPRequestHandler]:
+    entries = library.entries
+    image_pipeline = None
+    image_variants: dict[str, dict[str, tuple[ImageVariant, ...]]] = {}
+    asset_manifests: dict[str, dict[str, AssetInfo]] = {}
+    if args.optimize_images:
+        image_pipeline = load_image_pipeline(args.image_cache, args.image_workers)
+    stories: dict[str, tuple[pathlib.Path, Story]] = {}
+    if image_pipeline is not None or args.index_assets:
+        for story_id, entry in entries.items():
+            try:
+                stories[story_id] = (
+                    entry.path,
+                    build_story(entry.path, compiled_story_dir(args)),
+                )
+            except (OSError, StoryParseError):
+                continue
+    if image_pipeline is not None:
+        image_variants = build_image_variant_map(image_pipeline, stories)
+    for story_id, entry in entries.items():
+        if story_id in stories:
+            asset_manifests[story_id] = index_story_assets(
+                entry.path, stories[story_id][1], pathlib.Path(args.artwork_cache)
+            )
+        else:
+            asset_manifests[story_id] = load_asset_manifest(entry.path)
+    return make_story_handler(
+        library,
+        load_developer_token(args),
+        image_pipeline,
+        image_variants,
+        asset_manifests,
+        pathlib.Path(args.bundle_dir),
+        pathlib.Path(args.artwork_cache),
+        load_render_cache(args),
+        warmup,
+        access_log,
+        memory_budget,
+        previous,
+        compiled_story_dir(args),
+    )
+
+
+def reload_server(
+    server: http.server.ThreadingHTTPServer,
+    args: argparse.Namespace,
+    lock: threading.Lock,
+    access_log: AccessLog | None = None,
+    memory_budget: MemoryBudget | None = None,
+) -> None:
+    if not lock.acquire(blocking=False):
+        print("Reload already in progress.")
+        return
+    try:
+        started = time.monotonic()
+        current = server.RequestHandlerClass
+        library = current.library.snapshot()
+        changes = library.refresh()
+        handler = build_serve_handler(
+            args, library, StoryWarmup(), access_log, memory_budget, current
+        )
+        changed = {
+            change.story_id: library.entries[change.story_id]
+            for change in changes
+            if change.story_id in library.entries
+        }
+        if changed:
+            StoryWarmup(True, args.prewarm_workers, None, False).run(
+                changed, handler.renderer.warm
+            )
+        server.RequestHandlerClass = handler
+        current.library.rescan_interval = 0
+        print(
+            f"Reloaded {len(library.entries)} stories ({len(changes)} changed) "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+    except (OSError, ImagePipelineError) as exc:
+        print(f"Error: reload failed, keeping previous state: {exc}")
+    finally:
+        lock.release()
+
+
 def run_serve(args: argparse.Namespace) -> int:
-    story_paths = args.stories or list(DEFAULT_STORY_DIRS)
-    entries = build_story_index(story_paths)
-    if not entries:
+    if args.tracemalloc is not None:
+        import tracemalloc
+
+        tracemalloc.start(max(args.tracemalloc, 1))
+    library = load_library(args, args.rescan_interval)
+    if not library.entries:
         print("No stories found to serve.")
         return 1
-    handler = make_story_handler(entries, args.developer_token)
-    server = http.server.ThreadingHTTPServer((args.host, args.port), handler)
+    memory_budget = MemoryBudget(args.memory_budget)
+    access_log = None
+    try:
+        if args.access_log:
+            access_log = AccessLog(
+                args.access_log, args.access_log_sample, args.access_log_queue
+            )
+            access_log.start()
+        handler = build_serve_handler(
+            args,
+            library,
+            StoryWarmup(
+                args.prewarm is not None, args.prewarm_workers, args.prewarm or None
+            ),
+            access_log,
+            memory_budget,
+        )
+    except (OSError, ImagePipelineError) as exc:
+        print(f"Error: {exc}")
+        return 1
+    server = make_story_server((args.host, args.port), handler)
     scheme = "http"
     if args.tls_cert and args.tls_key:
+        import ssl
+
         context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
         context.load_cert_chain(args.tls_cert, args.tls_key)
         server.socket = context.wrap_socket(server.socket, server_side=True)
         scheme = "https"
-    print(f"Serving {len(entries)} stories at {scheme}://{args.host}:{args.port}")
+    if hasattr(signal, "SIGHUP"):
+        reload_lock = threading.Lock()
+        signal.signal(
+            signal.SIGHUP,
+            lambda signum, frame: threading.Thread(
+                target=reload_server,
+                args=(server, args, reload_lock, access_log, memory_budget),
+                name="story-reload",
+                daemon=True,
+            ).start(),
+        )
+    print(
+        f"Serving {len(library.entries)} stories at {scheme}://{args.host}:{args.port}"
+    )
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         print("Shutting down server.")
+    finally:
+        if access_log is not None:
+            access_log.close()
     return 0
 
 
 def main() -> int:
-    if len(sys.argv) > 1 and sys.argv[1] in {"serve", "render"}:
+    if len(sys.argv) > 1 and sys.argv[1] in {
+        "serve",
+        "render",
+        "index-assets",
+        "bundle",
+        "search",
+        "media",
+        "cache",
+    }:
         command = sys.argv[1]
         argv = sys.argv[2:]
     else:
@@ -1872,6 +6719,16 @@ def main() -> int:
 
     if command == "serve":
         return run_serve(parse_serve_args(argv))
+    if command == "index-assets":
+        return run_index_assets(parse_index_assets_args(argv))
+    if command == "bundle":
+        return run_bundle(parse_bundle_args(argv))
+    if command == "search":
+        return run_search(parse_search_args(argv))
+    if command == "media":
+        return run_media(parse_media_args(argv))
+    if command == "cache":
+        return run_cache(parse_cache_args(argv))
     return run_render(parse_render_args(argv))
 
 
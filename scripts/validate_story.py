@@ -2,11 +2,10 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import pathlib
 import sys
-
-import yaml
-from jsonschema import Draft202012Validator
+from typing import Any
 
 SCHEMA = {
     "$schema": "https://json-schema.org/draft/2020-12/schema",
@@ -100,6 +99,8 @@ def load_front_matter(path: pathlib.Path) -> dict:
     if end_index is None:
         raise ValueError("Missing closing front matter '---'.")
 
+    import yaml
+
     front_matter_text = "\n".join(lines[1:end_index])
     data = yaml.safe_load(front_matter_text) or {}
     if not isinstance(data, dict):
@@ -107,9 +108,16 @@ def load_front_matter(path: pathlib.Path) -> dict:
     return data
 
 
+@functools.lru_cache(maxsize=1)
+def schema_validator() -> Any:
+    from jsonschema import Draft202012Validator
+
+    return Draft202012Validator(SCHEMA)
+
+
 def validate_story(data: dict) -> list[str]:
     errors: list[str] = []
-    validator = Draft202012Validator(SCHEMA)
+    validator = schema_validator()
     for error in sorted(validator.iter_errors(data), key=lambda err: err.path):
         path = "/".join(str(item) for item in error.path)
         location = f"{path}: " if path else ""